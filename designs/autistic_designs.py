@@ -15,6 +15,7 @@ rainbow_stripes = ['#E40303', '#FF8C00', '#FFED00', '#008026', '#24408E', '#7329
 
 to_show = False
 outdir = 'output/intervex/'
+sink = WriteBehindSink() # files are written in the background while the next design is drawn
 
 # canvas size - change if you want a different aspect ratio
 h, w = 500*2, 300*2
@@ -39,7 +40,7 @@ for bg in bg_options:
         draw_horiz_bars(d, [ bg_options[bg] ])
         draw_concentric_infinities(d, stripe_options[stripe_scheme], bg_options[bg], size_ratio=0.7)
         filename = f'autistic_concentric_{stripe_scheme}_on_{bg}'
-        filelocations = save_flag(d, filename, outdir, same_folder=True, show_image=to_show)
+        filelocations = save_flag(d, filename, outdir, same_folder=True, show_image=to_show, sink=sink)
 
 
 ############################### ICON ON A WHITE(ISH) BACKGROUND DESIGNS
@@ -70,11 +71,11 @@ icon_options = {'aufinity':'disability/aufinity_rainbow.png',
                 'yellow_auf': 'disability/aufinity_yellow.svg',
                 'white_auf': 'disability/aufinity_white.svg',
                 'red_auf':'disability/aufinity.svg',
-                'nautilus9':draw_nautilus,
-                'nautilus8':draw_nautilus,
-                'nautilus7': draw_nautilus,
-                'nautilus6': draw_nautilus,
-                }
+                'nautilus9':'draw_nautilus',
+                'nautilus8':'draw_nautilus',
+                'nautilus7': 'draw_nautilus',
+                'nautilus6': 'draw_nautilus',
+                } # icon files, or draw_* functions in the shape registry
 sizes = {'aufinity':0.99,
          'bordered_infinity':1,
          'gold_infinity':1.2,
@@ -99,7 +100,7 @@ for bg in bg_options:
         d = draw.Drawing(h, w)
         draw_horiz_bars(d, [ bg_options[bg] ])
         size = sizes[icon_name]
-        if type(icon_options[icon_name]) == str:
+        if icon_options[icon_name] not in SHAPES:
             embed_icon(d, icon_options[icon_name], {}, size_ratio=size)
         elif 'red_infinity' in icon_name:
             pass # TODO
@@ -110,9 +111,9 @@ for bg in bg_options:
             if d.height == d.width:
                 sr += (2.3-2.25)
                 size *= 0.9
-            icon_options[icon_name](d, spectrum_rainbow, stretch_ratio=sr, size_ratio=size)
+            get_shape(icon_options[icon_name]).function(d, spectrum_rainbow, stretch_ratio=sr, size_ratio=size)
         filename = f'plain_{icon_name}_on_{bg}'
-        filelocations = save_flag(d, filename, outdir, same_folder=True, show_image=to_show)
+        filelocations = save_flag(d, filename, outdir, same_folder=True, show_image=to_show, sink=sink)
 
 
 ############################## ICON ON DIS PRIDE BACKGROUND
@@ -131,7 +132,7 @@ for side_name in side_diags:
             scaling = 0.9
             if 'infinity' in icon_name:
                 scaling = 0.8
-            if type(icon_options[icon_name]) == str:
+            if icon_options[icon_name] not in SHAPES:
                 embed_icon(d, icon_options[icon_name], {}, size_ratio=sizes[icon_name]*scaling)
             elif 'red_infinity' in icon_name:
                 pass # TODO
@@ -139,9 +140,10 @@ for side_name in side_diags:
                 shell_num = int(icon_name[-1])
                 shell_colours = naut_options[shell_num]
                 sr = naut_sr[shell_num]
-                icon_options[icon_name](d, shell_colours, stretch_ratio=sr, size_ratio=sizes[icon_name]*scaling)
+                get_shape(icon_options[icon_name]).function(d, shell_colours, stretch_ratio=sr,
+                                                            size_ratio=sizes[icon_name]*scaling)
             filename = f'diagonal_{icon_name}_on_{side_name}'
-            filelocations = save_flag(d, filename, outdir, same_folder=True, show_image=to_show)
+            filelocations = save_flag(d, filename, outdir, same_folder=True, show_image=to_show, sink=sink)
 
 
 
@@ -155,7 +157,7 @@ for icon_name in icon_options:
         scaling = 0.9
         if 'infinity' in icon_name:
             scaling = 0.8
-        if type(icon_options[icon_name]) == str:
+        if icon_options[icon_name] not in SHAPES:
             embed_icon(d, icon_options[icon_name], {}, size_ratio=sizes[icon_name]*scaling)
         elif 'red_infinity' in icon_name:
             pass # TODO
@@ -163,9 +165,10 @@ for icon_name in icon_options:
             shell_num = int(icon_name[-1])
             shell_colours = naut_options[shell_num]
             sr = naut_sr[shell_num]
-            icon_options[icon_name](d, shell_colours, stretch_ratio=sr, size_ratio=sizes[icon_name]*scaling)
+            get_shape(icon_options[icon_name]).function(d, shell_colours, stretch_ratio=sr,
+                                                        size_ratio=sizes[icon_name]*scaling)
         filename = f'diagonal_{icon_name}_on_roylg'
-        filelocations = save_flag(d, filename, outdir, same_folder=True, show_image=to_show)
+        filelocations = save_flag(d, filename, outdir, same_folder=True, show_image=to_show, sink=sink)
 
 
 ############################## ICON IN A BELT ON HORIZONTAL STRIPES
@@ -187,15 +190,16 @@ for bg in horiz_stripe_options:
             if icon_name == 'aufinity':
                 scaling = 0.5
 
-            if type(icon_options[icon_name]) == str:
+            if icon_options[icon_name] not in SHAPES:
                 embed_icon(d, icon_options[icon_name], {}, size_ratio=sizes[icon_name]*scaling)
             #elif 'red_infinity' in icon_name:
             #    icon_options[icon_name](d, '#8f0103', stretch_ratio=1.5, size_ratio=sizes[icon_name] * scaling)
             else:
-                icon_options[icon_name](d, spectrum_rainbow, stretch_ratio=2.25,
-                                        size_ratio=sizes[icon_name]*scaling, wid=d.width/3, x_start=d.width/3)
+                get_shape(icon_options[icon_name]).function(d, spectrum_rainbow, stretch_ratio=2.25,
+                                                            size_ratio=sizes[icon_name]*scaling,
+                                                            wid=d.width/3, x_start=d.width/3)
             filename = f'horizontal_{icon_name}_on_{bg}'
-            filelocations = save_flag(d, filename, outdir, same_folder=True, show_image=to_show)
+            filelocations = save_flag(d, filename, outdir, same_folder=True, show_image=to_show, sink=sink)
 
 
 
@@ -212,7 +216,7 @@ for spec in naut_options:
             sr += 1.5
         draw_nautilus(d, naut_options[spec], stretch_ratio=sr, size_ratio=sizes[icon_name]*0.9) #, wid=d.width/3, x_start=d.width/3)
         filename = f'exp_nautilus_{spec}_on_{bg}'
-        filelocations = save_flag(d, filename, outdir, same_folder=True, show_image=to_show)
+        filelocations = save_flag(d, filename, outdir, same_folder=True, show_image=to_show, sink=sink)
 
 
 
@@ -221,12 +225,12 @@ for stripe_scheme in stripe_options:
     pun_colours = ['#4d4d4d'] * 5 + stripe_options[stripe_scheme] + ['#4d4d4d'] * 5
     draw_diagonal_stripes(d, pun_colours)
     filename = f'simple_diagonal_{stripe_scheme}_on_dark'
-    filelocations = save_flag(d, filename, outdir, same_folder=True, show_image=to_show)
+    filelocations = save_flag(d, filename, outdir, same_folder=True, show_image=to_show, sink=sink)
 
 
 # Julietanboy
 julietan = ['#c94948', '#da7756', '#dab558', '#6ea35d', '#2e7472', '#232728']
-dimensions = {'horiz':draw_horiz_bars, 'diag':draw_diagonal_stripes}
+dimensions = {'horiz':'draw_horiz_bars', 'diag':'draw_diagonal_stripes'} # names in the shape registry
 wids = {'horiz':0.7, 'diag':0.72}
 heis = {'horiz':1, 'diag':1}
 
@@ -237,7 +241,7 @@ for present in which_inf:
     for sch in schemes:
         for dim in dimensions:
             d = draw.Drawing(h, w)
-            dimensions[dim](d, schemes[sch])
+            get_shape(dimensions[dim]).function(d, schemes[sch])
             if present:
                 if present == 'simple':
                     draw_simple_infinity(d, julietan[-1], size_ratio=0.69, stretch_ratio=0.95, thick_ratio=1.13)
@@ -254,4 +258,6 @@ for present in which_inf:
                 draw_nautilus(d, shell_colours, stretch_ratio=sr, size_ratio=sizes[icon_name] * scaling)
 
             filename = f'inf_stripes_{sch}_{dim}_{present}'
-            filelocations = save_flag(d, filename, outdir, same_folder=True, show_image=to_show)
\ No newline at end of file
+            filelocations = save_flag(d, filename, outdir, same_folder=True, show_image=to_show, sink=sink)
+
+sink.close()
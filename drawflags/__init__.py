@@ -0,0 +1,125 @@
+"""
+Use drawflags as a package:
+
+    import drawflags
+    d = drawflags.draw.Drawing(500, 300)
+    drawflags.draw_horiz_bars(d, drawflags.RAINBOW)
+
+Importing the package doesn't import any of the modules. Each one is imported the first
+time something from it is used, and drawsvg, numpy and doctest are only imported once a
+drawing actually needs them (see lazy_import in pride_stripes). Short-lived jobs that only
+render a flag or two don't pay for everything else. How long that takes depends on the machine,
+so it's checked against IMPORT_TIME_BUDGET by processflags/benchmark_shapes.py rather than here.
+
+The modules import each other by their plain names (from pride_stripes import *), so this
+directory is added to sys.path, and drawflags.pride_shapes is the same module as pride_shapes.
+
+>>> find_module('draw_heart')
+'stars_and_hearts'
+>>> find_module('RAINBOW')
+'pride_stripes'
+>>> heavy_modules_imported()
+[]
+"""
+
+import importlib
+import os
+import sys
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+if PACKAGE_DIR not in sys.path:
+    sys.path.insert(0, PACKAGE_DIR)
+
+# in the order they build on each other. If a name is defined in more than one, the later one is used,
+# same as with the star imports
+MODULES = ['shape_registry', 'path_templates', 'pride_stripes', 'pride_rings', 'stars_and_hearts',
+           'gender_symbols', 'multicolour_shapes', 'pride_shapes', 'embedding_icons',
+           'optimise_layers', 'path_booleans', 'streaming_canvas', 'svg_paths', 'svg_export',
+           'level_of_detail', 'png_export', 'flag_output', 'instrumentation']
+
+# names the modules import rather than define
+IMPORTED_NAMES = {'draw': 'drawsvg', 'np': 'numpy', 'math': 'math'}
+
+# modules that shouldn't be imported just by importing drawflags and looking up shapes
+HEAVY_MODULES = ['drawsvg', 'numpy', 'doctest', 'IPython']
+
+# seconds it should take to import drawflags and every shape module, in a fresh interpreter
+IMPORT_TIME_BUDGET = 0.05
+
+TOP_LEVEL_NAME = r'^(?:def|class)\s+([A-Za-z]\w*)|^([A-Za-z]\w*)\s*=(?!=)'
+
+index = {}
+
+
+def get_index():
+    """
+    Work out which module defines each public function, class and constant, without importing them
+    (reading the source is much quicker)
+    :return: dictionary of name to module name
+    """
+    if not index:
+        import re
+        for module_name in MODULES:
+            with open(os.path.join(PACKAGE_DIR, module_name + '.py'), encoding='utf-8') as f:
+                for match in re.finditer(TOP_LEVEL_NAME, f.read(), re.M):
+                    index[match.group(1) or match.group(2)] = module_name
+    return index
+
+
+def find_module(name):
+    """
+    :param name: name of a function, class or constant
+    :return: name of the module that defines it, or None
+    """
+    return get_index().get(name)
+
+
+def __getattr__(name):
+    if name in MODULES:
+        value = importlib.import_module(name)
+    elif name in IMPORTED_NAMES:
+        value = getattr(importlib.import_module('pride_stripes'), name)
+    elif name == '__all__':
+        value = sorted(get_index())
+    elif find_module(name):
+        value = getattr(importlib.import_module(find_module(name)), name)
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    globals()[name] = value # so that next time it doesn't come through here
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(MODULES) | set(IMPORTED_NAMES) | set(get_index()))
+
+
+def run_in_fresh_interpreter(code):
+    """
+    Run python code in a new interpreter, from the folder this package is in
+    :return: what it printed
+    """
+    import subprocess
+    result = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(PACKAGE_DIR),
+                            capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+def measure_import_time(statement='import drawflags; drawflags.embedding_icons', repeats=5):
+    """
+    :param statement: python code that imports things
+    :param repeats: how many times to measure (in a new interpreter each time)
+    :return: the quickest time the statement took, in seconds
+    """
+    code = f'import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)'
+    return min(float(run_in_fresh_interpreter(code)) for i in range(repeats))
+
+
+def heavy_modules_imported(statement='import drawflags; drawflags.draw_heart; drawflags.RAINBOW'):
+    """
+    :param statement: python code that imports things
+    :return: which of HEAVY_MODULES have actually been imported once the statement has run
+    """
+    code = (f'import sys; {statement}; '
+            f'print(" ".join(m for m in {HEAVY_MODULES!r} if m in sys.modules '
+            f'and type(sys.modules[m]).__name__ != "_LazyModule"))')
+    return run_in_fresh_interpreter(code).split()
@@ -0,0 +1,12 @@
+"""
+python -m drawflags render MANIFEST [NAME ...]
+python -m drawflags serve [MANIFEST]
+
+See flag_specs.py for what goes in a manifest, and flag_server.py for the HTTP service.
+"""
+import sys
+
+import drawflags # puts this folder on sys.path
+from flag_specs import main
+
+sys.exit(main())
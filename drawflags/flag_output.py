@@ -0,0 +1,665 @@
+"""
+Get a flag as SVG text and PNG bytes in memory, and write them wherever they're wanted.
+
+render_in_memory draws a flag without touching the disk, for notebooks (show_flag) and services
+(see flag_server.py). Saving to disk is then one place the bytes can go: save_flag writes through
+a sink, which is anything with write(filename, data), open(filename) and close(). FileSink writes to
+disk, which is the default, and MemorySink keeps the files in a dictionary instead.
+
+WriteBehindSink writes to disk from background threads, so that the next flag can be drawn while the
+last one is being written. That's most of the time a batch job takes on a network filesystem:
+
+    with WriteBehindSink() as sink:
+        for name, d in flags:
+            save_flag(d, name, sink=sink)
+
+ArchiveSink writes them all into one zip or tar file instead, as they're made, with a manifest of
+what's in it, which is much quicker to write to shared storage and upload than thousands of files.
+
+ManifestSink writes to disk and keeps a manifest of the files in a folder, with their hashes, so that
+compare_manifests can tell which have changed since it was last published. Files whose contents haven't
+changed aren't written again, and ones that are the same as another file are hard links to it.
+
+>>> d = draw.Drawing(500, 300)
+>>> bh = draw_horiz_bars(d, RAINBOW)
+>>> rendered = render_in_memory(d, png=False)
+>>> rendered.svg.startswith('<?xml'), rendered.png
+(True, None)
+>>> sink = MemorySink()
+>>> sink.write('output/svg/rainbow.svg', rendered.svg.encode('utf-8'))
+>>> with sink.open('output/png/rainbow.png') as f:
+...     n = f.write(b'not really a PNG')
+>>> sorted(sink.files), sink.files['output/png/rainbow.png']
+(['output/png/rainbow.png', 'output/svg/rainbow.svg'], b'not really a PNG')
+"""
+
+import datetime
+import hashlib
+import io
+import json
+import os
+import queue
+import re
+import struct
+import tarfile
+import threading
+import time
+import zipfile
+from collections import namedtuple
+
+from png_export import *
+
+RenderedFlag = namedtuple('RenderedFlag', ['svg', 'png'])
+
+WRITE_THREADS = 4
+
+MAX_QUEUED_FILES = 64 # drawing waits for the disk once this many files are waiting to be written
+
+WRITE_BATCH = 16 # files a writing thread takes off the queue at once, so it can make all their folders first
+
+# tar files are written as a stream, so only tar's streaming modes are used
+TAR_MODES = {'.tar': 'w|', '.tar.gz': 'w|gz', '.tgz': 'w|gz', '.tar.bz2': 'w|bz2', '.tar.xz': 'w|xz'}
+ZSTD_EXTENSIONS = ['.tar.zst', '.tar.zstd']
+
+ARCHIVE_MANIFEST = 'manifest.json'
+
+# files that are already compressed, so are stored in zips as they are
+STORED_EXTENSIONS = ['.png', '.svgz']
+
+SIZE_SUFFIX = re.compile(r'(@[\d.]+x|_\d+px)$') # from get_png_sizes
+
+MANIFEST = 'manifest.json' # kept in the folder it describes, by ManifestSink
+
+SVG_SIZE = re.compile(rb'<svg\b[^>]*?\swidth="([\d.]+)(?:px)?"[^>]*?\sheight="([\d.]+)(?:px)?"')
+
+
+def render_png_data(d, session=None):
+    """
+    :param d: Drawing object
+    :param session: RasterSession to draw it with (see png_export.py), or None to draw it the way d.rasterize does
+    :return: PNG of the drawing at its render size, as bytes
+    """
+    if session is not None:
+        return session.render(d)
+    return d.rasterize().png_data
+
+
+def render_in_memory(d, svg=True, png=True, session=None, as_memoryview=False):
+    """
+    Draw a flag as SVG and/or PNG without writing anything to disk
+    :param d: Drawing object
+    :param svg: whether to write the SVG
+    :param png: whether to draw the PNG
+    :param session: see render_png_data
+    :param as_memoryview: whether to give the PNG as a memoryview, which can be sliced and sent on without copying it
+    :return: RenderedFlag of the SVG as a string and the PNG as bytes, with None for any that weren't wanted
+    """
+    png_data = render_png_data(d, session) if png else None
+    if png_data is not None and as_memoryview:
+        png_data = memoryview(png_data)
+    return RenderedFlag(d.as_svg() if svg else None, png_data)
+
+
+def show_flag(d, png=None, session=None):
+    """
+    Show a flag in a notebook, straight from memory
+    :param d: Drawing object
+    :param png: the PNG to show, if it's already been drawn, or None to draw it
+    :param session: see render_png_data
+    """
+    from IPython.display import Image, display # slow to import, and only useful in notebooks
+    display(Image(data=bytes(png) if png is not None else render_png_data(d, session), format='png'))
+
+
+def write_atomically(filename, data):
+    """
+    Write a file so that it's either all there or not changed at all, even if the job is stopped halfway
+    through: it's written under another name and then renamed
+    >>> import tempfile; folder = tempfile.mkdtemp()
+    >>> write_atomically(os.path.join(folder, 'test.txt'), b'hello'); os.listdir(folder)
+    ['test.txt']
+    >>> import shutil; shutil.rmtree(folder)
+    """
+    temporary = f'{filename}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(temporary, 'wb') as f:
+            f.write(data)
+        os.replace(temporary, filename)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+class SinkFile(io.BytesIO):
+    """
+    A file held in memory, that's handed to on_close when it's closed
+    """
+
+    def __init__(self, on_close):
+        super().__init__()
+        self.on_close = on_close
+
+    def close(self):
+        if not self.closed:
+            self.on_close(self.getvalue())
+        super().close()
+
+
+class WriteError(OSError):
+    def __init__(self, errors):
+        """
+        :param errors: list of (filename, exception) for the files that couldn't be written
+        """
+        filename, error = errors[0]
+        more = f' (and {len(errors) - 1} more)' if len(errors) > 1 else ''
+        super().__init__(f'{filename}: {error}{more}')
+        self.errors = errors
+
+
+class FileSink:
+    """
+    Writes files to disk, making their folders as they're needed
+    """
+
+    def __init__(self):
+        self.folders = set()
+
+    def make_folder(self, filename):
+        folder = os.path.dirname(filename)
+        if folder and folder not in self.folders:
+            os.makedirs(folder, exist_ok=True)
+            self.folders.add(folder)
+
+    def open(self, filename):
+        """
+        :return: the file, open for writing bytes to. It's written under another name until it's closed
+        (see ReplacingFile), so it doesn't write into any file that's hard-linked to it
+        """
+        self.make_folder(filename)
+        return ReplacingFile(filename)
+
+    def write(self, filename, data):
+        self.make_folder(filename)
+        write_atomically(filename, data)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class WriteBehindSink(FileSink):
+    """
+    Writes files to disk from background threads. write() only waits if MAX_QUEUED_FILES are already
+    waiting, which bounds how much memory they take. Files that can't be written don't stop the rest;
+    flush() (and so close()) raises a WriteError listing them once everything else has been written.
+    Each thread has its own queue, and a file always goes to the same one (picked by its name), so when the
+    same file is written twice the later version is the one left on disk.
+
+    >>> import tempfile; folder = tempfile.mkdtemp()
+    >>> with WriteBehindSink() as sink:
+    ...     for i in range(3):
+    ...         sink.write(os.path.join(folder, 'png', f'{i}.txt'), b'%d' % i)
+    >>> sorted(os.listdir(os.path.join(folder, 'png')))
+    ['0.txt', '1.txt', '2.txt']
+    >>> import shutil; shutil.rmtree(folder)
+    """
+
+    def __init__(self, threads=WRITE_THREADS, max_queued=MAX_QUEUED_FILES):
+        super().__init__()
+        self.queues = [queue.Queue(max(1, max_queued // threads)) for _ in range(threads)]
+        self.errors = []
+        self.threads = [threading.Thread(target=self.drain, args=(q,), daemon=True) for q in self.queues]
+        for thread in self.threads:
+            thread.start()
+
+    def drain(self, files_queue):
+        """
+        Write the files on one thread's queue, in the order they were queued, until it's given None
+        """
+        while True:
+            batch = [files_queue.get()]
+            while len(batch) < WRITE_BATCH and batch[-1] is not None:
+                try:
+                    batch.append(files_queue.get_nowait())
+                except queue.Empty:
+                    break
+            files = [item for item in batch if item is not None]
+            for filename in {os.path.dirname(filename): filename for filename, data in files}.values():
+                try:
+                    self.make_folder(filename)
+                except OSError:
+                    pass # it'll be reported for each of its files
+            for filename, data in files:
+                try:
+                    write_atomically(filename, data)
+                except Exception as e:
+                    self.errors.append((filename, e))
+            for item in batch:
+                files_queue.task_done()
+            if batch[-1] is None:
+                return
+
+    def open(self, filename):
+        """
+        :return: a file in memory, which is written to disk once it's closed
+        """
+        return SinkFile(lambda data: self.write(filename, data))
+
+    def write(self, filename, data):
+        if not self.threads:
+            raise ValueError('the sink has been closed')
+        self.queues[hash(filename) % len(self.queues)].put((filename, bytes(data)))
+
+    def flush(self):
+        """
+        Wait for every file so far to be written
+        """
+        for files_queue in self.queues:
+            files_queue.join()
+        if self.errors:
+            errors, self.errors = self.errors, []
+            raise WriteError(errors)
+
+    def close(self):
+        if not self.threads:
+            return
+        try:
+            self.flush()
+        finally:
+            for files_queue in self.queues:
+                files_queue.put(None)
+            for thread in self.threads:
+                thread.join()
+            self.threads = []
+
+
+def get_flag_name(filename):
+    """
+    :return: the name of the flag a file is of
+    >>> get_flag_name('output/png/intersex@2x.png'), get_flag_name('output/svg/intersex.svgz')
+    ('intersex', 'intersex')
+    """
+    stem = os.path.basename(filename).split('.')[0]
+    return SIZE_SUFFIX.sub('', stem)
+
+
+def get_image_size(data):
+    """
+    :param data: the start of a PNG or SVG file, as bytes
+    :return: (width, height) in pixels, or None if it can't be told
+    >>> get_image_size(b'<?xml version="1.0"?>\\n<svg xmlns="http://www.w3.org/2000/svg" width="500" height="300">')
+    (500, 300)
+    """
+    if data.startswith(PNG_SIGNATURE) and data[12:16] == b'IHDR':
+        return struct.unpack('>II', data[16:24])
+    match = SVG_SIZE.search(data[:1024])
+    if match:
+        return tuple(round(float(n)) for n in match.groups())
+    return None
+
+
+class HashingFile:
+    """
+    Passes what's written on to another file, keeping count of its size and SHA-256
+    and the start of it (for get_image_size)
+    """
+
+    def __init__(self, output, on_close):
+        self.output = output
+        self.on_close = on_close
+        self.hash = hashlib.sha256()
+        self.size = 0
+        self.start = b''
+
+    def write(self, data):
+        self.hash.update(data)
+        self.size += len(data)
+        if len(self.start) < 1024:
+            self.start += bytes(data[:1024 - len(self.start)])
+        return self.output.write(data)
+
+    def close(self):
+        if not self.output.closed:
+            self.output.close()
+            self.on_close(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ArchiveSink:
+    """
+    Writes files into a zip or tar archive as they come, rather than into a folder. The type of archive is
+    worked out from its name: .zip, .tar, .tar.gz, .tar.bz2, .tar.xz or .tar.zst (which needs zstandard).
+    Nothing is written anywhere else, and only the file being added is kept in memory (not even that for
+    zips opened with open()). When it's closed, it adds manifest.json, listing each flag's files with their
+    sizes, SHA-256 hashes and dimensions in pixels.
+
+    >>> import tempfile; folder = tempfile.mkdtemp()
+    >>> with ArchiveSink(os.path.join(folder, 'gallery.zip'), root='output/') as sink:
+    ...     sink.write('output/svg/rainbow.svg', b'<svg xmlns="http://www.w3.org/2000/svg" width="500" height="300"/>')
+    >>> with zipfile.ZipFile(os.path.join(folder, 'gallery.zip')) as archive:
+    ...     manifest = json.loads(archive.read('manifest.json'))
+    ...     archive.namelist()
+    ['svg/rainbow.svg', 'manifest.json']
+    >>> manifest['flags'][0]['name'], manifest['flags'][0]['files'][0]['width']
+    ('rainbow', 500)
+    >>> import shutil; shutil.rmtree(folder)
+    """
+
+    def __init__(self, filename, root=''):
+        """
+        :param filename: the archive to write, e.g. 'output/examples.tar.gz'
+        :param root: taken off the start of the names of the files written to it, e.g. 'output/'
+        """
+        self.filename = filename
+        self.root = root
+        self.flags = {}
+        self.stream = None
+        if os.path.dirname(filename):
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+        lower = filename.lower()
+        if lower.endswith('.zip'):
+            self.zip = zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED)
+            self.tar = None
+            return
+        self.zip = None
+        if any(lower.endswith(extension) for extension in ZSTD_EXTENSIONS):
+            try:
+                from compression import zstd # Python 3.14 onwards
+                self.stream = zstd.open(filename, 'wb')
+            except ImportError:
+                import zstandard # only needed for .tar.zst
+                self.stream = zstandard.ZstdCompressor().stream_writer(open(filename, 'wb'), closefd=True)
+            self.tar = tarfile.open(fileobj=self.stream, mode='w|')
+            return
+        for extension, mode in TAR_MODES.items():
+            if lower.endswith(extension):
+                self.tar = tarfile.open(filename, mode)
+                return
+        raise ValueError(f'{filename}: archives can be .zip, ' + ', '.join(list(TAR_MODES) + ZSTD_EXTENSIONS))
+
+    def get_member_name(self, filename):
+        if self.root and filename.startswith(self.root):
+            filename = filename[len(self.root):]
+        return filename.replace(os.sep, '/').lstrip('/')
+
+    def add_to_manifest(self, filename, size, sha256, start):
+        image_size = get_image_size(start)
+        entry = {'path': self.get_member_name(filename), 'bytes': size, 'sha256': sha256,
+                 'width': image_size[0] if image_size else None, 'height': image_size[1] if image_size else None}
+        name = get_flag_name(filename)
+        self.flags.setdefault(name, {'name': name, 'files': []})['files'].append(entry)
+
+    def get_zip_info(self, filename):
+        info = zipfile.ZipInfo(self.get_member_name(filename), datetime.datetime.now().timetuple()[:6])
+        stored = info.filename.lower().endswith(tuple(STORED_EXTENSIONS))
+        info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+        return info
+
+    def add_member(self, filename, data):
+        if self.zip is not None:
+            self.zip.writestr(self.get_zip_info(filename), data)
+        else:
+            name = self.get_member_name(filename)
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = time.time()
+            self.tar.addfile(info, io.BytesIO(data))
+
+    def write(self, filename, data):
+        data = bytes(data)
+        self.add_member(filename, data)
+        self.add_to_manifest(filename, len(data), hashlib.sha256(data).hexdigest(), data[:1024])
+
+    def open(self, filename):
+        """
+        :return: a file to write to. For zips, it goes straight into the archive; tar files have to know
+        how big a file is before it starts, so for them it's kept in memory until it's closed
+        """
+        def finished(f):
+            self.add_to_manifest(filename, f.size, f.hash.hexdigest(), f.start)
+
+        if self.zip is not None:
+            return HashingFile(self.zip.open(self.get_zip_info(filename), 'w', force_zip64=True), finished)
+        return SinkFile(lambda data: self.write(filename, data))
+
+    def get_manifest(self):
+        return {'flags': list(self.flags.values())}
+
+    def close(self):
+        if self.zip is None and self.tar is None:
+            return
+        self.add_member(ARCHIVE_MANIFEST, json.dumps(self.get_manifest(), indent=1).encode('utf-8'))
+        if self.zip is not None:
+            self.zip.close()
+        else:
+            self.tar.close()
+            if self.stream is not None:
+                self.stream.close()
+        self.zip = self.tar = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def get_spec_hash(spec):
+    """
+    :param spec: anything that can be written as JSON, e.g. a flag spec (see flag_specs.py)
+    :return: a SHA-256 that only changes if the spec does
+    >>> get_spec_hash({'width': 5, 'height': 3}) == get_spec_hash({'height': 3, 'width': 5})
+    True
+    """
+    canonical = json.dumps(spec, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def has_contents(filename, data):
+    """
+    :return: whether the file exists and holds exactly data
+    """
+    try:
+        with open(filename, 'rb') as f:
+            return f.read(len(data) + 1) == data
+    except OSError:
+        return False
+
+
+def load_manifest_file(filename):
+    """
+    :param filename: a manifest written by ManifestSink
+    :return: dictionary of path (relative to the manifest's folder) to a dictionary of its sha256, bytes,
+    width, height and spec (the hash of what it was made from), or an empty one if there's no manifest yet
+    """
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, encoding='utf-8') as f:
+        return json.load(f)['files']
+
+
+def compare_manifests(old, new):
+    """
+    What needs uploading (or deleting) to make a copy of the files in old match those in new
+    :param old: dictionary from load_manifest_file, e.g. of what was last published
+    :param new: likewise, e.g. of what's in output/ now
+    :return: dictionary of 'added', 'changed' and 'deleted' to sorted lists of paths
+    >>> old = {'svg/a.svg': {'sha256': '1'}, 'svg/b.svg': {'sha256': '2'}, 'svg/c.svg': {'sha256': '3'}}
+    >>> new = {'svg/a.svg': {'sha256': '1'}, 'svg/b.svg': {'sha256': '4'}, 'svg/d.svg': {'sha256': '5'}}
+    >>> compare_manifests(old, new)
+    {'added': ['svg/d.svg'], 'changed': ['svg/b.svg'], 'deleted': ['svg/c.svg']}
+    """
+    return {'added': sorted(path for path in new if path not in old),
+            'changed': sorted(path for path in new if path in old and new[path]['sha256'] != old[path]['sha256']),
+            'deleted': sorted(path for path in old if path not in new)}
+
+
+class ManifestSink(FileSink):
+    """
+    Writes files to disk like FileSink, and keeps a manifest of them (see load_manifest_file), which is
+    saved when the sink is closed. Files already there with the same contents aren't written again, and
+    files with the same contents as another in the manifest are hard links to it rather than copies.
+    The sink's own writes replace files rather than writing into them, so they never change a file linked
+    to them, but anything else that writes into one (e.g. d.save_svg) changes all of them. Files are
+    checked against what's on disk rather than the manifest, so those are put right the next time
+    they're written through a ManifestSink.
+    The manifest is read when the sink is made and written when it's closed, so when saving a batch of
+    flags, use one ManifestSink for all of them (and only one at a time for each folder), rather than
+    one per flag, which reads and rewrites the whole manifest every time and loses entries if two overlap.
+
+    >>> import tempfile; folder = tempfile.mkdtemp()
+    >>> with ManifestSink(folder) as sink:
+    ...     sink.spec_hash = get_spec_hash({'layers': []})
+    ...     sink.write(os.path.join(folder, 'svg', 'a.svg'), b'<svg width="5" height="3"/>')
+    ...     sink.write(os.path.join(folder, 'svg', 'b.svg'), b'<svg width="5" height="3"/>')
+    >>> files = load_manifest_file(os.path.join(folder, 'manifest.json'))
+    >>> sorted(files), files['svg/b.svg']['width']
+    (['svg/a.svg', 'svg/b.svg'], 5)
+    >>> os.path.samefile(os.path.join(folder, 'svg', 'a.svg'), os.path.join(folder, 'svg', 'b.svg'))
+    True
+    >>> import shutil; shutil.rmtree(folder)
+    """
+
+    def __init__(self, folder, manifest=MANIFEST, hard_links=True):
+        """
+        :param folder: the folder the manifest describes, e.g. 'output/examples/'. Files written
+        outside it aren't put in the manifest
+        :param manifest: name of the manifest file in that folder
+        :param hard_links: whether to link files with the same contents together
+        """
+        super().__init__()
+        self.folder = folder
+        self.manifest = os.path.join(folder, manifest)
+        self.hard_links = hard_links
+        self.spec_hash = None # set by whatever's writing, to what the next files are made from
+        self.files = {path: entry for path, entry in load_manifest_file(self.manifest).items()
+                      if os.path.exists(os.path.join(folder, path))}
+        self.by_hash = {entry['sha256']: path for path, entry in self.files.items()}
+        self.skipped = self.linked = 0
+
+    def get_path(self, filename):
+        """
+        :return: the file's path in the manifest, or None if it's outside the folder
+        """
+        path = os.path.relpath(filename, self.folder)
+        if path.startswith('..') or os.path.isabs(path):
+            return None
+        return path.replace(os.sep, '/')
+
+    def link(self, existing, filename):
+        """
+        Make filename a hard link to existing, replacing whatever was there
+        :return: whether it could be linked (not every filesystem can)
+        """
+        temporary = f'{filename}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            os.link(existing, temporary)
+            os.replace(temporary, filename)
+            return True
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            return False
+
+    def write(self, filename, data):
+        path = self.get_path(filename)
+        if path is None:
+            super().write(filename, data)
+            return
+        data = bytes(data)
+        sha256 = hashlib.sha256(data).hexdigest()
+        image_size = get_image_size(data[:1024]) or (None, None)
+        entry = {'sha256': sha256, 'bytes': len(data), 'width': image_size[0], 'height': image_size[1],
+                 'spec': self.spec_hash}
+        old = self.files.get(path)
+        if old is not None and old['sha256'] == sha256 and has_contents(filename, data):
+            self.skipped += 1
+        elif not self.link_to_same(sha256, data, filename):
+            super().write(filename, data)
+        self.files[path] = entry
+        if old is not None and old['sha256'] != sha256 and self.by_hash.get(old['sha256']) == path:
+            # it's not that any more, but another file might be
+            others = [other for other, e in self.files.items() if e['sha256'] == old['sha256']]
+            if others:
+                self.by_hash[old['sha256']] = others[0]
+            else:
+                del self.by_hash[old['sha256']]
+        self.by_hash.setdefault(sha256, path)
+
+    def link_to_same(self, sha256, data, filename):
+        """
+        Make filename a hard link to a file in the manifest with the same contents, if there is one
+        :param sha256: hash of data
+        :param data: what's to be written to filename, as bytes
+        :return: whether it was linked
+        >>> import tempfile; folder = tempfile.mkdtemp()
+        >>> with ManifestSink(folder) as sink:
+        ...     sink.write(os.path.join(folder, 'a.svg'), b'<svg/>')
+        ...     with open(os.path.join(folder, 'a.svg'), 'wb') as f:
+        ...         n = f.write(b'<svg>') # changed behind its back, to something the same size
+        ...     sink.link_to_same(hashlib.sha256(b'<svg/>').hexdigest(), b'<svg/>', os.path.join(folder, 'b.svg'))
+        False
+        >>> import shutil; shutil.rmtree(folder)
+        """
+        same = self.by_hash.get(sha256)
+        if not self.hard_links or same is None or same == self.get_path(filename):
+            return False
+        existing = os.path.join(self.folder, same)
+        if not has_contents(existing, data):
+            return False # changed since the manifest was written
+        self.make_folder(filename)
+        if self.link(existing, filename):
+            self.linked += 1
+            return True
+        return False
+
+    def open(self, filename):
+        """
+        :return: a file in memory, which is written once it's closed, since its hash has to be known first
+        """
+        return SinkFile(lambda data: self.write(filename, data))
+
+    def save_manifest(self):
+        manifest = {'files': {path: self.files[path] for path in sorted(self.files)}}
+        self.make_folder(self.manifest)
+        write_atomically(self.manifest, json.dumps(manifest, indent=1).encode('utf-8'))
+
+    def close(self):
+        self.save_manifest()
+
+
+class MemorySink:
+    """
+    Keeps the files written to it in a dictionary of filename to bytes, e.g. for a service that
+    sends them on rather than saving them
+    """
+
+    def __init__(self):
+        self.files = {}
+
+    def open(self, filename):
+        """
+        :return: a file that is added to self.files when it's closed
+        """
+        return SinkFile(lambda data: self.write(filename, data))
+
+    def write(self, filename, data):
+        self.files[filename] = bytes(data)
+
+    def close(self):
+        pass
+
+
+if __name__ == '__main__':
+    doctest.testmod()
@@ -0,0 +1,434 @@
+"""
+Serve flags over HTTP, rendering them on demand.
+
+Only the standard library is used (asyncio), so it runs offline. Requests:
+
+    GET  /flags                          names of the flags in the catalogue (JSON)
+    GET  /flags/NAME.svg                 a flag from the catalogue, as SVG (or .png)
+    POST /render?format=png              a flag spec (see flag_specs.py) in the request body, as JSON
+    GET  /stats                          request, cache and render counts (JSON)
+
+Add ?width= and/or ?height= to get a different size (the flag is scaled, not redrawn).
+
+Rendered bytes are kept in a least-recently-used cache, up to cache_bytes, and sent with an
+ETag so clients can revalidate with If-None-Match. Identical requests that arrive while the
+first one is still rendering wait for that render instead of starting their own. Rendering
+(drawing, and especially rasterising PNGs) happens in a process pool so that the event
+loop is never blocked by it.
+
+Start it with python -m drawflags serve drawflags/examples.toml --port 8000,
+and see processflags/load_test_flag_server.py for a load test.
+
+>>> import asyncio
+>>> from concurrent.futures import ThreadPoolExecutor
+>>> async def demo():
+...     server = FlagServer(load_manifest(EXAMPLES), executor=ThreadPoolExecutor(2))
+...     port = await server.start(port=0)
+...     first, second = await asyncio.gather(http_request('127.0.0.1', port, '/flags/intersex.svg?width=1000'),
+...                                          http_request('127.0.0.1', port, '/flags/intersex.svg?width=1000'))
+...     again = await http_request('127.0.0.1', port, '/flags/intersex.svg?width=1000',
+...                                headers={'If-None-Match': first[1]['etag']})
+...     missing = await http_request('127.0.0.1', port, '/flags/nope.svg')
+...     await server.stop()
+...     return first[0], first[2] == second[2], b'width="1000"' in first[2], again[0], missing[0], server.stats
+>>> status, same, scaled, revalidated, missing, stats = asyncio.run(demo())
+>>> status, same, scaled, revalidated, missing
+(200, True, True, 304, 404)
+>>> stats['renders'], stats['coalesced'], stats['cache hits']
+(1, 1, 1)
+
+Requests it can't read, or for flags too big to draw, get a 400 or 413 rather than a dropped connection:
+
+>>> async def bad_requests():
+...     server = FlagServer(executor=ThreadPoolExecutor(1))
+...     port = await server.start(port=0)
+...     reader, writer = await asyncio.open_connection('127.0.0.1', port)
+...     writer.write(b'POST /render HTTP/1.1\\r\\nContent-Length: lots\\r\\n\\r\\n')
+...     unreadable = await reader.readline()
+...     writer.close()
+...     huge = json.dumps({'width': 1000000, 'height': 600000, 'layers': []}).encode('utf-8')
+...     too_big = await http_request('127.0.0.1', port, '/render', method='POST', body=huge)
+...     await server.stop()
+...     return unreadable.split()[1], too_big[0], server.stats['renders']
+>>> asyncio.run(bad_requests())
+(b'400', 400, 0)
+
+A request that's given up on doesn't take the render down with it, for the others waiting for the same flag:
+
+>>> async def first_cancelled():
+...     server = FlagServer(load_manifest(EXAMPLES), executor=ThreadPoolExecutor(1))
+...     first = asyncio.ensure_future(server.render(server.catalogue['intersex']))
+...     await asyncio.sleep(0)
+...     second = asyncio.ensure_future(server.render(server.catalogue['intersex']))
+...     await asyncio.sleep(0)
+...     first.cancel()
+...     etag, content = await second
+...     server.executor.shutdown()
+...     return first.cancelled(), content.startswith(b'<?xml'), server.stats['renders']
+>>> asyncio.run(first_cancelled())
+(True, True, 1)
+"""
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from flag_specs import *
+from flag_output import *
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'examples.toml')
+
+CONTENT_TYPES = {'svg': 'image/svg+xml', 'png': 'image/png'}
+
+MAX_BODY_BYTES = 2**20 # flag specs are small
+MAX_RENDER_SIZE = 10000 # pixels, in either direction
+
+
+def render_bytes(spec, filetype='svg', width=None, height=None):
+    """
+    Draw a flag and return it as bytes, without touching the disk. Runs in the worker processes,
+    which each keep a RasterSession for their PNGs.
+    :param spec: flag spec (see flag_specs.py)
+    :param filetype: 'svg' or 'png'
+    :param width: width to render at. If only one of width and height is given, the other keeps the aspect ratio
+    :param height: height to render at
+    :return: bytes
+    """
+    d = build_flag(spec)
+    if width or height:
+        d.set_render_size(width, height)
+    if filetype == 'png':
+        return render_in_memory(d, svg=False, session=get_session()).png
+    return render_in_memory(d, png=False).svg.encode('utf-8')
+
+
+def get_request_key(spec, filetype, width, height):
+    """
+    :return: a key that is the same for requests that would render the same bytes
+    >>> get_request_key({'width': 5, 'height': 3, 'layers': []}, 'svg', None, None) == \\
+    ...     get_request_key({'layers': [], 'height': 3, 'width': 5}, 'svg', None, None)
+    True
+    """
+    canonical = json.dumps([spec, filetype, width, height], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message=''):
+        super().__init__(message)
+        self.status = status
+
+
+class FlagServer:
+    """
+    Renders flags for HTTP requests, with a cache and coalescing of identical requests
+    """
+
+    def __init__(self, catalogue=None, workers=None, cache_bytes=64*2**20, executor=None):
+        """
+        :param catalogue: dictionary of flag name to flag spec, for GET /flags/NAME.svg
+        :param workers: how many processes to render in (default: one per CPU)
+        :param cache_bytes: how many bytes of rendered flags to keep
+        :param executor: use this concurrent.futures executor instead of starting a process pool
+        """
+        self.catalogue = catalogue or {}
+        # spawned rather than forked, so the workers don't inherit the server's sockets
+        self.executor = executor or ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        self.cache_bytes = cache_bytes
+        self.cache = OrderedDict() # request key: (etag, bytes), least recently used first
+        self.cached_bytes = 0
+        self.in_flight = {} # request key: task rendering it, which identical requests wait for
+        self.stats = Counter()
+        self.listening = None
+        self.connections = set() # tasks answering requests
+
+    def remember(self, key, etag, content):
+        """
+        Add rendered bytes to the cache, dropping the least recently used ones to make room
+        """
+        if len(content) > self.cache_bytes:
+            return
+        self.cache[key] = (etag, content)
+        self.cached_bytes += len(content)
+        while self.cached_bytes > self.cache_bytes:
+            old_etag, old_content = self.cache.popitem(last=False)[1]
+            self.cached_bytes -= len(old_content)
+            self.stats['evictions'] += 1
+
+    async def render(self, spec, filetype='svg', width=None, height=None):
+        """
+        Render a flag, or get it from the cache, or wait for an identical render that's already happening
+        :return: etag, bytes
+        """
+        key = get_request_key(spec, filetype, width, height)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.stats['cache hits'] += 1
+            return self.cache[key]
+        if key in self.in_flight:
+            self.stats['coalesced'] += 1
+        else:
+            self.stats['renders'] += 1
+            task = asyncio.ensure_future(self.render_uncached(key, spec, filetype, width, height))
+            task.add_done_callback(lambda task: task.cancelled() or task.exception()) # in case nobody's waiting
+            self.in_flight[key] = task
+        # a request that's cancelled (e.g. its client went away) stops waiting, but the render carries on
+        # for the other requests waiting for it, and for the cache
+        return await asyncio.shield(self.in_flight[key])
+
+    async def render_uncached(self, key, spec, filetype, width, height):
+        """
+        Render a flag in the executor and remember it
+        :return: etag, bytes
+        """
+        try:
+            loop = asyncio.get_running_loop()
+            content = await loop.run_in_executor(self.executor, render_bytes, spec, filetype, width, height)
+            result = ('"' + hashlib.sha256(content).hexdigest()[:32] + '"', content)
+            self.remember(key, *result)
+            return result
+        finally:
+            del self.in_flight[key]
+
+
+    async def respond(self, method, target, headers, body):
+        """
+        Work out the response to a request
+        :return: status, dictionary of headers, body bytes
+        """
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        path = unquote(url.path).rstrip('/')
+
+        if path == '/stats' and method == 'GET':
+            stats = dict(self.stats, cached=len(self.cache), cached_bytes=self.cached_bytes, in_flight=len(self.in_flight))
+            return json_response(stats)
+        if path == '/flags' and method == 'GET':
+            return json_response(list(self.catalogue))
+        if path.startswith('/flags/') and method == 'GET':
+            name, _, filetype = path[len('/flags/'):].rpartition('.')
+            if name not in self.catalogue:
+                raise HTTPError(HTTPStatus.NOT_FOUND, f'No flag called {name}')
+            spec = self.catalogue[name]
+        elif path == '/render' and method == 'POST':
+            filetype = query.get('format', 'svg')
+            try:
+                spec = json.loads(body)
+                check_flag_spec('spec', spec)
+            except ValueError as e: # includes json.JSONDecodeError
+                raise HTTPError(HTTPStatus.BAD_REQUEST, str(e))
+        elif path in ('/stats', '/flags', '/render') or path.startswith('/flags/'):
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+        else:
+            raise HTTPError(HTTPStatus.NOT_FOUND)
+
+        if filetype not in CONTENT_TYPES:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f'Can only render {" or ".join(CONTENT_TYPES)}')
+        width, height = get_size(query, 'width'), get_size(query, 'height')
+        check_render_size(spec, width, height)
+        etag, content = await self.render(spec, filetype, width, height)
+        response_headers = {'Content-Type': CONTENT_TYPES[filetype], 'ETag': etag, 'Cache-Control': 'max-age=3600'}
+        if headers.get('if-none-match') == etag:
+            return HTTPStatus.NOT_MODIFIED, response_headers, b''
+        return HTTPStatus.OK, response_headers, content
+
+    async def handle_connection(self, reader, writer):
+        """
+        Answer requests on a connection until the client closes it (or asks for it to be closed)
+        """
+        self.connections.add(asyncio.current_task())
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except HTTPError as e:
+                    # the rest of the request can't be found, so answer it and close the connection
+                    self.stats['bad requests'] += 1
+                    write_response(writer, e.status, {'Content-Type': 'text/plain'}, str(e).encode('utf-8'),
+                                   keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                self.stats['requests'] += 1
+                try:
+                    status, response_headers, content = await self.respond(method, target, headers, body)
+                except HTTPError as e:
+                    status, response_headers, content = e.status, {'Content-Type': 'text/plain'}, str(e).encode('utf-8')
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    status, response_headers, content = HTTPStatus.INTERNAL_SERVER_ERROR, {'Content-Type': 'text/plain'}, repr(e).encode('utf-8')
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                write_response(writer, status, response_headers, content, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            self.connections.discard(asyncio.current_task())
+
+    async def start(self, host='127.0.0.1', port=8000):
+        """
+        :param port: 0 to use any free port
+        :return: the port it's listening on
+        """
+        self.listening = await asyncio.start_server(self.handle_connection, host, port)
+        return self.listening.sockets[0].getsockname()[1]
+
+    async def stop(self, timeout=5.0):
+        """
+        Stop listening, give open connections up to timeout seconds to finish, and shut down the workers
+        """
+        self.listening.close()
+        if self.connections:
+            done, pending = await asyncio.wait(self.connections, timeout=timeout)
+            for task in pending:
+                task.cancel()
+        self.executor.shutdown(wait=False)
+
+
+def check_render_size(spec, width, height):
+    """
+    Raise a 400 if the flag would be drawn more than MAX_RENDER_SIZE pixels either way
+    :param spec: flag spec (see flag_specs.py)
+    :param width: width asked for (see render_bytes), or None
+    :param height: height asked for, or None
+    >>> check_render_size({'width': 500, 'height': 300}, None, 10000)
+    Traceback (most recent call last):
+    ...
+    flag_server.HTTPError: The flag would be 16667x10000 pixels, and can be at most 10000 either way
+    >>> check_render_size({'width': 1000000, 'height': 600000}, None, None)
+    Traceback (most recent call last):
+    ...
+    flag_server.HTTPError: The flag would be 1000000x600000 pixels, and can be at most 10000 either way
+    """
+    try:
+        spec_width, spec_height = float(spec['width']), float(spec['height'])
+    except (TypeError, ValueError):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, 'The width and height of the flag should be numbers')
+    if not (0 < spec_width and 0 < spec_height):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, 'The width and height of the flag should be more than 0')
+    if width and not height:
+        height = width * spec_height / spec_width
+    elif height and not width:
+        width = height * spec_width / spec_height
+    elif not width:
+        width, height = spec_width, spec_height
+    if max(width, height) > MAX_RENDER_SIZE:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f'The flag would be {round(width)}x{round(height)} pixels, '
+                                               f'and can be at most {MAX_RENDER_SIZE} either way')
+
+
+def get_size(query, key):
+    """
+    :return: the size asked for in the query string, or None
+    """
+    if key not in query:
+        return None
+    try:
+        size = int(query[key])
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f'{key} should be a whole number')
+    if not 0 < size <= MAX_RENDER_SIZE:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f'{key} should be between 1 and {MAX_RENDER_SIZE}')
+    return size
+
+
+def json_response(value):
+    return HTTPStatus.OK, {'Content-Type': 'application/json'}, json.dumps(value).encode('utf-8')
+
+
+async def read_request(reader):
+    """
+    :return: method, target, headers (with lower case names), body. None if the connection was closed
+    """
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, target, version = request_line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, 'The request line should be METHOD TARGET VERSION')
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, 'Content-Length should be a whole number')
+    if length < 0:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, 'Content-Length should be a whole number')
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f'The body can be at most {MAX_BODY_BYTES} bytes')
+    body = await reader.readexactly(length) if length else b''
+    return method, target, headers, body
+
+
+def write_response(writer, status, headers, content, keep_alive=True):
+    lines = [f'HTTP/1.1 {status.value} {status.phrase}', f'Content-Length: {len(content)}',
+             'Connection: ' + ('keep-alive' if keep_alive else 'close')]
+    lines += [f'{name}: {value}' for name, value in headers.items()]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + content)
+
+
+async def http_request(host, port, target, method='GET', body=b'', headers=None, connection=None):
+    """
+    A minimal HTTP client, for testing the server without needing anything else installed
+    :param connection: (reader, writer) of an open connection to reuse. If None, a new connection is opened and closed.
+    :return: status, headers (with lower case names), body
+    """
+    reader, writer = connection or await asyncio.open_connection(host, port)
+    lines = [f'{method} {target} HTTP/1.1', f'Host: {host}:{port}', f'Content-Length: {len(body)}']
+    if connection is None:
+        lines.append('Connection: close')
+    lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    response_headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        response_headers[name.strip().lower()] = value.strip()
+    content = await reader.readexactly(int(response_headers.get('content-length', 0)))
+    if connection is None:
+        writer.close()
+    return status, response_headers, content
+
+
+def serve_forever(catalogue=None, host='127.0.0.1', port=8000, workers=None, cache_bytes=64*2**20):
+    """
+    Run the server until interrupted
+    """
+    async def run():
+        server = FlagServer(catalogue, workers=workers, cache_bytes=cache_bytes)
+        await server.start(host, port)
+        print(f'Serving {len(catalogue or {})} flags on http://{host}:{port}/')
+        try:
+            await server.listening.serve_forever()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    doctest.testmod()
@@ -0,0 +1,326 @@
+"""
+Describe flags as data rather than as Python, and render them from the command line.
+
+A manifest (JSON or TOML) names each flag and gives its canvas size and a list of layers.
+Layers are drawn in order. Each one names a draw_* function and gives its keyword arguments:
+
+    {"flags": {
+        "androgyne": {"width": 500, "height": 300,
+                      "layers": [{"draw": "draw_vert_bars", "colours": ["#FE007F", "#9832FF", "#00B8E7"]}]}
+    }}
+
+or, in TOML:
+
+    [flags.androgyne]
+    width = 500
+    height = 300
+    [[flags.androgyne.layers]]
+    draw = "draw_vert_bars"
+    colours = ["#FE007F", "#9832FF", "#00B8E7"]
+
+A flag can also set "optimise" or "flatten" to true (see save_flag in processflags/utils.py).
+
+To render every flag, or only the ones matching some names or globs:
+
+    python -m drawflags render drawflags/examples.toml
+    python -m drawflags render drawflags/examples.toml 'intersex*' disability --jobs 4 --no-png
+    python -m drawflags render drawflags/examples.toml --archive output/examples.tar.gz
+    python -m drawflags render drawflags/examples.toml --keep-manifest
+    python -m drawflags render drawflags/examples.toml --trace output/trace.json
+
+and to list what has changed since the output folder was last published, given a copy of its manifest then:
+
+    python -m drawflags sync published/manifest.json output/
+
+or to serve them over HTTP (see flag_server.py):
+
+    python -m drawflags serve drawflags/examples.toml --port 8000
+
+>>> manifest = parse_manifest('{"flags": {"androgyne": {"width": 500, "height": 300, "layers": '
+...                           '[{"draw": "draw_vert_bars", "colours": ["#FE007F", "#9832FF", "#00B8E7"]}]}}}')
+>>> d = build_flag(manifest['androgyne'])
+>>> len(d.elements), d.elements[0].args['fill']
+(3, '#FE007F')
+>>> select_flags(['intersex', 'intersextrans', 'disability'], ['intersex*'])
+['intersex', 'intersextrans']
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from embedding_icons import *
+from optimise_layers import *
+from path_booleans import *
+from flag_output import *
+from instrumentation import *
+
+SHAPE_FUNCTIONS = {name: shape.function for name, shape in SHAPES.items()}
+
+REQUIRED_KEYS = ['width', 'height', 'layers']
+
+
+def parse_manifest(text, toml=False):
+    """
+    Read a manifest and check that every flag in it can be drawn
+    :param text: contents of a JSON or TOML manifest
+    :param toml: whether it's TOML
+    :return: dictionary of flag name to flag spec
+    >>> parse_manifest('{"flags": {"bad": {"width": 5, "height": 3, "layers": [{"draw": "print"}]}}}')
+    Traceback (most recent call last):
+    ...
+    ValueError: bad: layer 1 draws with print, which is not a draw_* function
+    """
+    if toml:
+        import tomllib # only in python 3.11 and later, so only imported if it's needed
+        manifest = tomllib.loads(text)
+    else:
+        manifest = json.loads(text)
+    flags = manifest.get('flags', manifest)
+    for name, spec in flags.items():
+        check_flag_spec(name, spec)
+    return flags
+
+
+def check_flag_spec(name, spec):
+    """
+    Raise a ValueError if a flag spec can't be drawn
+    :param name: name of the flag, for the error message
+    :param spec: dictionary with width, height and layers
+    """
+    if not isinstance(spec, dict):
+        raise ValueError(f'{name}: should be a dictionary with {", ".join(REQUIRED_KEYS)}')
+    for key in REQUIRED_KEYS:
+        if key not in spec:
+            raise ValueError(f'{name}: missing {key}')
+    for i, layer in enumerate(spec['layers']):
+        if not isinstance(layer, dict) or layer.get('draw') not in SHAPE_FUNCTIONS:
+            draw_name = layer.get('draw') if isinstance(layer, dict) else None
+            raise ValueError(f'{name}: layer {i+1} draws with {draw_name}, which is not a draw_* function')
+
+
+def load_manifest(path):
+    """
+    :param path: a .json or .toml file
+    :return: dictionary of flag name to flag spec
+    """
+    with open(path, encoding='utf-8') as f:
+        return parse_manifest(f.read(), toml=path.endswith('.toml'))
+
+
+def select_flags(names, patterns):
+    """
+    :param names: names of all flags in the manifest
+    :param patterns: names or globs of the flags wanted. If empty, all of them
+    :return: names of the flags to render, in manifest order
+    """
+    if not patterns:
+        return list(names)
+    for pattern in patterns:
+        if not fnmatch.filter(names, pattern):
+            raise ValueError(f'No flags match {pattern}')
+    return [name for name in names if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)]
+
+
+def build_flag(spec):
+    """
+    Draw a flag from its spec
+    :param spec: dictionary with width, height and layers
+    :return: Drawing object
+    """
+    d = draw.Drawing(spec['width'], spec['height'])
+    for layer in spec['layers']:
+        kwargs = dict(layer)
+        SHAPE_FUNCTIONS[kwargs.pop('draw')](d, **kwargs)
+    if spec.get('optimise'):
+        optimise_layers(d)
+    if spec.get('flatten'):
+        flatten_layers(d)
+    return d
+
+
+def render_flag(name, spec, directory='output/', save_png=True, save_svg=True, same_folder=False, sink=None):
+    """
+    Draw a flag from its spec and save it, laid out the same way as save_flag does
+    :param sink: where to write the files (see flag_output.py), or None to write them straight to disk
+    :return: list of files saved
+    """
+    d = build_flag(spec)
+    if sink is None:
+        sink = FileSink()
+    if isinstance(sink, ManifestSink):
+        sink.spec_hash = get_spec_hash(spec)
+    whether_save = {'png': save_png, 'svg': save_svg}
+    saved_to = []
+    for filetype in whether_save:
+        if whether_save[filetype]:
+            location = directory if same_folder else os.path.join(directory, filetype)
+            filename = os.path.join(location, name + '.' + filetype)
+            if filetype == 'png':
+                sink.write(filename, render_png_data(d))
+            else:
+                sink.write(filename, d.as_svg().encode('utf-8'))
+            saved_to.append(filename)
+    return saved_to
+
+
+def render_flag_in_memory(name, spec, **save_options):
+    """
+    Like render_flag, but keeping the files rather than saving them, for a process pool to send back
+    :return: dictionary of filename to bytes
+    """
+    sink = MemorySink()
+    render_flag(name, spec, sink=sink, **save_options)
+    return sink.files
+
+
+def render_flags(flags, names, jobs=1, sink=None, **save_options):
+    """
+    Render several flags, in parallel if jobs > 1. A flag that fails doesn't stop the others.
+    :param flags: dictionary of flag name to flag spec
+    :param names: which flags to render
+    :param jobs: how many processes to use
+    :param sink: where to write the files (see flag_output.py), e.g. an ArchiveSink. If None, they're saved
+    to disk: in one process, in the background while the next flag is drawn (see WriteBehindSink)
+    :param save_options: passed on to render_flag
+    :return: dictionary of flag name to list of files saved, or to the exception that stopped it
+    """
+    results = {}
+    if jobs <= 1:
+        write_behind = WriteBehindSink() if sink is None else None
+        for name in names:
+            try:
+                results[name] = render_flag(name, flags[name], sink=sink or write_behind, **save_options)
+            except Exception as e:
+                results[name] = e
+        if write_behind is None:
+            return results
+        try:
+            write_behind.close()
+        except WriteError as e:
+            failed = dict(e.errors)
+            for name, result in results.items():
+                if not isinstance(result, Exception):
+                    errors = [failed[filename] for filename in result if filename in failed]
+                    if errors:
+                        results[name] = errors[0]
+        return results
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        if sink is None:
+            futures = {pool.submit(render_flag, name, flags[name], **save_options): name for name in names}
+        else:
+            # the workers send their files back, and they're written here as each flag is done
+            futures = {pool.submit(render_flag_in_memory, name, flags[name], **save_options): name for name in names}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+                if sink is not None:
+                    if isinstance(sink, ManifestSink):
+                        sink.spec_hash = get_spec_hash(flags[name])
+                    for filename, data in results[name].items():
+                        sink.write(filename, data)
+                    results[name] = list(results[name])
+            except Exception as e:
+                results[name] = e
+    return {name: results[name] for name in names}
+
+
+def main(argv=None):
+    """
+    Command line interface: python -m drawflags render MANIFEST [NAME ...],
+    python -m drawflags serve [MANIFEST] or python -m drawflags sync OLD NEW
+    :return: exit code
+    """
+    parser = argparse.ArgumentParser(prog='drawflags', description='Draw pride flags')
+    commands = parser.add_subparsers(dest='command', required=True)
+    render = commands.add_parser('render', help='render flags described in a JSON or TOML manifest')
+    render.add_argument('manifest', help='.json or .toml file describing the flags')
+    render.add_argument('names', nargs='*', help='names or globs of the flags to render (default: all)')
+    render.add_argument('-o', '--output-dir', default='output/', help='where to save (default: output/)')
+    render.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='how many flags to render at once')
+    render.add_argument('--no-png', action='store_true', help="don't save PNGs")
+    render.add_argument('--no-svg', action='store_true', help="don't save SVGs")
+    render.add_argument('--same-folder', action='store_true', help='save SVGs and PNGs in the same folder')
+    render.add_argument('--archive', help='write everything into this .zip, .tar, .tar.gz or .tar.zst file, '
+                                          'with a manifest, rather than into separate files')
+    render.add_argument('--keep-manifest', action='store_true',
+                        help='keep a manifest of the files in the output folder, with their hashes, and only '
+                             'write files that have changed (see ManifestSink)')
+    render.add_argument('--trace', help='time each drawing and saving step, save them to this file as a Chrome '
+                                        'trace and print a summary (see instrumentation.py). Renders one flag '
+                                        'at a time, so every step is in the trace')
+    sync = commands.add_parser('sync', help='list the files that are added, changed or deleted between two manifests')
+    sync.add_argument('old', help='manifest (or folder with a manifest.json) of what was published')
+    sync.add_argument('new', help='manifest (or folder with a manifest.json) of what there is now')
+    sync.add_argument('--json', action='store_true', help='print the lists as JSON')
+    serve = commands.add_parser('serve', help='serve flags over HTTP (see flag_server.py)')
+    serve.add_argument('manifest', nargs='?', help='.json or .toml file of flags to serve by name')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8000)
+    serve.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='how many flags to render at once')
+    serve.add_argument('--cache-mb', type=float, default=64, help='how much rendered output to keep (default: 64)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        from flag_server import serve_forever # it isn't needed for anything else
+        flags = load_manifest(args.manifest) if args.manifest else {}
+        serve_forever(flags, host=args.host, port=args.port, workers=args.jobs, cache_bytes=int(args.cache_mb * 2**20))
+        return 0
+
+    if args.command == 'sync':
+        try:
+            old, new = [load_manifest_file(os.path.join(path, MANIFEST) if os.path.isdir(path) else path)
+                        for path in [args.old, args.new]]
+        except (OSError, ValueError, KeyError) as e:
+            print(f'sync: {e!r}', file=sys.stderr)
+            return 2
+        changes = compare_manifests(old, new)
+        if args.json:
+            print(json.dumps(changes, indent=1))
+        else:
+            for change, paths in changes.items():
+                for path in paths:
+                    print(f'{change} {path}')
+        return 0
+
+    try:
+        flags = load_manifest(args.manifest)
+        names = select_flags(list(flags), args.names)
+    except (OSError, ValueError) as e:
+        print(f'{args.manifest}: {e}', file=sys.stderr)
+        return 2
+    try:
+        if args.archive and args.keep_manifest:
+            raise ValueError('--keep-manifest is for folders; an archive has its own')
+        sink = ArchiveSink(args.archive, root=args.output_dir) if args.archive else None
+    except (OSError, ValueError, ImportError) as e:
+        print(f'{args.archive}: {e}', file=sys.stderr)
+        return 2
+    if args.keep_manifest:
+        sink = ManifestSink(args.output_dir)
+    trace = Instrumentation().start() if args.trace else None
+    results = render_flags(flags, names, jobs=1 if trace else min(args.jobs, len(names)), sink=sink,
+                           directory=args.output_dir, save_png=not args.no_png, save_svg=not args.no_svg,
+                           same_folder=args.same_folder)
+    if sink is not None:
+        sink.close()
+    if trace is not None:
+        trace.stop()
+        trace.save_chrome_trace(args.trace)
+        print(trace.format_table(limit=20), file=sys.stderr)
+    failed = 0
+    for name, result in results.items():
+        if isinstance(result, Exception):
+            failed += 1
+            print(f'{name}: failed: {result!r}', file=sys.stderr)
+        else:
+            print(f'{name}: {", ".join(result)}')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    doctest.testmod()
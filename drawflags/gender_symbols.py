@@ -56,6 +56,7 @@ def path_mercury(p, x_mid, y_mid, radius, arm_length, sharp_ratio):
 
 ############# drawing functions
 
+@register_shape
 def draw_venus_symbol(d, primary_colour, secondary_colour='none',
                       wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                       size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -92,6 +93,7 @@ def draw_venus_symbol(d, primary_colour, secondary_colour='none',
     path_venus(p, x_mid, y_mid, radius, arm_length, cross_length, joint_length)
     d.append(p)
 
+@register_shape
 def draw_mars_symbol(d, primary_colour, secondary_colour='none',
                      wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                      size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -132,6 +134,7 @@ def draw_mars_symbol(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_androgyne_symbol(d, primary_colour, secondary_colour='none',
                           wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                           size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -172,6 +175,7 @@ def draw_androgyne_symbol(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_trans_symbol(d, primary_colour, secondary_colour='none',
                       wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                       size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -200,6 +204,7 @@ def draw_trans_symbol(d, primary_colour, secondary_colour='none',
     draw_androgyne_symbol(d, primary_colour, secondary_colour, wid, hei, x_start, y_start,
                           size_ratio, stretch_ratio, sharp_ratio, sparse_ratio, thick_ratio, orientation)
 
+@register_shape
 def draw_mercury_symbol(d, primary_colour, secondary_colour='none',
                       wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                       size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -238,6 +243,7 @@ def draw_mercury_symbol(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_neutral_symbol(d, primary_colour, secondary_colour='none',
                       wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                       size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -272,6 +278,7 @@ def draw_neutral_symbol(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_nonbinary_symbol(d, primary_colour, secondary_colour='none',
                       wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                       size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -315,6 +322,7 @@ def draw_nonbinary_symbol(d, primary_colour, secondary_colour='none',
 
 
 
+@register_shape
 def draw_xenous_symbol(d, primary_colour, secondary_colour='none',
                       wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                       size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
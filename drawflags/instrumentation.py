@@ -0,0 +1,307 @@
+"""
+Find out where the time goes when drawing and saving flags.
+
+Inside a with Instrumentation() block, every draw_* function in the shape registry, d.append, d.save_svg,
+d.save_png, the sinks' write methods and the functions in HOOKED_FUNCTIONS (save_flag, write_svg...) are timed.
+Each call is recorded as a Span with
+- its wall time, and how much of that wasn't spent in other timed calls (self_seconds)
+- how many elements it appended to a drawing, and how many path commands they had
+- how many bytes it wrote
+counting everything done by the calls inside it, so draw_southern_cross includes its draw_australian_stars.
+
+Nothing is wrapped outside the with block, so there's no cost to leaving the hooks in a script. Afterwards
+the spans can be saved as a Chrome trace (open it at chrome://tracing or ui.perfetto.dev) or added up by name:
+
+>>> with Instrumentation() as trace:
+...     d = draw.Drawing(500, 300)
+...     southern_cross = get_shape('draw_southern_cross').function(d, 'white')
+>>> [(span.name, span.depth, span.elements) for span in trace.spans][:4]
+[('draw_southern_cross', 0, 5), ('draw_australian_star', 1, 1), ('draw_arbitrary_star', 2, 1), ('Drawing.append', 3, 1)]
+>>> print(trace.format_table(limit=1))  # doctest: +ELLIPSIS +NORMALIZE_WHITESPACE
+name                 calls  total ms  self ms  elements  path commands  bytes
+draw_southern_cross      1       ...      ...         5             71      0
+>>> hasattr(get_shape('draw_southern_cross').function, '__wrapped__')  # put back as it was
+False
+
+Other functions can be timed too by decorating them with @instrument, which leaves them as they are
+until an Instrumentation is started.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from flag_output import *
+from svg_export import *
+
+# methods of these classes (and of their subclasses, if they have their own) that are timed
+HOOKED_METHODS = {'Drawing': ['append', 'save_svg', 'save_png'],
+                  'RasterSession': ['save_png'],
+                  'FileSink': ['write'],
+                  'ArchiveSink': ['write'],
+                  'MemorySink': ['write']}
+
+# functions that are timed, besides every draw_* function, wherever they've been imported to
+HOOKED_FUNCTIONS = ['save_flag', 'render_flag', 'render_png_data', 'write_svg', 'save_pngs', 'save_tiled_png',
+                    'save_svg_as_png']
+
+FILENAME_PARAMETERS = ['filename', 'fname'] # parameters whose file's size is counted as bytes written
+
+TABLE_COLUMNS = ['name', 'calls', 'total ms', 'self ms', 'elements', 'path commands', 'bytes']
+
+instrumented_functions = set() # functions decorated with @instrument
+
+running = None # the Instrumentation that's running, if any
+
+
+def instrument(function):
+    """
+    Decorator that adds a function to what an Instrumentation times. The function itself isn't changed.
+    """
+    instrumented_functions.add(function)
+    return function
+
+
+def count_path_commands(element):
+    """
+    :param element: drawsvg element
+    :return: number of commands in its path data and its children's
+    >>> count_path_commands(draw.Group([draw.Path(d='M0,0 L1,1 L2,0 Z'), draw.Circle(0, 0, 1)]))
+    4
+    """
+    d = element.args.get('d') if hasattr(element, 'args') else None
+    commands = len(PATH_SEGMENT.findall(d)) if isinstance(d, str) else 0
+    return commands + sum(count_path_commands(child) for child in getattr(element, 'children', []))
+
+
+def count_elements(element):
+    """
+    :param element: drawsvg element
+    :return: 1 for it, plus all the elements in it
+    """
+    return 1 + sum(count_elements(child) for child in getattr(element, 'children', []))
+
+
+class Span:
+    """
+    One timed call. The counts include the calls made inside it.
+    """
+    __slots__ = ['name', 'parent', 'depth', 'thread', 'start', 'seconds', 'child_seconds',
+                 'elements', 'path_commands', 'bytes_written']
+
+    def __init__(self, name, parent, thread, start):
+        self.name = name
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.thread = thread
+        self.start = start
+        self.seconds = None
+        self.child_seconds = 0.0
+        self.elements = 0
+        self.path_commands = 0
+        self.bytes_written = 0
+
+    @property
+    def self_seconds(self):
+        return self.seconds - self.child_seconds
+
+
+class Instrumentation:
+    """
+    Times the drawing and saving functions while it's running (see the top of this file)
+    """
+
+    def __init__(self):
+        self.spans = [] # in the order they started
+        self.stacks = threading.local()
+        self.patched = [] # (namespace, name, original), to put back afterwards
+        self.started = None
+
+    def get_stack(self):
+        if not hasattr(self.stacks, 'spans'):
+            self.stacks.spans = []
+        return self.stacks.spans
+
+    def wrap(self, function, name):
+        """
+        :param function: function or method to time
+        :param name: what to call its spans
+        :return: a function that does the same, and records a Span each time it's called
+        """
+        parameters = list(get_defaults(function))
+        data_index = parameters.index('data') if 'data' in parameters else None
+        element_index = parameters.index('element') if 'element' in parameters else None
+        filename_index = next((parameters.index(p) for p in FILENAME_PARAMETERS if p in parameters), None)
+
+        def get_argument(index, args, kwargs):
+            if index < len(args):
+                return args[index]
+            return kwargs.get(parameters[index])
+
+        def timed(*args, **kwargs):
+            stack = self.get_stack()
+            parent = stack[-1] if stack else None
+            span = Span(name, parent, threading.get_ident(), time.perf_counter())
+            self.spans.append(span)
+            # an element appended by a subclass's append is only counted once, by the outermost one,
+            # and the same for data a sink passes on to its parent class
+            outermost = parent is None or parent.name.rsplit('.', 1)[-1] != name.rsplit('.', 1)[-1]
+            if element_index is not None and outermost:
+                element = get_argument(element_index, args, kwargs)
+                span.elements = count_elements(element)
+                span.path_commands = count_path_commands(element)
+            if data_index is not None and outermost:
+                data = get_argument(data_index, args, kwargs)
+                span.bytes_written = len(data) if data is not None else 0
+            stack.append(span)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stack.pop()
+                span.seconds = time.perf_counter() - span.start
+                if filename_index is not None and data_index is None and outermost and span.bytes_written == 0:
+                    filename = get_argument(filename_index, args, kwargs)
+                    if isinstance(filename, str) and os.path.isfile(filename):
+                        span.bytes_written = os.path.getsize(filename)
+                if parent is not None:
+                    parent.child_seconds += span.seconds
+                    parent.elements += span.elements
+                    parent.path_commands += span.path_commands
+                    parent.bytes_written += span.bytes_written
+
+        timed.__wrapped__ = function
+        return timed
+
+    def patch(self, namespace, name, replacement):
+        """
+        :param namespace: module dictionary, SHAPES or a class
+        """
+        if isinstance(namespace, dict):
+            self.patched.append((namespace, name, namespace[name]))
+            namespace[name] = replacement
+        else:
+            self.patched.append((namespace, name, namespace.__dict__[name]))
+            setattr(namespace, name, replacement)
+
+    def get_classes(self, cls):
+        yield cls
+        for subclass in cls.__subclasses__():
+            yield from self.get_classes(subclass)
+
+    def start(self):
+        global running
+        if running is not None:
+            raise RuntimeError('an Instrumentation is already running')
+        running = self
+        self.started = time.perf_counter()
+        functions = {shape.function: shape.name for shape in find_shapes()}
+        for module in list(sys.modules.values()):
+            namespace = getattr(module, '__dict__', None)
+            if isinstance(namespace, dict):
+                for name in HOOKED_FUNCTIONS:
+                    if callable(namespace.get(name)) and hasattr(namespace[name], '__code__'):
+                        functions.setdefault(namespace[name], name)
+        for function in instrumented_functions:
+            functions.setdefault(function, function.__qualname__)
+        timed = {id(function): self.wrap(function, name) for function, name in functions.items()}
+        # every module the functions have been imported to, including the ones they're defined in,
+        # and dictionaries of them such as SHAPE_FUNCTIONS in flag_specs
+        for module in list(sys.modules.values()):
+            namespace = getattr(module, '__dict__', None)
+            if not isinstance(namespace, dict):
+                continue
+            for key, value in list(namespace.items()):
+                if id(value) in timed and value in functions:
+                    self.patch(namespace, key, timed[id(value)])
+                elif type(value) is dict and value is not SHAPES:
+                    for name, function in list(value.items()):
+                        if id(function) in timed and function in functions:
+                            self.patch(value, name, timed[id(function)])
+        for name, shape in list(SHAPES.items()):
+            if id(shape.function) in timed:
+                self.patch(SHAPES, name, shape._replace(function=timed[id(shape.function)]))
+        for class_name, method_names in HOOKED_METHODS.items():
+            base = draw.Drawing if class_name == 'Drawing' else globals()[class_name]
+            for cls in self.get_classes(base):
+                for method_name in method_names:
+                    if method_name in cls.__dict__:
+                        self.patch(cls, method_name, self.wrap(cls.__dict__[method_name],
+                                                               f'{base.__name__}.{method_name}'))
+        return self
+
+    def stop(self):
+        global running
+        for namespace, name, original in reversed(self.patched):
+            if isinstance(namespace, dict):
+                namespace[name] = original
+            else:
+                setattr(namespace, name, original)
+        self.patched.clear()
+        running = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def get_chrome_trace(self):
+        """
+        :return: the spans as a Chrome trace event dictionary
+        """
+        pid = os.getpid()
+        events = [{'name': span.name, 'ph': 'X', 'pid': pid, 'tid': span.thread,
+                   'ts': round((span.start - self.started) * 1e6, 1), 'dur': round(span.seconds * 1e6, 1),
+                   'args': {'elements': span.elements, 'path_commands': span.path_commands,
+                            'bytes': span.bytes_written}}
+                  for span in self.spans if span.seconds is not None]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save_chrome_trace(self, filename):
+        """
+        :param filename: where to save it, e.g. 'output/trace.json'
+        :return: filename
+        """
+        if os.path.dirname(filename):
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, 'w') as f:
+            json.dump(self.get_chrome_trace(), f)
+        return filename
+
+    def summarise(self):
+        """
+        :return: list of [name, calls, total ms, self ms, elements, path commands, bytes], slowest first.
+        A call inside another with the same name (e.g. a subclass's append) isn't counted again.
+        """
+        rows = defaultdict(lambda: [0, 0.0, 0.0, 0, 0, 0])
+        for span in self.spans:
+            if span.seconds is None:
+                continue
+            row = rows[span.name]
+            row[2] += 1000 * span.self_seconds
+            if span.parent is None or span.parent.name != span.name:
+                row[0] += 1
+                row[1] += 1000 * span.seconds
+                row[3] += span.elements
+                row[4] += span.path_commands
+                row[5] += span.bytes_written
+        return sorted(([name] + row for name, row in rows.items()), key=lambda row: row[2], reverse=True)
+
+    def format_table(self, limit=None):
+        """
+        :param limit: how many rows to show, or None for all of them
+        :return: summarise() as a table
+        """
+        rows = [[name, str(calls), f'{total:.1f}', f'{own:.1f}', str(elements), str(commands), str(written)]
+                for name, calls, total, own, elements, commands, written in self.summarise()[:limit]]
+        widths = [max(len(row[i]) for row in rows + [TABLE_COLUMNS]) for i in range(len(TABLE_COLUMNS))]
+        lines = [[TABLE_COLUMNS[0].ljust(widths[0])] + [c.rjust(w) for c, w in zip(TABLE_COLUMNS[1:], widths[1:])]]
+        lines += [[row[0].ljust(widths[0])] + [c.rjust(w) for c, w in zip(row[1:], widths[1:])] for row in rows]
+        return '\n'.join('  '.join(line).rstrip() for line in lines)
+
+
+if __name__ == '__main__':
+    doctest.testmod()
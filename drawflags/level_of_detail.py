@@ -0,0 +1,290 @@
+"""
+Draw flags with less detail when they're only going to be seen small, e.g. as 90px thumbnails in a gallery.
+
+At that size a border a fraction of a pixel wide, a curve split into dozens of beziers or a full-size
+embedded icon all cost the renderer as much as they do at full size, but look no different from
+something much simpler. Given the width in pixels the flag will be shown at, these
+- drop strokes thinner than MIN_STROKE_PIXELS (and shapes that were only a stroke)
+- drop shapes smaller than MIN_SHAPE_PIXELS across, and ones that paint nothing
+- turn curves that are within CURVE_TOLERANCE_PIXELS of straight into lines, and leave out points
+  that are that close to the line between their neighbours
+- swap embedded SVG icons for PNGs rasterised at the size they'll be shown (see get_icon_thumbnail)
+
+reduce_detail is a pass over a finished drawing, like optimise_layers. LevelOfDetailDrawing does
+the same to each element as it's appended, so every draw_* function draws less detail without
+being changed:
+
+>>> d = LevelOfDetailDrawing(500, 300, pixel_width=90)
+>>> bh = draw_horiz_bars(d, RAINBOW)
+>>> d.append(draw.Circle(250, 150, 100, fill='white', stroke='black', stroke_width=0.5))
+>>> d.append(draw.Circle(250, 150, 1, fill='black'))
+>>> len(d.elements), d.elements[-1].args.get('stroke')
+(7, None)
+>>> d.detail_skipped
+1
+"""
+
+import base64
+import functools
+import hashlib
+import math
+import os
+import re
+
+from svg_paths import *
+
+MIN_STROKE_PIXELS = 0.2 # strokes thinner than this are left out
+
+MIN_SHAPE_PIXELS = 0.5 # shapes that are smaller than this both ways are left out
+
+CURVE_TOLERANCE_PIXELS = 0.1 # how far simplified paths can stray from the original
+
+ICON_OVERSAMPLING = 2 # icons are rasterised at this many pixels per pixel shown, so they stay sharp on HiDPI screens
+
+ICON_THUMBNAIL_DIR = 'output/icons/thumbnails/'
+
+SVG_DATA_URI = re.compile(r'data:image/svg\+xml(;base64)?,(.*)', re.S)
+
+
+def get_pixel_scale(element, scale):
+    """
+    :param element: drawsvg element
+    :param scale: pixels per unit of the drawing
+    :return: pixels per unit of the element's own coordinates, or None if its transform can't be read
+    """
+    matrix = parse_transform(element.args.get('transform'))
+    if matrix is None:
+        return None
+    a, b, c, d = matrix[:4]
+    return scale * math.sqrt(abs(a*d - b*c))
+
+
+def distance_to_segment(point, start, end):
+    """
+    >>> distance_to_segment((5, 3), (0, 0), (10, 0)), distance_to_segment((13, 4), (0, 0), (10, 0))
+    (3.0, 5.0)
+    """
+    (px, py), (ax, ay), (bx, by) = point, start, end
+    dx, dy = bx - ax, by - ay
+    length = dx*dx + dy*dy
+    t = 0.0 if length == 0 else min(1.0, max(0.0, ((px - ax)*dx + (py - ay)*dy) / length))
+    return math.hypot(px - ax - t*dx, py - ay - t*dy)
+
+
+def simplify_path(path, tolerance):
+    """
+    Turn curves whose control points are within tolerance of the line between their ends into lines,
+    and leave out points on lines that are within tolerance of the line between their neighbours
+    :param path: SvgPath
+    :param tolerance: how far the path can move, in its own coordinates
+    :return: new SvgPath
+    >>> wobbly = SvgPath.from_path_data('M 0,0 C 10,0.01 20,-0.01 30,0 L 40,0.02 L 50,0 L 50,50 Z')
+    >>> simplify_path(wobbly, 0.1).to_path_data()
+    'M0.0,0.0 L50.0,0.0 L50.0,50.0 Z'
+    """
+    commands, numbers = [], []
+    start = current = control = (0.0, 0.0)
+    dropped = [] # points left out of the line that ends at current
+
+    def line_to(point):
+        nonlocal current
+        if commands[-1] == 'L':
+            anchor = start if commands[-2] == 'Z' else (numbers[-4], numbers[-3])
+            if all(distance_to_segment(p, anchor, point) <= tolerance for p in dropped + [current]):
+                # the last line can be stretched to reach this point instead
+                dropped.append(current)
+                numbers[-2:] = point
+                current = point
+                return
+        dropped.clear()
+        commands.append('L')
+        numbers.extend(point)
+        current = point
+
+    i = 0
+    for cmd in path.commands:
+        if cmd == 'A':
+            values = path.numbers[i:i + ARC_PARAMETERS + 2].tolist()
+            i += ARC_PARAMETERS + 2
+        else:
+            values = path.numbers[i:i + 2*COMMAND_POINTS[cmd]].tolist()
+            i += 2*COMMAND_POINTS[cmd]
+        points = [tuple(values[k:k + 2]) for k in range(0, len(values), 2)]
+        # write S and T out in full, since what they mean depends on what came before
+        if cmd == 'S':
+            cmd, points = 'C', [(2*current[0] - control[0], 2*current[1] - control[1])] + points
+        elif cmd == 'T':
+            cmd, points = 'Q', [(2*current[0] - control[0], 2*current[1] - control[1])] + points
+        control = points[-2] if cmd in ['C', 'Q'] else points[-1] if points else current
+
+        if cmd == 'M':
+            commands.append('M')
+            numbers.extend(points[0])
+            start = current = points[0]
+            dropped.clear()
+        elif cmd == 'Z':
+            commands.append('Z')
+            current = start
+            dropped.clear()
+        elif cmd == 'L' or (cmd in ['C', 'Q'] and
+                            all(distance_to_segment(p, current, points[-1]) <= tolerance for p in points[:-1])):
+            line_to(points[-1])
+        elif cmd == 'A' and max(values[0], values[1]) <= tolerance:
+            line_to((values[-2], values[-1]))
+        else:
+            commands.append(cmd)
+            numbers.extend(values if cmd == 'A' else [v for p in points for v in p])
+            current = (values[-2], values[-1])
+            dropped.clear()
+    return SvgPath(''.join(commands), numbers)
+
+
+@functools.lru_cache(maxsize=256)
+def get_icon_thumbnail(svg_data, width, height, cache_dir=ICON_THUMBNAIL_DIR):
+    """
+    Rasterise an icon at the size it'll be shown, keeping the PNG in cache_dir so each icon is only
+    rasterised once at each size (delete the folder to start again)
+    :param svg_data: the icon's SVG, as bytes
+    :param width: width of the PNG, in pixels
+    :param height: height of the PNG, in pixels
+    :param cache_dir: where to keep the PNGs, or None to not keep them
+    :return: PNG as bytes, or None if there's nothing to rasterise it with
+    """
+    cache_path = None
+    if cache_dir is not None:
+        name = hashlib.sha1(svg_data).hexdigest()[:16]
+        cache_path = os.path.join(cache_dir, f'{name}_{width}x{height}.png')
+        if os.path.exists(cache_path):
+            with open(cache_path, 'rb') as f:
+                return f.read()
+    try:
+        import cairosvg # the same as save_png uses
+    except (ImportError, OSError):
+        return None
+    png = cairosvg.svg2png(bytestring=svg_data, output_width=width, output_height=height)
+    if cache_path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_path, 'wb') as f:
+            f.write(png)
+    return png
+
+
+def use_icon_thumbnail(element, scale):
+    """
+    Swap an image of an SVG icon for a PNG of it at the size it'll be shown (see get_icon_thumbnail)
+    :param element: draw.Image
+    :param scale: pixels per unit of the element's coordinates
+    :return: whether it was swapped
+    """
+    href = element.args.get('xlink:href', '')
+    match = SVG_DATA_URI.match(href)
+    if match:
+        svg_data = base64.b64decode(match.group(2)) if match.group(1) else match.group(2).encode('utf-8')
+    elif href.lower().endswith('.svg') and os.path.exists(href):
+        with open(href, 'rb') as f:
+            svg_data = f.read()
+    else:
+        return False
+    width = math.ceil(get_number_arg(element, 'width', 0) * scale * ICON_OVERSAMPLING)
+    height = math.ceil(get_number_arg(element, 'height', 0) * scale * ICON_OVERSAMPLING)
+    if width <= 0 or height <= 0:
+        return False
+    png = get_icon_thumbnail(svg_data, width, height)
+    if png is None:
+        return False
+    element.args['xlink:href'] = 'data:image/png;base64,' + base64.b64encode(png).decode('ascii')
+    return True
+
+
+def reduce_element_detail(element, scale):
+    """
+    Simplify an element for showing at a given scale (see the top of this file)
+    :param element: drawsvg element. Altered in place
+    :param scale: pixels per unit of the drawing
+    :return: the element, or None if it can't be seen at that scale
+    """
+    if not isinstance(element, draw.DrawingElement) or element.id is not None:
+        return element
+    scale = get_pixel_scale(element, scale)
+    if scale is None:
+        return element
+    if is_invisible(element):
+        return None
+
+    if has_visible_stroke(element) and get_number_arg(element, 'stroke-width', 1) * scale < MIN_STROKE_PIXELS:
+        if not has_visible_fill(element) and not element.children:
+            return None
+        for name in list(element.args):
+            if name == 'stroke' or name.startswith('stroke-'):
+                del element.args[name]
+
+    bounds = paint_bounds(element)
+    if bounds is not None:
+        x_min, y_min, x_max, y_max = polygon_box(bounds)
+        if (x_max - x_min) * scale < MIN_SHAPE_PIXELS and (y_max - y_min) * scale < MIN_SHAPE_PIXELS:
+            return None
+
+    if isinstance(element, draw.Path) and element.args.get('d'):
+        try:
+            path = SvgPath.from_path_data(element.args['d'])
+        except ValueError:
+            return element
+        simplified = simplify_path(path, CURVE_TOLERANCE_PIXELS / scale)
+        if len(simplified.numbers) < len(path.numbers):
+            element.args['d'] = simplified.to_path_data()
+    elif isinstance(element, draw.Image):
+        use_icon_thumbnail(element, scale)
+
+    if element.children:
+        element.children[:] = [child for child in element.children
+                               if reduce_element_detail(child, scale) is not None]
+    return element
+
+
+def reduce_detail(d, pixel_width):
+    """
+    Simplify every element of a drawing for showing it pixel_width pixels wide (see the top of this file)
+    :param d: Drawing object. Altered in place
+    :param pixel_width: width it will be shown at, in pixels
+    :return: number of elements removed
+    >>> d = draw.Drawing(500, 300)
+    >>> bh = draw_horiz_bars(d, RAINBOW)
+    >>> d.append(draw.Circle(100, 100, 1, fill='black'))
+    >>> reduce_detail(d, 90), len(d.elements)
+    (1, 6)
+    """
+    scale = pixel_width / d.view_box[2]
+    referenced = referenced_elements(d)
+    before = len(d.elements)
+    d.elements[:] = [element for element in d.elements
+                     if id(element) in referenced or reduce_element_detail(element, scale) is not None]
+    return before - len(d.elements)
+
+
+class LevelOfDetailDrawing(draw.Drawing):
+    """
+    A draw.Drawing that simplifies each element as it is appended, for showing it pixel_width pixels wide
+    (see reduce_element_detail). Its SVG and PNG come out that size too.
+    """
+
+    def __init__(self, width, height, pixel_width, origin=(0, 0), **svg_args):
+        """
+        :param width: width of the canvas
+        :param height: height of the canvas
+        :param pixel_width: width it will be shown at, in pixels
+        :param origin: same as for draw.Drawing
+        """
+        super().__init__(width, height, origin=origin, **svg_args)
+        self.set_render_size(w=pixel_width)
+        self.detail_scale = pixel_width / width
+        self.detail_skipped = 0
+
+    def append(self, element, *, z=None):
+        if reduce_element_detail(element, self.detail_scale) is None:
+            self.detail_skipped += 1
+            return
+        super().append(element, z=z)
+
+
+if __name__ == '__main__':
+    doctest.testmod()
@@ -1,7 +1,6 @@
-import drawsvg
-
 from gender_symbols import *
 
+@register_shape
 def draw_pocketgender_hourglass(d, colours,
                                 wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                                 size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -51,6 +50,14 @@ def draw_pocketgender_hourglass(d, colours,
     d.append(p)
 
 
+# traced from https://commons.wikimedia.org/wiki/File:Dotted_triskelion_(fixed_width).svg, which is 3619.2151 square
+# the upper C (its start was y=77), then the two lower C shapes, all meeting in the centre at (1357, 1366)
+TRISKELION = add_path_template('triskelion', 'M 1366,71 C 507,71 498,1372 1357,1366 '
+                                             'M 233,2008 C 660,2747 1784,2105 1357,1366 C 1782,619 2919,1263 2485,2004',
+                               3619.2151, 3619.2151)
+
+
+@register_shape
 def draw_triskelion(d, colours,
                     wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                     size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -71,38 +78,11 @@ def draw_triskelion(d, colours,
     """
     wid, hei = get_effective_dimensions(d, wid, hei)
 
-    #w = wid/3619.2151
-    h = size_ratio*hei/3619.2151
-    w = h
-
-    x_start += (wid/2) - 1357.0*w
-    y_start += (hei/2) - 1366.0*h
-
-    # x coordinates
-    x1 = x_start + 1366.0 * w
-    x2 = x_start + 507.0 * w
-    x3 = x_start + 498.0 * w
-    # y coordinates
-    y1 = y_start + 71.0 * h # was 77
-    y2 = y_start + 71.0 * h # smallest
-    y3 = y_start + 1372.0 * h
-
-    # x coordinates
-    x6 = x_start + 233.0 * w
-    x7 = x_start + 660.0 * w
-    x8 = x_start + 1784.0 * w
-    x_cent = x_start + 1357.0 * w
-    x10 = x_start + 1782.0 * w
-    x11 = x_start + 2919.0 * w
-    x12 = x_start + 2485.0 * w
-    # y coordinates
-    y6 = y_start + 2008.0 * h
-    y7 = y_start + 2747.0 * h
-    y8 = y_start + 2105.0 * h
-    y_cent = y_start + 1366.0 * h
-    y10 = y_start + 619.0 * h
-    y11 = y_start + 1263.0 * h
-    y12 = y_start + 2004.0 * h
+    scale = size_ratio*hei
+    h = scale/3619.2151
+
+    x_cent = x_start + wid/2
+    y_cent = y_start + hei/2
 
     sw=thick_ratio*hei/20
     pathcolour = colours[0]
@@ -114,16 +94,11 @@ def draw_triskelion(d, colours,
     else:
         dotcolour = pathcolour
 
-    rad = (y_cent - y2) # 1 overshoots and 0.5 undershoots
+    rad = (1366.0 - 71.0)*h # from the centre to the top of the upper C. 1 overshoots and 0.5 undershoots
     d.append(draw.Circle(x_cent, y_cent, rad, stroke_width=sw, fill=circlebg, stroke=pathcolour))
 
-    p = draw.Path(stroke=pathcolour, fill='none', stroke_width=sw)
-    p.M(x1, y1) # upper C
-    p.C(x2, y2, x3, y3, x_cent, y_cent)
-    p.M(x6, y6) # the two lower C shapes
-    p.C(x7, y7, x8, y8, x_cent, y_cent)
-    p.C(x10, y10, x11, y11, x12, y12)
-    d.append(p)
+    d.append(draw.Path(place_path_template(TRISKELION, scale, scale, x_cent - 1357.0*h, y_cent - 1366.0*h),
+                       stroke=pathcolour, fill='none', stroke_width=sw))
 
     minirad = stretch_ratio*rad/6
     bottomlevel = y_cent+rad/4 # is this actually correct?
@@ -157,6 +132,7 @@ def single_nautilus_segment(d, wid, hei, arr, primary_colour, step_size, border_
     d.append(p.Z())
 
 
+@register_shape(cost=MANY)
 def draw_nautilus(d, colours, border_colour='black',
                   wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                   size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -216,6 +192,7 @@ def draw_nautilus(d, colours, border_colour='black',
         single_nautilus_segment(d, wid, hei, trigged, fill, step_size, border_width=border_width, border_colour=border_colour)
 
 
+@register_shape
 def draw_trichevron(d, colours,
                     wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                     size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -264,6 +241,7 @@ def draw_trichevron(d, colours,
     return base_sw
 
 
+@register_shape
 def draw_crossdresser(d, colours,
                       wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                       size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -325,6 +303,7 @@ def draw_crossdresser(d, colours,
     d.append(p)
 
 
+@register_shape
 def draw_longhair(d, colours,
                   wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                   size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -380,6 +359,7 @@ def draw_longhair(d, colours,
     return y_head
 
 
+@register_shape
 def draw_x_gender(d, colours,
                   wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                   size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -449,6 +429,7 @@ def draw_x_gender(d, colours,
     d.append(p)
 
 
+@register_shape
 def draw_lines(d, colours,
                wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -0,0 +1,1000 @@
+"""
+Tidy up a Drawing after a flag has been composed.
+
+The drawing functions build flags the way you would paint them: a background,
+then stripes, then symbols on top. That keeps the geometry simple, but it leaves
+a lot of redundant elements in d.elements (e.g. the five grey paths at each end of
+the Disability Pride Flag, the 'none' padding stripes added by draw_lines, or a
+background that the stripes on top of it cover completely).
+
+The functions in here are passes over d.elements that remove that redundancy
+without changing what the flag looks like. They all alter d in place and return
+how many elements were removed.
+"""
+
+import re
+
+from pride_stripes import *
+
+# the basic shapes whose geometry we understand
+SHAPE_TYPES = (draw.Rectangle, draw.Circle, draw.Ellipse, draw.Path)
+
+# colours that paint nothing
+INVISIBLE_COLOURS = [EMPTY, 'transparent']
+
+# the arguments that describe *where* an element is rather than *how* it looks
+GEOMETRY_ARGS = {draw.Rectangle: ['x', 'y', 'width', 'height'],
+                 draw.Path: ['d']}
+
+PATH_TOKEN = re.compile(r'[MmLlHhVvZz]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|[^\s,]')
+
+MAX_SIMPLE_CHECK_VERTICES = 100 # polygons with more vertices than this are left alone
+
+TRANSFORM_TOKEN = re.compile(r'([a-zA-Z]+)\s*\(([^)]*)\)')
+
+CIRCLE_SEGMENTS = 64 # corners of the polygons standing in for circles when culling
+
+AREA_TOLERANCE = 1e-6 # slivers smaller than this (in square pixels) count as hidden
+
+MAX_CULL_FRAGMENTS = 500 # give up on an element once its visible part is in this many pieces
+
+
+##################################################
+## Helper functions
+##################################################
+
+def format_number(n):
+    """
+    Write a coordinate the same way drawsvg does, but without a trailing .0 on whole numbers
+    :param n: number
+    :return: string
+    >>> format_number(50.0)
+    '50'
+    >>> format_number(166.66666666666666)
+    '166.66666666666666'
+    >>> format_number(-3)
+    '-3'
+    """
+    if n == int(n):
+        return str(int(n))
+    return repr(float(n))
+
+
+def get_number_arg(element, key, default):
+    """
+    Get a numeric argument of an element, falling back to the SVG default
+    :param element: drawsvg element
+    :param key: name of the argument (hyphenated, as stored by drawsvg)
+    :param default: value to use if the argument is missing or not a number
+    :return: float
+    >>> get_number_arg(draw.Circle(1, 2, 3, stroke_width=4), 'stroke-width', 1)
+    4.0
+    >>> get_number_arg(draw.Circle(1, 2, 3), 'fill-opacity', 1)
+    1.0
+    """
+    val = element.args.get(key, default)
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return float(default)
+
+
+def is_colour_visible(colour):
+    """
+    Whether a fill or stroke colour paints anything
+    :param colour: colour string (or None if the argument was never set)
+    :return: bool
+    >>> is_colour_visible('none')
+    False
+    >>> is_colour_visible('#595959')
+    True
+    """
+    if colour is None:
+        return False
+    return str(colour).strip().lower() not in INVISIBLE_COLOURS
+
+
+def has_visible_fill(element):
+    """
+    Whether an element paints its interior. Note SVG fills in black if no fill is given.
+    :param element: drawsvg element
+    :return: bool
+    >>> has_visible_fill(draw.Rectangle(0, 0, 10, 10))
+    True
+    >>> has_visible_fill(draw.Rectangle(0, 0, 10, 10, fill='none'))
+    False
+    >>> has_visible_fill(draw.Rectangle(0, 0, 10, 10, fill='red', fill_opacity=0))
+    False
+    """
+    if get_number_arg(element, 'opacity', 1) <= 0 or get_number_arg(element, 'fill-opacity', 1) <= 0:
+        return False
+    return is_colour_visible(element.args.get('fill', 'black'))
+
+
+def has_visible_stroke(element):
+    """
+    Whether an element paints an outline
+    :param element: drawsvg element
+    :return: bool
+    >>> has_visible_stroke(draw.Circle(0, 0, 10, fill='none', stroke='red'))
+    True
+    >>> has_visible_stroke(draw.Path(stroke_width=0, fill='red', stroke='red'))
+    False
+    >>> has_visible_stroke(draw.Path(fill='red'))
+    False
+    """
+    if get_number_arg(element, 'opacity', 1) <= 0 or get_number_arg(element, 'stroke-opacity', 1) <= 0:
+        return False
+    if get_number_arg(element, 'stroke-width', 1) <= 0:
+        return False
+    return is_colour_visible(element.args.get('stroke'))
+
+
+def is_opaque(element):
+    """
+    Whether an element's paint fully replaces whatever is underneath it
+    :param element: drawsvg element
+    :return: bool
+    >>> is_opaque(draw.Rectangle(0, 0, 10, 10, fill='red'))
+    True
+    >>> is_opaque(draw.Rectangle(0, 0, 10, 10, fill='red', opacity=0.5))
+    False
+    """
+    for key in ['opacity', 'fill-opacity', 'stroke-opacity']:
+        if get_number_arg(element, key, 1) < 1:
+            return False
+    return True
+
+
+def is_invisible(element):
+    """
+    Whether an element draws nothing at all and can be safely removed.
+    Only basic shapes are considered; groups, images, text etc. are always kept.
+    :param element: drawsvg element
+    :return: bool
+    >>> is_invisible(draw.Rectangle(0, 0, 10, 10, fill='none'))
+    True
+    >>> is_invisible(draw.Rectangle(0, 0, 10, 0, fill='red'))
+    True
+    >>> is_invisible(draw.Circle(0, 0, 10, fill='none', stroke='red'))
+    False
+    >>> is_invisible(draw.Text('hi', 10, 0, 0, fill='none'))
+    False
+    """
+    if not isinstance(element, SHAPE_TYPES) or element.children or element.id is not None:
+        return False
+    if isinstance(element, draw.Rectangle):
+        if get_number_arg(element, 'width', 0) <= 0 or get_number_arg(element, 'height', 0) <= 0:
+            return True # SVG does not render rectangles without area
+    return not has_visible_fill(element) and not has_visible_stroke(element)
+
+
+def signed_area(points):
+    """
+    Shoelace formula. The sign gives the winding direction of the polygon.
+    :param points: list of (x, y) tuples
+    :return: float
+    >>> signed_area([(0, 0), (10, 0), (10, 10), (0, 10)])
+    100.0
+    >>> signed_area([(0, 0), (0, 10), (10, 10), (10, 0)])
+    -100.0
+    """
+    area = 0.0
+    for i in range(len(points)):
+        x1, y1 = points[i]
+        x2, y2 = points[(i+1) % len(points)]
+        area += x1*y2 - x2*y1
+    return area/2
+
+
+def segments_cross(a, b, c, d):
+    """
+    Whether the line segments ab and cd touch or cross
+    :return: bool
+    >>> segments_cross((0, 0), (10, 10), (0, 10), (10, 0))
+    True
+    >>> segments_cross((0, 0), (10, 0), (0, 5), (10, 5))
+    False
+    """
+    def orient(p, q, r):
+        val = (q[0]-p[0])*(r[1]-p[1]) - (q[1]-p[1])*(r[0]-p[0])
+        return (val > 0) - (val < 0)
+
+    def on_segment(p, q, r):
+        return min(p[0], q[0]) <= r[0] <= max(p[0], q[0]) and min(p[1], q[1]) <= r[1] <= max(p[1], q[1])
+
+    o1, o2, o3, o4 = orient(a, b, c), orient(a, b, d), orient(c, d, a), orient(c, d, b)
+    if o1 != o2 and o3 != o4:
+        return True
+    return (o1 == 0 and on_segment(a, b, c)) or (o2 == 0 and on_segment(a, b, d)) or \
+           (o3 == 0 and on_segment(c, d, a)) or (o4 == 0 and on_segment(c, d, b))
+
+
+def is_simple_polygon(points):
+    """
+    Whether a polygon's edges only meet at shared corners (no self-intersections).
+    :param points: list of (x, y) tuples, without the closing point repeated
+    :return: bool
+    >>> is_simple_polygon([(0, 0), (10, 0), (10, 10), (0, 10)])
+    True
+    >>> is_simple_polygon([(0, 0), (10, 10), (10, 0), (0, 10)]) # a bowtie
+    False
+    """
+    n = len(points)
+    if n < 3 or n > MAX_SIMPLE_CHECK_VERTICES:
+        return False
+    for i in range(n):
+        for j in range(i+1, n):
+            if j == i+1 or (i == 0 and j == n-1):
+                continue # neighbouring edges always share a corner
+            if segments_cross(points[i], points[(i+1) % n], points[j], points[(j+1) % n]):
+                return False
+    return True
+
+
+def polygons_from_path(d_string):
+    """
+    Turn a path made only of straight lines into a list of closed polygons.
+    Repeated consecutive points are dropped.
+    :param d_string: the d argument of a path
+    :return: list of lists of (x, y) tuples, or None if the path has curves or can't be read
+    >>> polygons_from_path('M-500,0 L0,300 L70,300 L-430,0 L-430,0 Z')
+    [[(-500.0, 0.0), (0.0, 300.0), (70.0, 300.0), (-430.0, 0.0)]]
+    >>> polygons_from_path('M0,0 h10 v10 H0 Z M20,20 l5,0 l0,5 z')
+    [[(0.0, 0.0), (10.0, 0.0), (10.0, 10.0), (0.0, 10.0)], [(20.0, 20.0), (25.0, 20.0), (25.0, 25.0)]]
+    >>> polygons_from_path('M0,0 Q10,10 20,0 Z') is None
+    True
+    """
+    tokens = PATH_TOKEN.findall(d_string)
+    polygons = []
+    current = []
+    x, y = 0.0, 0.0
+    start = (0.0, 0.0)
+    cmd = None
+    i = 0
+
+    def add_point(pt):
+        if not current or current[-1] != pt:
+            current.append(pt)
+
+    def close():
+        while len(current) > 1 and current[-1] == current[0]:
+            current.pop()
+        if current:
+            polygons.append(list(current))
+        current.clear()
+
+    try:
+        while i < len(tokens):
+            tok = tokens[i]
+            if tok.isalpha():
+                if tok not in 'MmLlHhVvZz':
+                    return None
+                cmd = tok
+                i += 1
+                if cmd in 'Zz':
+                    close()
+                    x, y = start
+                continue
+            if cmd is None or cmd in 'Zz':
+                return None
+            if cmd in 'MmLl':
+                nx, ny = float(tokens[i]), float(tokens[i+1])
+                i += 2
+                if cmd.islower():
+                    nx, ny = x + nx, y + ny
+                if cmd in 'Mm':
+                    close()
+                    start = (nx, ny)
+                    cmd = 'L' if cmd == 'M' else 'l' # extra pairs after a moveto are linetos
+                x, y = nx, ny
+            elif cmd in 'Hh':
+                nx = float(tok)
+                i += 1
+                x = x + nx if cmd == 'h' else nx
+            else:
+                ny = float(tok)
+                i += 1
+                y = y + ny if cmd == 'v' else ny
+            add_point((x, y))
+    except (ValueError, IndexError):
+        return None
+    close()
+    return polygons
+
+
+def element_polygons(element):
+    """
+    The outline(s) of a straight-edged element as polygons
+    :param element: drawsvg element
+    :return: list of polygons, or None if the element is not made of straight lines
+    >>> element_polygons(draw.Rectangle(0, 0, 10, 5))
+    [[(0.0, 0.0), (10.0, 0.0), (10.0, 5.0), (0.0, 5.0)]]
+    >>> element_polygons(draw.Circle(0, 0, 5)) is None
+    True
+    """
+    if isinstance(element, draw.Rectangle):
+        if 'rx' in element.args or 'ry' in element.args:
+            return None
+        x = get_number_arg(element, 'x', 0)
+        y = get_number_arg(element, 'y', 0)
+        w = get_number_arg(element, 'width', 0)
+        h = get_number_arg(element, 'height', 0)
+        return [[(x, y), (x+w, y), (x+w, y+h), (x, y+h)]]
+    elif isinstance(element, draw.Path):
+        return polygons_from_path(element.args.get('d', ''))
+    return None
+
+
+def polygons_as_path(polygons):
+    """
+    Write polygons as the d argument of a path
+    :param polygons: list of lists of (x, y) tuples
+    :return: string
+    >>> polygons_as_path([[(0.0, 0.0), (10.0, 0.0), (10.0, 5.5)]])
+    'M0,0 L10,0 L10,5.5 Z'
+    """
+    commands = []
+    for poly in polygons:
+        commands.append('M' + format_number(poly[0][0]) + ',' + format_number(poly[0][1]))
+        for x, y in poly[1:]:
+            commands.append('L' + format_number(x) + ',' + format_number(y))
+        commands.append('Z')
+    return ' '.join(commands)
+
+
+def appearance_args(element):
+    """
+    All the arguments of an element except the ones describing its geometry
+    :param element: drawsvg element
+    :return: dictionary
+    >>> appearance_args(draw.Rectangle(0, 0, 10, 5, fill='red'))
+    {'fill': 'red'}
+    """
+    geometry = GEOMETRY_ARGS.get(type(element), [])
+    return {k: v for k, v in element.args.items() if k not in geometry}
+
+
+def mergeable_polygons(element):
+    """
+    If an element can be fused with its neighbours, give its polygons all wound the same way.
+    That is the case for opaque, unstroked, straight-edged shapes whose outlines do not cross
+    themselves and do not cut holes. Under the nonzero fill rule, such polygons put into one
+    path cover exactly the union of what they covered separately.
+    :param element: drawsvg element
+    :return: list of polygons (all with positive signed_area), or None
+    >>> mergeable_polygons(draw.Rectangle(0, 0, 10, 5, fill='red'))
+    [[(0.0, 0.0), (10.0, 0.0), (10.0, 5.0), (0.0, 5.0)]]
+    >>> mergeable_polygons(draw.Rectangle(0, 0, 10, 5, fill='red', stroke='black')) is None
+    True
+    >>> mergeable_polygons(draw.Path('M0,0 L0,10 L10,10 Z', fill='red'))
+    [[(10.0, 10.0), (0.0, 10.0), (0.0, 0.0)]]
+    """
+    if type(element) not in GEOMETRY_ARGS or element.children or element.id is not None:
+        return None
+    if has_visible_stroke(element) or not has_visible_fill(element) or not is_opaque(element):
+        return None
+    if element.args.get('fill-rule', 'nonzero') != 'nonzero':
+        return None
+    polygons = element_polygons(element)
+    if not polygons:
+        return None
+    areas = [signed_area(poly) for poly in polygons]
+    if not (all(a > 0 for a in areas) or all(a < 0 for a in areas)):
+        return None # mixed windings mean holes
+    if not all(is_simple_polygon(poly) for poly in polygons):
+        return None
+    if areas[0] < 0:
+        polygons = [poly[::-1] for poly in polygons]
+    return polygons
+
+
+def is_solid_colour(colour):
+    """
+    Whether a paint is a plain colour with no transparency of its own
+    (gradients, patterns and colours with an alpha channel are not)
+    :param colour: fill or stroke argument
+    :return: bool
+    >>> is_solid_colour('#CF7280')
+    True
+    >>> is_solid_colour('#CF728080')
+    False
+    >>> is_solid_colour(draw.LinearGradient(0, 0, 10, 0))
+    False
+    """
+    if not isinstance(colour, str) or not is_colour_visible(colour):
+        return False
+    colour = colour.strip().lower()
+    if colour.startswith('url(') or colour.startswith('rgba') or colour.startswith('hsla'):
+        return False
+    return not (colour.startswith('#') and len(colour) in [5, 9])
+
+
+def compose_transforms(m, t):
+    """
+    The affine matrix (a, b, c, d, e, f) that applies t and then m,
+    i.e. x' = a*x + c*y + e and y' = b*x + d*y + f
+    >>> compose_transforms((2, 0, 0, 2, 0, 0), (1, 0, 0, 1, 5, 0))
+    (2, 0, 0, 2, 10, 0)
+    """
+    return (m[0]*t[0] + m[2]*t[1], m[1]*t[0] + m[3]*t[1],
+            m[0]*t[2] + m[2]*t[3], m[1]*t[2] + m[3]*t[3],
+            m[0]*t[4] + m[2]*t[5] + m[4], m[1]*t[4] + m[3]*t[5] + m[5])
+
+
+def parse_transform(transform):
+    """
+    Read an SVG transform argument into an affine matrix (see compose_transforms)
+    :param transform: string, or None if the element has no transform
+    :return: tuple of 6 floats, or None if the transform can't be read
+    >>> parse_transform('translate(0, 300) scale(1,-1)')
+    (1.0, 0.0, 0.0, -1.0, 0.0, 300.0)
+    >>> [round(v, 6) for v in parse_transform('rotate(90, 250, 150)')]
+    [0.0, 1.0, -1.0, 0.0, 400.0, -100.0]
+    >>> parse_transform('skewX(30)') is None
+    True
+    """
+    matrix = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+    if transform is None:
+        return matrix
+    transform = str(transform)
+    pos = 0
+    for match in TRANSFORM_TOKEN.finditer(transform):
+        if transform[pos:match.start()].strip(' ,'):
+            return None
+        pos = match.end()
+        name = match.group(1)
+        try:
+            args = [float(v) for v in re.split(r'[\s,]+', match.group(2).strip()) if v]
+        except ValueError:
+            return None
+        if name == 'translate' and len(args) in [1, 2]:
+            t = (1.0, 0.0, 0.0, 1.0, args[0], args[1] if len(args) == 2 else 0.0)
+        elif name == 'scale' and len(args) in [1, 2]:
+            t = (args[0], 0.0, 0.0, args[-1], 0.0, 0.0)
+        elif name == 'rotate' and len(args) in [1, 3]:
+            cos, sin = math.cos(math.radians(args[0])), math.sin(math.radians(args[0]))
+            cx, cy = args[1:] if len(args) == 3 else (0.0, 0.0)
+            t = (cos, sin, -sin, cos, cx - cos*cx + sin*cy, cy - sin*cx - cos*cy)
+        elif name == 'matrix' and len(args) == 6:
+            t = tuple(args)
+        else:
+            return None
+        matrix = compose_transforms(matrix, t)
+    if transform[pos:].strip(' ,'):
+        return None
+    return matrix
+
+
+def apply_transform(matrix, points):
+    """
+    :param matrix: affine matrix (see compose_transforms)
+    :param points: list of (x, y) tuples
+    :return: list of (x, y) tuples
+    >>> apply_transform((1, 0, 0, -1, 0, 300), [(10, 0), (10, 100)])
+    [(10, 300), (10, 200)]
+    """
+    a, b, c, d, e, f = matrix
+    return [(a*x + c*y + e, b*x + d*y + f) for x, y in points]
+
+
+def path_extent(d_string):
+    """
+    A box that everything on a path lies within. Curves never leave the hull of their
+    control points, and arcs stay within a diameter of their end points.
+    :param d_string: the d argument of a path
+    :return: (x_min, y_min, x_max, y_max), or None if the path is empty or can't be read
+    >>> path_extent('M10,20 C0,0 100,0 90,20 Z')
+    (0.0, 0.0, 100.0, 20.0)
+    >>> path_extent('M10,10 a5,5 0 0 0 10,0')
+    (0.0, 0.0, 30.0, 20.0)
+    >>> path_extent('M0,0 h10 v10 s5,5 10,0')
+    (0.0, 0.0, 20.0, 15.0)
+    """
+    tokens = PATH_TOKEN.findall(d_string)
+    xs, ys = [], []
+    x, y = 0.0, 0.0
+    start = (0.0, 0.0)
+    last_control = None # for the reflected control points of S and T
+    cmd = None
+    i = 0
+
+    def add(px, py, pad=0.0):
+        xs.extend([px - pad, px + pad])
+        ys.extend([py - pad, py + pad])
+
+    try:
+        while i < len(tokens):
+            tok = tokens[i]
+            if tok.isalpha():
+                if tok.upper() not in PATH_COMMAND_ARGS:
+                    return None
+                cmd = tok
+                i += 1
+                if cmd in 'Zz':
+                    x, y = start
+                    last_control = None
+                continue
+            upper = cmd.upper() if cmd else 'Z'
+            n = PATH_COMMAND_ARGS[upper]
+            if n == 0:
+                return None
+            vals = [float(v) for v in tokens[i:i+n]]
+            if len(vals) < n:
+                return None
+            i += n
+            dx, dy = (x, y) if cmd.islower() else (0.0, 0.0)
+            control = None
+            if upper == 'H':
+                x = vals[0] + dx
+            elif upper == 'V':
+                y = vals[0] + dy
+            elif upper == 'A':
+                rx, ry = abs(vals[0]), abs(vals[1])
+                nx, ny = vals[5] + dx, vals[6] + dy
+                chord = math.hypot(nx - x, ny - y)
+                pad = 0.0
+                if min(rx, ry) > 0: # radii that are too small get scaled up until the arc fits
+                    pad = 2 * max(rx, ry) * max(1.0, chord / (2*min(rx, ry)))
+                add(x, y, pad)
+                x, y = nx, ny
+                add(x, y, pad)
+            else:
+                points = [(vals[k] + dx, vals[k+1] + dy) for k in range(0, n, 2)]
+                if upper in 'ST':
+                    reflected = (x, y)
+                    if last_control is not None and last_control[0] == ('C' if upper == 'S' else 'Q'):
+                        reflected = (2*x - last_control[1][0], 2*y - last_control[1][1])
+                    points.insert(0, reflected)
+                for px, py in points:
+                    add(px, py)
+                if upper in 'CSQT':
+                    control = ('C' if upper in 'CS' else 'Q', points[-2])
+                x, y = points[-1]
+                if upper == 'M':
+                    start = (x, y)
+                    cmd = 'L' if cmd == 'M' else 'l' # extra pairs after a moveto are linetos
+            last_control = control
+            add(x, y)
+    except (ValueError, IndexError):
+        return None
+    if not xs:
+        return None
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def box_polygon(x_min, y_min, x_max, y_max):
+    """
+    >>> box_polygon(0, 0, 10, 5)
+    [(0, 0), (10, 0), (10, 5), (0, 5)]
+    """
+    return [(x_min, y_min), (x_max, y_min), (x_max, y_max), (x_min, y_max)]
+
+
+def regular_polygon(cx, cy, rx, ry, circumscribed=False):
+    """
+    A polygon inside (or, if circumscribed, around) an ellipse
+    :return: list of CIRCLE_SEGMENTS (x, y) tuples, wound the positive way (see signed_area)
+    >>> signed_area(regular_polygon(0, 0, 10, 10)) < math.pi * 100 < signed_area(regular_polygon(0, 0, 10, 10, True))
+    True
+    """
+    scale = 1 / math.cos(math.pi / CIRCLE_SEGMENTS) if circumscribed else 1.0
+    return [(cx + rx*scale*math.cos(2*math.pi*k/CIRCLE_SEGMENTS), cy + ry*scale*math.sin(2*math.pi*k/CIRCLE_SEGMENTS))
+            for k in range(CIRCLE_SEGMENTS)]
+
+
+def clip_to_half_plane(points, a, b, keep_left=True):
+    """
+    Sutherland-Hodgman: the part of a convex polygon on one side of the line through a and b.
+    Left means the inside of a polygon with positive signed_area that has edge ab.
+    :return: list of (x, y) tuples (empty if nothing is left)
+    >>> clip_to_half_plane([(0, 0), (10, 0), (10, 10), (0, 10)], (5, 0), (5, 10), keep_left=False)
+    [(5.0, 0.0), (10, 0), (10, 10), (5.0, 10.0)]
+    """
+    sign = 1 if keep_left else -1
+
+    def side(p):
+        return sign * ((b[0]-a[0])*(p[1]-a[1]) - (b[1]-a[1])*(p[0]-a[0]))
+
+    clipped = []
+    for i in range(len(points)):
+        p, q = points[i-1], points[i]
+        sp, sq = side(p), side(q)
+        if (sp > 0 and sq < 0) or (sp < 0 and sq > 0):
+            t = sp / (sp - sq)
+            clipped.append((p[0] + t*(q[0]-p[0]), p[1] + t*(q[1]-p[1])))
+        if sq >= 0:
+            clipped.append(q)
+    return clipped
+
+
+def polygon_box(points):
+    """
+    >>> polygon_box([(0, 5), (10, 0), (3, 7)])
+    (0, 0, 10, 7)
+    """
+    xs, ys = zip(*points)
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def boxes_overlap(box1, box2):
+    """
+    Whether two (x_min, y_min, x_max, y_max) boxes share some area
+    >>> boxes_overlap((0, 0, 10, 10), (10, 0, 20, 10))
+    False
+    """
+    return box1[0] < box2[2] and box2[0] < box1[2] and box1[1] < box2[3] and box2[1] < box1[3]
+
+
+def subtract_convex(piece, cutter, cutter_box=None):
+    """
+    Cut a convex polygon out of another one
+    :param piece: convex polygon, wound the positive way (see signed_area)
+    :param cutter: convex polygon, wound the positive way (see signed_area)
+    :param cutter_box: bounding box of the cutter, if already known
+    :return: list of convex polygons covering what is left of piece
+    >>> left = subtract_convex(box_polygon(0, 0, 10, 10), box_polygon(5, -1, 11, 11))
+    >>> [signed_area(p) for p in left]
+    [50.0]
+    >>> subtract_convex(box_polygon(0, 0, 10, 10), box_polygon(-1, -1, 11, 11))
+    []
+    """
+    if not boxes_overlap(polygon_box(piece), cutter_box or polygon_box(cutter)):
+        return [piece]
+    pieces = []
+    rest = piece
+    for i in range(len(cutter)):
+        a, b = cutter[i-1], cutter[i]
+        outside = clip_to_half_plane(rest, a, b, keep_left=False)
+        if len(outside) > 2 and signed_area(outside) > AREA_TOLERANCE:
+            pieces.append(outside)
+        rest = clip_to_half_plane(rest, a, b)
+        if len(rest) < 3 or signed_area(rest) <= AREA_TOLERANCE:
+            return pieces
+    return pieces
+
+
+def convex_pieces(points):
+    """
+    Split a simple polygon with positive signed_area into convex pieces (by ear clipping,
+    unless it is convex already)
+    :return: list of convex polygons, or None if the polygon could not be split
+    >>> len(convex_pieces([(0, 0), (10, 0), (10, 10), (0, 10)]))
+    1
+    >>> pieces = convex_pieces([(0, 0), (10, 0), (10, 10), (5, 5), (0, 10)])
+    >>> len(pieces), sum(signed_area(p) for p in pieces)
+    (3, 75.0)
+    """
+    def cross(p, q, r):
+        return (q[0]-p[0])*(r[1]-p[1]) - (q[1]-p[1])*(r[0]-p[0])
+
+    points = list(points)
+    if all(cross(points[i-2], points[i-1], points[i]) >= 0 for i in range(len(points))):
+        return [points]
+    pieces = []
+    while len(points) > 3:
+        for i in range(len(points)):
+            a, b, c = points[i-1], points[i], points[(i+1) % len(points)]
+            turn = cross(a, b, c)
+            if turn == 0:
+                points.pop(i) # b is in line with its neighbours
+                break
+            if turn < 0:
+                continue
+            if any(p not in (a, b, c) and cross(a, b, p) >= 0 and cross(b, c, p) >= 0 and cross(c, a, p) >= 0
+                   for p in points):
+                continue # another corner pokes into this ear
+            pieces.append([a, b, c])
+            points.pop(i)
+            break
+        else:
+            return None
+    if len(points) == 3 and cross(*points) > 0:
+        pieces.append(points)
+    return pieces
+
+
+def paint_bounds(element):
+    """
+    A box, in the element's own coordinates, that everything the element paints lies within
+    :param element: drawsvg element
+    :return: polygon, or None if we can't tell
+    >>> paint_bounds(draw.Circle(10, 10, 5, fill='none', stroke='red', stroke_width=2))
+    [(4.0, 4.0), (16.0, 4.0), (16.0, 16.0), (4.0, 16.0)]
+    >>> paint_bounds(draw.Text('hi', 10, 0, 0)) is None
+    True
+    >>> paint_bounds(draw.Rectangle(0, 0, 10, 10, filter='url(#blur)')) is None
+    True
+    """
+    if element.children or any(k.startswith('marker') for k in element.args):
+        return None
+    if 'filter' in element.args:
+        return None # filters can paint outside the element, e.g. blurs and drop shadows
+    pad = get_number_arg(element, 'stroke-width', 1) / 2 if has_visible_stroke(element) else 0.0
+    if isinstance(element, (draw.Rectangle, draw.Image)):
+        x, y = get_number_arg(element, 'x', 0), get_number_arg(element, 'y', 0)
+        w, h = get_number_arg(element, 'width', 0), get_number_arg(element, 'height', 0)
+        return box_polygon(x - pad, y - pad, x + w + pad, y + h + pad)
+    elif isinstance(element, (draw.Circle, draw.Ellipse)):
+        cx, cy = get_number_arg(element, 'cx', 0), get_number_arg(element, 'cy', 0)
+        if isinstance(element, draw.Circle):
+            rx = ry = get_number_arg(element, 'r', 0)
+        else:
+            rx, ry = get_number_arg(element, 'rx', 0), get_number_arg(element, 'ry', 0)
+        return box_polygon(cx - rx - pad, cy - ry - pad, cx + rx + pad, cy + ry + pad)
+    elif isinstance(element, draw.Path):
+        extent = path_extent(element.args.get('d', ''))
+        if extent is None:
+            return None
+        pad *= max(get_number_arg(element, 'stroke-miterlimit', 4), math.sqrt(2)) # pointy joins and square caps
+        return box_polygon(extent[0] - pad, extent[1] - pad, extent[2] + pad, extent[3] + pad)
+    return None
+
+
+def coverage_pieces(element):
+    """
+    Convex polygons, in the element's own coordinates, that the element certainly paints over
+    completely. This errs on the small side: circles are covered by polygons inside them,
+    strokes are only counted where they are simple to work out, etc.
+    :param element: drawsvg element
+    :return: list of convex polygons with positive signed_area (empty if the element hides nothing)
+    >>> coverage_pieces(draw.Rectangle(0, 0, 10, 5, fill='red'))
+    [[(0.0, 0.0), (10.0, 0.0), (10.0, 5.0), (0.0, 5.0)]]
+    >>> coverage_pieces(draw.Rectangle(0, 0, 10, 5, fill='red', opacity=0.5))
+    []
+    >>> ring = coverage_pieces(draw.Circle(0, 0, 10, fill='none', stroke='red', stroke_width=4))
+    >>> 0 < sum(signed_area(p) for p in ring) < math.pi * (12**2 - 8**2)
+    True
+    """
+    if not isinstance(element, SHAPE_TYPES) or element.children or get_number_arg(element, 'opacity', 1) < 1:
+        return []
+    if any(k in element.args for k in ['clip-path', 'mask', 'filter']):
+        return []
+    solid_fill = has_visible_fill(element) and get_number_arg(element, 'fill-opacity', 1) >= 1 \
+        and is_solid_colour(element.args.get('fill', 'black'))
+    solid_stroke = has_visible_stroke(element) and get_number_arg(element, 'stroke-opacity', 1) >= 1 \
+        and is_solid_colour(element.args.get('stroke')) and element.args.get('stroke-dasharray', EMPTY) == EMPTY
+    half_stroke = get_number_arg(element, 'stroke-width', 1) / 2 if solid_stroke else 0.0
+
+    if isinstance(element, draw.Circle) or isinstance(element, draw.Ellipse):
+        cx, cy = get_number_arg(element, 'cx', 0), get_number_arg(element, 'cy', 0)
+        if isinstance(element, draw.Circle):
+            r = get_number_arg(element, 'r', 0)
+            outer = regular_polygon(cx, cy, r + half_stroke, r + half_stroke)
+            if solid_fill or (solid_stroke and r <= half_stroke):
+                return [outer]
+            elif solid_stroke:
+                return subtract_convex(outer, regular_polygon(cx, cy, r - half_stroke, r - half_stroke, True))
+        elif solid_fill:
+            return [regular_polygon(cx, cy, get_number_arg(element, 'rx', 0), get_number_arg(element, 'ry', 0))]
+        return []
+
+    polygons = element_polygons(element)
+    if not polygons or not solid_fill:
+        return []
+    if isinstance(element, draw.Rectangle):
+        x0, y0, x1, y1 = polygon_box(polygons[0])
+        if x1 <= x0 or y1 <= y0:
+            return []
+        return [box_polygon(x0 - half_stroke, y0 - half_stroke, x1 + half_stroke, y1 + half_stroke)]
+    if len(polygons) > 1 and element.args.get('fill-rule', 'nonzero') != 'nonzero':
+        return []
+    areas = [signed_area(poly) for poly in polygons]
+    if not (all(a > 0 for a in areas) or all(a < 0 for a in areas)):
+        return [] # mixed windings mean holes
+    if not all(is_simple_polygon(poly) for poly in polygons):
+        return []
+    pieces = []
+    for poly in polygons:
+        split = convex_pieces(poly if areas[0] > 0 else poly[::-1])
+        if split is None:
+            return []
+        pieces.extend(split)
+    return pieces
+
+
+def referenced_elements(d):
+    """
+    The elements of a drawing that other elements point at (e.g. with Use or clip-path)
+    :return: set of python ids of the referenced elements
+    """
+    referenced = set()
+
+    def visit(element):
+        for val in element.args.values():
+            if isinstance(val, draw.DrawingElement):
+                referenced.add(id(val))
+        for child in getattr(element, 'children', []):
+            if isinstance(child, draw.DrawingElement):
+                visit(child)
+
+    for element in d.elements:
+        if isinstance(element, draw.DrawingElement):
+            visit(element)
+    return referenced
+
+
+##################################################
+## Optimisation passes
+##################################################
+
+def drop_invisible_layers(d):
+    """
+    Remove elements that draw nothing, e.g. the 'none' padding stripes of draw_lines
+    :param d: Drawing object
+    :return: number of elements removed
+    >>> d = draw.Drawing(500, 300)
+    >>> bh = draw_horiz_bars(d, [EMPTY, 'red', EMPTY])
+    >>> drop_invisible_layers(d)
+    2
+    >>> [e.args['fill'] for e in d.elements]
+    ['red']
+    """
+    before = len(d.elements)
+    d.elements[:] = [e for e in d.elements if not is_invisible(e)]
+    return before - len(d.elements)
+
+
+def merge_same_colour_layers(d):
+    """
+    Fuse runs of consecutive elements that look identical (same fill, same transform, etc.)
+    into a single path. Only runs of neighbouring elements are fused so the layering of
+    the flag is untouched.
+    :param d: Drawing object
+    :return: number of elements removed
+    >>> d = draw.Drawing(500, 300)
+    >>> draw_diagonal_stripes(d, ['grey']*5 + RAINBOW + ['grey']*5)
+    62.5
+    >>> merge_same_colour_layers(d)
+    8
+    >>> [e.args['fill'] for e in d.elements] == ['grey'] + RAINBOW + ['grey']
+    True
+    >>> d.elements[0].args['d'].count('M')
+    5
+    """
+    before = len(d.elements)
+    merged = []
+    run = [] # elements that can be fused together
+    run_polygons = []
+
+    def finish_run():
+        if len(run) == 1:
+            merged.append(run[0])
+        elif run:
+            merged.append(draw.Path(polygons_as_path(run_polygons), **appearance_args(run[0])))
+        run.clear()
+        run_polygons.clear()
+
+    for element in d.elements:
+        polygons = mergeable_polygons(element)
+        if polygons is None:
+            finish_run()
+            merged.append(element)
+            continue
+        if run and appearance_args(run[0]) != appearance_args(element):
+            finish_run()
+        run.append(element)
+        run_polygons.extend(polygons)
+    finish_run()
+
+    d.elements[:] = merged
+    return before - len(d.elements)
+
+
+def find_hidden_layers(d):
+    """
+    Find the elements that can't be seen at all, because they are off the canvas or
+    because opaque elements drawn later cover them completely.
+    Coverage is worked out conservatively, so an element that is only nearly hidden is never
+    reported (see coverage_pieces).
+    :param d: Drawing object
+    :return: list of (index into d.elements, area of the canvas the element would have painted)
+    >>> d = draw.Drawing(500, 300)
+    >>> bh = draw_horiz_bars(d, ['black'])
+    >>> bh = draw_horiz_bars(d, ['red', 'white', 'blue'])
+    >>> find_hidden_layers(d)
+    [(0, 150000.0)]
+
+    A blurred shape spreads out past its edges, so one the same size on top of it doesn't hide it:
+    >>> d = draw.Drawing(200, 200)
+    >>> blur = draw.Filter()
+    >>> blur.append(draw.FilterItem('feGaussianBlur', in_='SourceGraphic', stdDeviation=15))
+    >>> d.append(draw.Rectangle(0, 0, 200, 200, fill='white'))
+    >>> d.append(draw.Rectangle(60, 60, 80, 80, fill='black', filter=blur))
+    >>> d.append(draw.Rectangle(60, 60, 80, 80, fill='red'))
+    >>> find_hidden_layers(d)
+    []
+    """
+    x, y, w, h = d.view_box
+    canvas = box_polygon(x, y, x + w, y + h)
+    referenced = referenced_elements(d)
+    covered = [] # convex pieces painted over by the elements checked so far, with their bounding boxes
+    hidden = []
+    for i in reversed(range(len(d.elements))):
+        element = d.elements[i]
+        if not isinstance(element, draw.DrawingElement):
+            continue
+        matrix = parse_transform(element.args.get('transform'))
+        if matrix is None:
+            continue
+        bounds = paint_bounds(element)
+        if bounds is not None and element.id is None and id(element) not in referenced:
+            region = canvas
+            bounds = apply_transform(matrix, bounds)
+            if signed_area(bounds) < 0:
+                bounds = bounds[::-1]
+            for j in range(len(bounds)):
+                region = clip_to_half_plane(region, bounds[j-1], bounds[j])
+                if len(region) < 3:
+                    break
+            visible = [(region, polygon_box(region))] if len(region) > 2 and signed_area(region) > AREA_TOLERANCE else []
+            for piece, box in covered:
+                if not visible or len(visible) > MAX_CULL_FRAGMENTS:
+                    break
+                remaining = []
+                for part, part_box in visible:
+                    if boxes_overlap(part_box, box):
+                        remaining.extend((left, polygon_box(left)) for left in subtract_convex(part, piece, box))
+                    else:
+                        remaining.append((part, part_box))
+                visible = remaining
+            if not visible:
+                hidden.append((i, signed_area(region) if len(region) > 2 else 0.0))
+                continue # whatever a hidden element covers is covered already
+        for piece in coverage_pieces(element):
+            piece = apply_transform(matrix, piece)
+            if signed_area(piece) < 0:
+                piece = piece[::-1]
+            covered.append((piece, polygon_box(piece)))
+    return hidden[::-1]
+
+
+def cull_hidden_layers(d, verbose=False):
+    """
+    Remove the elements that can't be seen (see find_hidden_layers).
+    This saves the renderer from painting pixels that are only painted over again.
+    :param d: Drawing object
+    :param verbose: whether to print how much area was culled
+    :return: number of elements removed
+    >>> d = draw.Drawing(500, 300)
+    >>> bh = draw_horiz_bars(d, ['black'])
+    >>> d.append(draw.Circle(250, 150, 100, fill='white'))
+    >>> d.append(draw.Rectangle(-100, -100, 50, 50, fill='blue')) # off the canvas
+    >>> d.append(draw.Circle(250, 150, 175, fill='none', stroke='red', stroke_width=250))
+    >>> cull_hidden_layers(d, verbose=True)
+    Culled 2 of 4 elements, which would have painted 150000 px² (100.0% of the canvas)
+    2
+    >>> [type(e).__name__ for e in d.elements]
+    ['Circle', 'Circle']
+    """
+    hidden = find_hidden_layers(d)
+    if verbose:
+        x, y, w, h = d.view_box
+        area = sum(a for i, a in hidden)
+        print(f'Culled {len(hidden)} of {len(d.elements)} elements, which would have painted '
+              f'{area:.0f} px² ({100 * area / (w * h):.1f}% of the canvas)')
+    indices = set(i for i, a in hidden)
+    d.elements[:] = [e for i, e in enumerate(d.elements) if i not in indices]
+    return len(hidden)
+
+
+def optimise_layers(d):
+    """
+    Run all the lossless layer optimisations on a drawing
+    :param d: Drawing object
+    :return: number of elements removed
+    >>> d = draw.Drawing(500, 300)
+    >>> bh = draw_stripes(d, [EMPTY]*4 + ['red', 'red', 'blue'] + [EMPTY]*4)
+    >>> optimise_layers(d)
+    2
+    >>> [e.args['fill'] for e in d.elements]
+    ['red', 'blue']
+    """
+    removed = drop_invisible_layers(d)
+    removed += cull_hidden_layers(d)
+    removed += merge_same_colour_layers(d)
+    return removed
+
+
+if __name__ == '__main__':
+    doctest.testmod()
@@ -0,0 +1,944 @@
+"""
+Boolean operations on shapes, and flattening a layered flag into one path per colour.
+
+The drawing functions paint a flag in layers, the way you would with a brush: stripes,
+then rings on top of them, then (for the intersex mashups) an enormous stroked circle over
+everything outside the ring. The functions in here work out the region each colour ends
+up covering, so the same flag can be written with no overdraw at all. That is what
+plotters, vinyl cutters and print shops want, and it is also quick to rasterise.
+
+Shapes are lists of polygons (lists of (x, y) tuples), the same as in optimise_layers.py.
+Outlines are wound clockwise as seen on screen (positive signed_area) and holes
+the other way, so the results can be written straight into a path.
+Curves and arcs are flattened into straight lines first, staying within `tolerance`
+pixels of the real curve.
+
+The engine sweeps down the canvas in horizontal slabs. The slabs are cut at every corner
+and at every point where two edges cross, so inside a slab no edges cross, and each
+stretch between two neighbouring edges is either entirely inside a shape or entirely
+outside it. The boundaries between stretches that end up different are then chained
+back together into polygons.
+"""
+
+from collections import defaultdict
+import heapq
+
+from optimise_layers import *
+
+CURVE_TOLERANCE = 0.1 # how far (in pixels) flattened curves may stray from the real ones
+
+NONZERO = 'nonzero'
+EVENODD = 'evenodd'
+
+SNAP_TOLERANCE = 1e-9 # edges closer than this (relative to their coordinates) where they meet are joined up
+
+COLLINEAR_TOLERANCE = 1e-9 # sine of the angle below which three points count as a straight line
+
+SNAP_GRID = 1/16 # corners are moved to a grid this fraction of the curve tolerance apart before overlaying
+
+CHECK_LINES = 2 # lines per pixel of canvas height that flatten_layers checks its result along
+MAX_CHECK_LINES = 1000
+
+
+##################################################
+## Flattening curves into polygons
+##################################################
+
+def flatten_quadratic(p0, p1, p2, tolerance=CURVE_TOLERANCE):
+    """
+    Points along a quadratic Bezier curve, not including its start.
+    Uses Wang's formula for how many straight lines are needed.
+    :return: list of (x, y) tuples, ending with p2
+    >>> flatten_quadratic((0, 0), (5, 0), (10, 0))
+    [(10, 0)]
+    >>> len(flatten_quadratic((0, 0), (50, 100), (100, 0), tolerance=1))
+    8
+    """
+    ddx, ddy = p0[0] - 2*p1[0] + p2[0], p0[1] - 2*p1[1] + p2[1]
+    n = max(1, math.ceil(math.sqrt(0.25 * math.hypot(ddx, ddy) / tolerance)))
+    points = []
+    for k in range(1, n):
+        t = k / n
+        a, b, c = (1-t)**2, 2*(1-t)*t, t**2
+        points.append((a*p0[0] + b*p1[0] + c*p2[0], a*p0[1] + b*p1[1] + c*p2[1]))
+    points.append(p2)
+    return points
+
+
+def flatten_cubic(p0, p1, p2, p3, tolerance=CURVE_TOLERANCE):
+    """
+    Points along a cubic Bezier curve, not including its start.
+    Uses Wang's formula for how many straight lines are needed.
+    :return: list of (x, y) tuples, ending with p3
+    >>> len(flatten_cubic((0, 0), (0, 100), (100, 100), (100, 0), tolerance=1))
+    11
+    """
+    dd1 = math.hypot(p0[0] - 2*p1[0] + p2[0], p0[1] - 2*p1[1] + p2[1])
+    dd2 = math.hypot(p1[0] - 2*p2[0] + p3[0], p1[1] - 2*p2[1] + p3[1])
+    n = max(1, math.ceil(math.sqrt(0.75 * max(dd1, dd2) / tolerance)))
+    points = []
+    for k in range(1, n):
+        t = k / n
+        a, b, c, e = (1-t)**3, 3*(1-t)**2*t, 3*(1-t)*t**2, t**3
+        points.append((a*p0[0] + b*p1[0] + c*p2[0] + e*p3[0], a*p0[1] + b*p1[1] + c*p2[1] + e*p3[1]))
+    points.append(p3)
+    return points
+
+
+def arc_steps(radius, angle, tolerance=CURVE_TOLERANCE):
+    """
+    How many straight lines are needed to follow an arc
+    :param radius: the bigger radius of the arc
+    :param angle: how far the arc goes round, in radians
+    :return: int
+    >>> arc_steps(100, 2*math.pi, tolerance=0.1)
+    71
+    """
+    if tolerance >= radius:
+        step = math.pi / 2
+    else:
+        step = 2 * math.acos(1 - tolerance / radius)
+    return max(1, math.ceil(abs(angle) / step))
+
+
+def flatten_arc(p0, rx, ry, rotation, large_arc, sweep, p1, tolerance=CURVE_TOLERANCE):
+    """
+    Points along an SVG elliptical arc, not including its start
+    (see https://www.w3.org/TR/SVG/implnote.html#ArcConversionEndpointToCenter)
+    :return: list of (x, y) tuples, ending with p1
+    >>> pts = flatten_arc((0, 0), 50, 50, 0, 0, 1, (100, 0), tolerance=1)
+    >>> len(pts), [round(v) for v in pts[3]]
+    (8, [50, -50])
+    """
+    if p0 == p1:
+        return []
+    rx, ry = abs(rx), abs(ry)
+    if rx == 0 or ry == 0:
+        return [p1]
+    phi = math.radians(rotation)
+    cos, sin = math.cos(phi), math.sin(phi)
+    dx, dy = (p0[0] - p1[0]) / 2, (p0[1] - p1[1]) / 2
+    x1, y1 = cos*dx + sin*dy, -sin*dx + cos*dy
+    scale = x1**2 / rx**2 + y1**2 / ry**2
+    if scale > 1: # radii too small to reach: scale them up
+        rx, ry = rx * math.sqrt(scale), ry * math.sqrt(scale)
+    num = rx**2 * ry**2 - rx**2 * y1**2 - ry**2 * x1**2
+    den = rx**2 * y1**2 + ry**2 * x1**2
+    coef = math.sqrt(max(0.0, num / den))
+    if bool(large_arc) == bool(sweep):
+        coef = -coef
+    cx1, cy1 = coef * rx * y1 / ry, -coef * ry * x1 / rx
+    cx = cos*cx1 - sin*cy1 + (p0[0] + p1[0]) / 2
+    cy = sin*cx1 + cos*cy1 + (p0[1] + p1[1]) / 2
+    theta = math.atan2((y1 - cy1) / ry, (x1 - cx1) / rx)
+    dtheta = math.atan2((-y1 - cy1) / ry, (-x1 - cx1) / rx) - theta
+    if sweep and dtheta < 0:
+        dtheta += 2*math.pi
+    elif not sweep and dtheta > 0:
+        dtheta -= 2*math.pi
+    n = arc_steps(max(rx, ry), dtheta, tolerance)
+    points = []
+    for k in range(1, n):
+        t = theta + dtheta * k / n
+        px, py = rx * math.cos(t), ry * math.sin(t)
+        points.append((cx + cos*px - sin*py, cy + sin*px + cos*py))
+    points.append(p1)
+    return points
+
+
+def ellipse_polygon(cx, cy, rx, ry, tolerance=CURVE_TOLERANCE):
+    """
+    A polygon following an ellipse, with its corners on the ellipse
+    :return: list of (x, y) tuples, wound the positive way (see signed_area)
+    >>> len(ellipse_polygon(0, 0, 100, 100, tolerance=0.1))
+    71
+    """
+    n = max(8, arc_steps(max(rx, ry), 2*math.pi, tolerance))
+    return [(cx + rx*math.cos(2*math.pi*k/n), cy + ry*math.sin(2*math.pi*k/n)) for k in range(n)]
+
+
+def flatten_path(d_string, tolerance=CURVE_TOLERANCE):
+    """
+    Turn the d argument of a path into straight lines
+    :param d_string: the d argument of a path
+    :param tolerance: how far the lines may stray from the curves
+    :return: list of (points, closed) for each subpath, or None if the path can't be read
+    >>> flatten_path('M0,0 H10 V10 Z M20,20 l5,5')
+    [([(0.0, 0.0), (10.0, 0.0), (10.0, 10.0)], True), ([(20.0, 20.0), (25.0, 25.0)], False)]
+    >>> pts, closed = flatten_path('M0,0 A50,50 0 0 1 100,0 Z', tolerance=1)[0]
+    >>> round(signed_area(pts)), closed
+    (3827, True)
+    """
+    tokens = PATH_TOKEN.findall(d_string)
+    subpaths = []
+    current = []
+    x, y = 0.0, 0.0
+    start = (0.0, 0.0)
+    last_control = None # for the reflected control points of S and T
+    cmd = None
+    i = 0
+
+    def add_points(points):
+        if not current:
+            current.append((x, y)) # drawing on after a Z starts from where the Z went back to
+        for pt in points:
+            if current[-1] != pt:
+                current.append(pt)
+
+    def finish(closed):
+        if closed:
+            while len(current) > 1 and current[-1] == current[0]:
+                current.pop()
+        if len(current) > 1 or (current and closed):
+            subpaths.append((list(current), closed))
+        current.clear()
+
+    try:
+        while i < len(tokens):
+            tok = tokens[i]
+            if tok.isalpha():
+                if tok.upper() not in PATH_COMMAND_ARGS:
+                    return None
+                cmd = tok
+                i += 1
+                if cmd in 'Zz':
+                    if current:
+                        finish(True)
+                    x, y = start
+                    last_control = None
+                continue
+            upper = cmd.upper() if cmd else 'Z'
+            n = PATH_COMMAND_ARGS[upper]
+            if n == 0:
+                return None
+            vals = [float(v) for v in tokens[i:i+n]]
+            if len(vals) < n:
+                return None
+            i += n
+            dx, dy = (x, y) if cmd.islower() else (0.0, 0.0)
+            control = None
+            if upper == 'M':
+                if current:
+                    finish(False)
+                x, y = vals[0] + dx, vals[1] + dy
+                start = (x, y)
+                current.append(start)
+                cmd = 'L' if cmd == 'M' else 'l' # extra pairs after a moveto are linetos
+            elif upper in 'LHV':
+                nx = vals[0] + dx if upper in 'LH' else x
+                ny = vals[-1] + dy if upper in 'LV' else y
+                add_points([(nx, ny)])
+                x, y = nx, ny
+            elif upper == 'A':
+                end = (vals[5] + dx, vals[6] + dy)
+                add_points(flatten_arc((x, y), vals[0], vals[1], vals[2], vals[3], vals[4], end, tolerance))
+                x, y = end
+            else:
+                points = [(vals[k] + dx, vals[k+1] + dy) for k in range(0, n, 2)]
+                if upper in 'ST':
+                    reflected = (x, y)
+                    if last_control is not None and last_control[0] == ('C' if upper == 'S' else 'Q'):
+                        reflected = (2*x - last_control[1][0], 2*y - last_control[1][1])
+                    points.insert(0, reflected)
+                if len(points) == 3:
+                    add_points(flatten_cubic((x, y), *points, tolerance=tolerance))
+                else:
+                    add_points(flatten_quadratic((x, y), *points, tolerance=tolerance))
+                control = ('C' if upper in 'CS' else 'Q', points[-2])
+                x, y = points[-1]
+            last_control = control
+    except (ValueError, IndexError):
+        return None
+    if current:
+        finish(False)
+    return subpaths
+
+
+##################################################
+## The sweep
+##################################################
+
+def is_inside(winding, fill_rule):
+    """
+    :param winding: how many times the outlines wind round a point
+    :param fill_rule: NONZERO or EVENODD
+    :return: bool
+    >>> is_inside(2, NONZERO), is_inside(2, EVENODD)
+    (True, False)
+    """
+    if fill_rule == EVENODD:
+        return winding % 2 == 1
+    return winding != 0
+
+
+def x_at(edge, y):
+    """
+    Where an edge (y_top, x_top, y_bottom, x_bottom, ...) is at height y.
+    The ends give back exactly the corners, so neighbouring slabs always agree.
+    >>> x_at((0, 0, 10, 20), 5), x_at((0, 0, 10, 20), 10)
+    (10.0, 20)
+    """
+    y0, x0, y1, x1 = edge[:4]
+    if y == y0:
+        return x0
+    if y == y1:
+        return x1
+    return x0 + (x1 - x0) * (y - y0) / (y1 - y0)
+
+
+def subtract_intervals(a, b):
+    """
+    The parts of one sorted list of (left, right) intervals not covered by another
+    >>> subtract_intervals([(0, 10), (20, 30)], [(5, 25)])
+    [(0, 5), (25, 30)]
+    """
+    result = []
+    j = 0
+    for left, right in a:
+        while j < len(b) and b[j][1] <= left:
+            j += 1
+        k = j
+        x = left
+        while k < len(b) and b[k][0] < right:
+            if b[k][0] > x:
+                result.append((x, b[k][0]))
+            x = max(x, b[k][1])
+            k += 1
+        if x < right:
+            result.append((x, right))
+    return result
+
+
+def simplify_ring(points):
+    """
+    Drop repeated corners and corners that lie on a straight line between their neighbours
+    :param points: list of (x, y) tuples
+    :return: list of (x, y) tuples (fewer than 3 if nothing is left)
+    >>> simplify_ring([(0, 0), (5, 0), (10, 0), (10, 10), (10, 10), (0, 10)])
+    [(0, 0), (10, 0), (10, 10), (0, 10)]
+    """
+    changed = True
+    while changed and len(points) > 2:
+        changed = False
+        kept = []
+        for i, p in enumerate(points):
+            prev = kept[-1] if kept else points[i-1]
+            nxt = points[(i+1) % len(points)]
+            ux, uy = p[0] - prev[0], p[1] - prev[1]
+            vx, vy = nxt[0] - p[0], nxt[1] - p[1]
+            if abs(ux*vy - uy*vx) <= COLLINEAR_TOLERANCE * math.hypot(ux, uy) * math.hypot(vx, vy):
+                changed = True # also catches repeats, which give zero-length sides
+                continue
+            kept.append(p)
+        points = kept
+    return points
+
+
+def chain_segments(segments):
+    """
+    Join directed line segments end to end into closed polygons
+    :param segments: list of ((x, y), (x, y))
+    :return: list of polygons
+    >>> chain_segments([((0, 0), (10, 0)), ((10, 10), (0, 10)), ((10, 0), (10, 10)), ((0, 10), (0, 0))])
+    [[(0, 0), (10, 0), (10, 10), (0, 10)]]
+    """
+    outgoing = defaultdict(list)
+    for start, end in segments:
+        outgoing[start].append(end)
+    polygons = []
+    for start, _ in segments:
+        if not outgoing.get(start):
+            continue
+        ring = [start]
+        point = start
+        while True:
+            ends = outgoing.get(point)
+            if not ends:
+                break # not closed: only happens if the input was not made of closed outlines
+            point = ends.pop()
+            if point == start:
+                break
+            ring.append(point)
+        ring = simplify_ring(ring)
+        if len(ring) > 2 and abs(signed_area(ring)) > AREA_TOLERANCE:
+            polygons.append(ring)
+    return polygons
+
+
+def snap_polygon(points, grid):
+    """
+    Move the corners of a polygon to the nearest points of a grid, so that corners that are meant to be
+    in the same place (but were worked out with different rounding errors) are exactly the same
+    :param points: list of (x, y) tuples
+    :param grid: how far apart the grid points are
+    :return: list of (x, y) tuples, without repeated corners
+    >>> snap_polygon([(75.32514597665164, 0), (75.32514597665168, 0), (10, 10.03)], 0.01)
+    [(75.33, 0.0), (10.0, 10.03)]
+    """
+    snapped = []
+    for x, y in points:
+        point = (round(x / grid) * grid, round(y / grid) * grid)
+        if not snapped or snapped[-1] != point:
+            snapped.append(point)
+    while len(snapped) > 1 and snapped[-1] == snapped[0]:
+        snapped.pop()
+    return snapped
+
+
+def overlay(regions, classify, grid=None):
+    """
+    Lay shapes on top of each other and work out what ends up where.
+    :param regions: list of (polygons, fill_rule)
+    :param classify: function that gets the set of indices of the regions a point is inside,
+        and gives a label for that point (None for nothing)
+    :param grid: if given, the corners are first moved to a grid this far apart (see snap_polygon)
+    :return: dictionary of label -> list of polygons covering exactly the points with that label
+    >>> squares = [([box_polygon(0, 0, 10, 10)], NONZERO), ([box_polygon(5, 5, 15, 15)], NONZERO)]
+    >>> res = overlay(squares, lambda inside: max(inside) if inside else None)
+    >>> [(label, [signed_area(p) for p in res[label]]) for label in sorted(res)]
+    [(0, [75.0]), (1, [100.0])]
+    """
+    edges = []
+    for r, (polygons, fill_rule) in enumerate(regions):
+        for poly in polygons:
+            if grid:
+                poly = snap_polygon(poly, grid)
+            for i in range(len(poly)):
+                (xp, yp), (xq, yq) = poly[i-1], poly[i]
+                if yp < yq:
+                    edges.append((yp, xp, yq, xq, 1, r))
+                elif yq < yp:
+                    edges.append((yq, xq, yp, xp, -1, r))
+    if not edges:
+        return {}
+    heapq.heapify(edges)
+    ys = sorted(set([e[0] for e in edges] + [e[2] for e in edges]))
+    rules = [fill_rule for polygons, fill_rule in regions]
+    winding = [0] * len(regions)
+    segments = defaultdict(list)
+    active = []
+    above = {} # label -> intervals just above the current height
+    y_top = ys[0]
+    k = 1
+
+    def horizontal_boundaries(y, above, below):
+        for label in set(above) | set(below):
+            for left, right in subtract_intervals(below.get(label, []), above.get(label, [])):
+                segments[label].append(((left, y), (right, y))) # top of a shape: left to right
+            for left, right in subtract_intervals(above.get(label, []), below.get(label, [])):
+                segments[label].append(((right, y), (left, y))) # bottom of a shape: right to left
+
+    while k < len(ys):
+        y_bottom = ys[k]
+        while edges and edges[0][0] <= y_top:
+            active.append(heapq.heappop(edges))
+        active = [e for e in active if e[2] > y_top]
+
+        # edges that meet at the top of the slab, give or take rounding errors, are made to meet exactly
+        tops = sorted([(x_at(e, y_top), e) for e in active], key=lambda s: s[0])
+        for i in range(1, len(tops)):
+            (x_left, e_left), (x, e) = tops[i-1], tops[i]
+            if x != x_left and x - x_left <= SNAP_TOLERANCE * max(1.0, abs(x)):
+                if e[0] == y_top and e_left[0] != y_top: # keep corners where they are
+                    tops[i-1] = (x, (y_top, x) + e_left[2:])
+                else:
+                    tops[i] = (x_left, (y_top, x_left) + e[2:])
+        slab = sorted([(xa, x_at(e, y_bottom), e) for xa, e in tops], key=lambda s: s[:2])
+
+        # cut the slab short at the first place two edges cross
+        crossings = []
+        for i in range(len(slab) - 1):
+            (xa1, xb1, e1), (xa2, xb2, e2) = slab[i], slab[i+1]
+            if xb1 > xb2:
+                crossings.append((y_top + (y_bottom - y_top) * (xa2 - xa1) / ((xa2 - xa1) + (xb1 - xb2)), i))
+        snap = SNAP_TOLERANCE * max(1.0, abs(y_bottom))
+        crossings = [(y, i) for y, i in crossings if y_top + snap < y < y_bottom - snap] # else they meet at the ends
+        if crossings:
+            y_bottom = min(y for y, i in crossings)
+            slab = sorted([(xa, x_at(e, y_bottom), e) for xa, xb, e in slab], key=lambda s: s[:2])
+        else:
+            k += 1
+
+        # edges that meet (or cross) at the bottom of the slab are split there at exactly the same
+        # point, so that rounding errors can't put them the wrong way round in the next slab
+        for i in range(1, len(slab)):
+            xa, xb, e = slab[i]
+            xb_left = slab[i-1][1]
+            if xb != xb_left and abs(xb - xb_left) <= SNAP_TOLERANCE * max(1.0, abs(xb)):
+                ends = [j for j in [i-1, i] if slab[j][2][2] == y_bottom]
+                x = slab[ends[0]][1] if ends else xb_left
+                for j in [i-1, i]:
+                    xa_j, xb_j, (y0, x0, y1, x1, w, r) = slab[j]
+                    if y1 != y_bottom:
+                        slab[j] = (xa_j, x, (y0, x0, y_bottom, x, w, r))
+                        heapq.heappush(edges, (y_bottom, x, y1, x1, w, r))
+        active = [e for xa, xb, e in slab]
+
+        # walk across the slab from left to right
+        top, bottom = defaultdict(list), defaultdict(list)
+        inside = set()
+        label = None
+        i = 0
+        while i < len(slab):
+            xa, xb = slab[i][:2]
+            while i < len(slab) and slab[i][0] == xa and slab[i][1] == xb: # edges on top of each other
+                e = slab[i][2]
+                winding[e[5]] += e[4]
+                if is_inside(winding[e[5]], rules[e[5]]):
+                    inside.add(e[5])
+                else:
+                    inside.discard(e[5])
+                i += 1
+            new_label = classify(inside) if inside else None
+            if new_label != label:
+                if label is not None:
+                    segments[label].append(((xa, y_top), (xb, y_bottom))) # shape on the left: downwards
+                    top[label].append((start_top, xa))
+                    bottom[label].append((start_bottom, xb))
+                if new_label is not None:
+                    segments[new_label].append(((xb, y_bottom), (xa, y_top))) # shape on the right: upwards
+                    start_top, start_bottom = xa, xb
+                label = new_label
+        horizontal_boundaries(y_top, above, top)
+        above = bottom
+        y_top = y_bottom
+    horizontal_boundaries(y_top, above, {})
+
+    result = {}
+    for label, segs in segments.items():
+        polygons = chain_segments(segs)
+        if polygons:
+            result[label] = polygons
+    return result
+
+
+def scanline_coverage(regions, classify, ys, grid=None):
+    """
+    How much of each of some horizontal lines ends up with each label. This is worked out one line at a time
+    rather than by sweeping, so it can be used to check what overlay made.
+    :param regions: list of (polygons, fill_rule), as for overlay
+    :param classify: as for overlay
+    :param ys: heights of the lines
+    :param grid: as for overlay
+    :return: dictionary of label -> array of how long a stretch of each line has that label,
+        and array of how many edges cross each line
+    >>> squares = [([box_polygon(0, 0, 10, 10)], NONZERO), ([box_polygon(5, 5, 15, 15)], NONZERO)]
+    >>> lengths, crossings = scanline_coverage(squares, lambda inside: max(inside), [2, 7])
+    >>> lengths[0].tolist(), lengths[1].tolist(), crossings.tolist()
+    ([10.0, 5.0], [0.0, 10.0], [2, 4])
+    """
+    edges = []
+    for r, (polygons, fill_rule) in enumerate(regions):
+        for poly in polygons:
+            if grid:
+                poly = snap_polygon(poly, grid)
+            for i in range(len(poly)):
+                (xp, yp), (xq, yq) = poly[i-1], poly[i]
+                if yp != yq:
+                    edges.append((yp, xp, yq, xq, 1 if yp < yq else -1, r))
+    lengths = defaultdict(lambda: np.zeros(len(ys)))
+    crossings = np.zeros(len(ys), dtype=int)
+    if not edges:
+        return {}, crossings
+    yp, xp, yq, xq, direction, region = np.array(edges).T
+    top, bottom = np.minimum(yp, yq), np.maximum(yp, yq)
+    rules = [fill_rule for polygons, fill_rule in regions]
+    for j, y in enumerate(ys):
+        hit = np.nonzero((top <= y) & (y < bottom))[0]
+        crossings[j] = len(hit)
+        xs = xp[hit] + (xq[hit] - xp[hit]) * (y - yp[hit]) / (yq[hit] - yp[hit])
+        winding = defaultdict(int)
+        inside = set()
+        label = start = None
+        for k in np.argsort(xs, kind='stable'):
+            r = int(region[hit[k]])
+            winding[r] += int(direction[hit[k]])
+            if is_inside(winding[r], rules[r]):
+                inside.add(r)
+            else:
+                inside.discard(r)
+            new_label = classify(inside) if inside else None
+            if new_label != label:
+                if label is not None:
+                    lengths[label][j] += xs[k] - start
+                label, start = new_label, xs[k]
+    return dict(lengths), crossings
+
+
+##################################################
+## Boolean operations
+##################################################
+
+def shape_region(shape, tolerance=CURVE_TOLERANCE):
+    """
+    Get the (polygons, fill_rule) of a shape given as polygons, as the d argument of a path,
+    or as a drawsvg element (whose fill area is used)
+    >>> shape_region('M0,0 H10 V10 Z')
+    ([[(0.0, 0.0), (10.0, 0.0), (10.0, 10.0)]], 'nonzero')
+    """
+    if isinstance(shape, str):
+        subpaths = flatten_path(shape, tolerance)
+        assert subpaths is not None, f'Cannot read path: {shape}'
+        return [points for points, closed in subpaths], NONZERO
+    if isinstance(shape, draw.DrawingElement):
+        matrix = parse_transform(shape.args.get('transform'))
+        polygons = fill_polygons(shape, tolerance)
+        assert matrix is not None and polygons is not None, f'Cannot work out the shape of {type(shape).__name__}'
+        return [apply_transform(matrix, poly) for poly in polygons], shape.args.get('fill-rule', NONZERO)
+    return shape, NONZERO
+
+
+def boolean_operation(shape1, shape2, keep, tolerance=CURVE_TOLERANCE):
+    """
+    :param shape1: polygons, path d argument, or drawsvg element
+    :param shape2: polygons, path d argument, or drawsvg element
+    :param keep: function of (inside shape1, inside shape2) saying whether a point is in the result
+    :return: list of polygons
+    """
+    regions = [shape_region(shape1, tolerance), shape_region(shape2, tolerance)]
+    result = overlay(regions, lambda inside: True if keep(0 in inside, 1 in inside) else None)
+    return result.get(True, [])
+
+
+def union(shape1, shape2, tolerance=CURVE_TOLERANCE):
+    """
+    Everything inside either shape
+    :return: list of polygons
+    >>> [signed_area(p) for p in union([box_polygon(0, 0, 10, 10)], 'M5,5 h10 v10 h-10 Z')]
+    [175.0]
+    """
+    return boolean_operation(shape1, shape2, lambda in1, in2: in1 or in2, tolerance)
+
+
+def intersection(shape1, shape2, tolerance=CURVE_TOLERANCE):
+    """
+    Everything inside both shapes
+    :return: list of polygons
+    >>> circle = draw.Circle(0, 0, 10)
+    >>> round(sum(signed_area(p) for p in intersection(circle, [box_polygon(0, 0, 20, 20)])), 1) # about pi*100/4
+    77.6
+    """
+    return boolean_operation(shape1, shape2, lambda in1, in2: in1 and in2, tolerance)
+
+
+def difference(shape1, shape2, tolerance=CURVE_TOLERANCE):
+    """
+    Everything inside the first shape but not the second
+    :return: list of polygons (holes are wound the other way)
+    >>> ring = difference([box_polygon(0, 0, 30, 30)], [box_polygon(10, 10, 20, 20)])
+    >>> sorted(signed_area(p) for p in ring)
+    [-100.0, 900.0]
+    """
+    return boolean_operation(shape1, shape2, lambda in1, in2: in1 and not in2, tolerance)
+
+
+##################################################
+## Flattening a whole flag
+##################################################
+
+def stroke_polygons(subpaths, half_width, linejoin='miter', linecap='butt', miterlimit=4,
+                    tolerance=CURVE_TOLERANCE):
+    """
+    The area painted by stroking some lines, as overlapping polygons with positive signed_area
+    (so fill them with the nonzero rule to get the stroke)
+    :param subpaths: list of (points, closed), as from flatten_path
+    :return: list of polygons
+    >>> pieces = stroke_polygons([([(0, 0), (10, 0)], False)], 1, linecap='square')
+    >>> [signed_area(p) for p in pieces]
+    [20.0, 2.0, 2.0]
+    """
+    pieces = []
+
+    def add(poly):
+        if signed_area(poly) < 0:
+            poly = poly[::-1]
+        pieces.append(poly)
+
+    def disc(p):
+        add(ellipse_polygon(p[0], p[1], half_width, half_width, tolerance))
+
+    for points, closed in subpaths:
+        if len(points) == 1:
+            if linecap == 'round':
+                disc(points[0])
+            elif linecap == 'square':
+                x, y = points[0]
+                add(box_polygon(x - half_width, y - half_width, x + half_width, y + half_width))
+            continue
+        sides = list(zip(points, points[1:] + points[:1])) if closed else list(zip(points, points[1:]))
+        normals = []
+        for p, q in sides:
+            length = math.hypot(q[0] - p[0], q[1] - p[1])
+            ux, uy = (q[0] - p[0]) / length, (q[1] - p[1]) / length
+            nx, ny = -uy * half_width, ux * half_width
+            normals.append((nx, ny))
+            add([(p[0] + nx, p[1] + ny), (q[0] + nx, q[1] + ny), (q[0] - nx, q[1] - ny), (p[0] - nx, p[1] - ny)])
+
+        corners = range(len(sides)) if closed else range(1, len(sides))
+        for i in corners:
+            v = sides[i][0]
+            (n1x, n1y), (n2x, n2y) = normals[i-1], normals[i]
+            turn = n1x*n2y - n1y*n2x
+            if turn == 0 and n1x*n2x + n1y*n2y > 0:
+                continue # straight on
+            if linejoin == 'round':
+                disc(v)
+                continue
+            side = -1 if turn > 0 else 1 # the outside of the corner
+            a = (v[0] + side*n1x, v[1] + side*n1y)
+            b = (v[0] + side*n2x, v[1] + side*n2y)
+            mx, my = n1x + n2x, n1y + n2y
+            spread = math.hypot(mx, my) / half_width # 2 * cos(half the angle turned)
+            if linejoin in ['miter', 'miter-clip', 'arcs'] and spread > 0 and 2 / spread <= miterlimit:
+                scale = 2 / spread**2
+                add([v, a, (v[0] + side*mx*scale, v[1] + side*my*scale), b])
+            else:
+                add([v, a, b])
+
+        if not closed:
+            for p, q in [(points[0], points[1]), (points[-1], points[-2])]: # caps point away from the line
+                if linecap == 'round':
+                    disc(p)
+                elif linecap == 'square':
+                    length = math.hypot(q[0] - p[0], q[1] - p[1])
+                    ux, uy = half_width * (p[0] - q[0]) / length, half_width * (p[1] - q[1]) / length
+                    nx, ny = -uy, ux
+                    add([(p[0] + nx, p[1] + ny), (p[0] + nx + ux, p[1] + ny + uy),
+                         (p[0] - nx + ux, p[1] - ny + uy), (p[0] - nx, p[1] - ny)])
+    return pieces
+
+
+def element_subpaths(element, tolerance=CURVE_TOLERANCE):
+    """
+    The outline of a basic shape as flattened subpaths, in the element's own coordinates
+    :return: list of (points, closed), or None if the element is not a shape we understand
+    >>> element_subpaths(draw.Rectangle(0, 0, 10, 5))
+    [([(0.0, 0.0), (10.0, 0.0), (10.0, 5.0), (0.0, 5.0)], True)]
+    """
+    if element.children:
+        return None
+    if isinstance(element, draw.Rectangle):
+        x, y = get_number_arg(element, 'x', 0), get_number_arg(element, 'y', 0)
+        w, h = get_number_arg(element, 'width', 0), get_number_arg(element, 'height', 0)
+        if w <= 0 or h <= 0:
+            return []
+        rx = get_number_arg(element, 'rx', get_number_arg(element, 'ry', 0))
+        ry = get_number_arg(element, 'ry', rx)
+        rx, ry = min(rx, w/2), min(ry, h/2)
+        if rx <= 0 or ry <= 0:
+            return [(box_polygon(x, y, x + w, y + h), True)]
+        return flatten_path(f'M{x+rx},{y} H{x+w-rx} A{rx},{ry} 0 0 1 {x+w},{y+ry} V{y+h-ry} '
+                            f'A{rx},{ry} 0 0 1 {x+w-rx},{y+h} H{x+rx} A{rx},{ry} 0 0 1 {x},{y+h-ry} '
+                            f'V{y+ry} A{rx},{ry} 0 0 1 {x+rx},{y} Z', tolerance)
+    elif isinstance(element, (draw.Circle, draw.Ellipse)):
+        cx, cy = get_number_arg(element, 'cx', 0), get_number_arg(element, 'cy', 0)
+        if isinstance(element, draw.Circle):
+            rx = ry = get_number_arg(element, 'r', 0)
+        else:
+            rx, ry = get_number_arg(element, 'rx', 0), get_number_arg(element, 'ry', 0)
+        if rx <= 0 or ry <= 0:
+            return []
+        return [(ellipse_polygon(cx, cy, rx, ry, tolerance), True)]
+    elif isinstance(element, draw.Path):
+        return flatten_path(element.args.get('d', ''), tolerance)
+    return None
+
+
+def fill_polygons(element, tolerance=CURVE_TOLERANCE):
+    """
+    The area inside a basic shape, in the element's own coordinates
+    :return: list of polygons, or None if the element is not a shape we understand
+    """
+    subpaths = element_subpaths(element, tolerance)
+    if subpaths is None:
+        return None
+    return [points for points, closed in subpaths if len(points) > 2]
+
+
+def stroke_region(element, tolerance=CURVE_TOLERANCE):
+    """
+    The area covered by the stroke of a basic shape, in the element's own coordinates
+    :return: (polygons, fill_rule), or None if the element is not a shape we understand
+    >>> polygons, rule = stroke_region(draw.Circle(0, 0, 10, stroke='red', stroke_width=4, fill='none'))
+    >>> round(sum(signed_area(p) for p in polygons)), rule
+    (250, 'nonzero')
+    """
+    half_width = get_number_arg(element, 'stroke-width', 1) / 2
+    if isinstance(element, draw.Circle) and not element.children:
+        cx, cy, r = get_number_arg(element, 'cx', 0), get_number_arg(element, 'cy', 0), get_number_arg(element, 'r', 0)
+        if r <= 0:
+            return [], NONZERO
+        polygons = [ellipse_polygon(cx, cy, r + half_width, r + half_width, tolerance)]
+        if r > half_width:
+            polygons.append(ellipse_polygon(cx, cy, r - half_width, r - half_width, tolerance)[::-1])
+        return polygons, NONZERO
+    subpaths = element_subpaths(element, tolerance)
+    if subpaths is None:
+        return None
+    return stroke_polygons(subpaths, half_width, element.args.get('stroke-linejoin', 'miter'),
+                           element.args.get('stroke-linecap', 'butt'),
+                           get_number_arg(element, 'stroke-miterlimit', 4), tolerance), NONZERO
+
+
+def element_paint(element, tolerance=CURVE_TOLERANCE):
+    """
+    Everything an element paints, in the order it paints it (fill, then stroke)
+    :param element: drawsvg element
+    :return: list of (polygons, fill_rule, colour) in drawing coordinates,
+        or None if the element can't be flattened (e.g. it is text, an image, or see-through)
+    >>> [(len(p), rule, colour) for p, rule, colour in element_paint(draw.Rectangle(0, 0, 10, 5, fill='red'))]
+    [(1, 'nonzero', 'red')]
+    >>> element_paint(draw.Rectangle(0, 0, 10, 5, fill='red', fill_opacity=0.5)) is None
+    True
+    """
+    if not isinstance(element, SHAPE_TYPES) or any(k in element.args for k in ['mask', 'filter']) \
+            or any(k.startswith('marker') for k in element.args):
+        return None
+    matrix = parse_transform(element.args.get('transform'))
+    if matrix is None:
+        return None
+    opacity = get_number_arg(element, 'opacity', 1)
+    if opacity <= 0:
+        return []
+    paint = []
+    if has_visible_fill(element):
+        colour = element.args.get('fill', 'black')
+        if not is_solid_colour(colour) or min(opacity, get_number_arg(element, 'fill-opacity', 1)) < 1:
+            return None
+        polygons = fill_polygons(element, tolerance)
+        if polygons is None:
+            return None
+        paint.append(([apply_transform(matrix, p) for p in polygons], element.args.get('fill-rule', NONZERO), colour))
+    if has_visible_stroke(element):
+        colour = element.args.get('stroke')
+        if not is_solid_colour(colour) or min(opacity, get_number_arg(element, 'stroke-opacity', 1)) < 1 or \
+                element.args.get('stroke-dasharray', EMPTY) != EMPTY:
+            return None
+        region = stroke_region(element, tolerance)
+        if region is None:
+            return None
+        paint.append(([apply_transform(matrix, p) for p in region[0]], region[1], colour))
+    return paint
+
+
+def clip_regions(element, tolerance=CURVE_TOLERANCE):
+    """
+    The shapes in an element's clip-path, in drawing coordinates
+    :return: list of (polygons, clip_rule) (empty if the element is not clipped), or None if we can't tell
+    >>> clip_regions(draw.Rectangle(0, 0, 10, 10, clip_path=draw.ClipPath())) # clipped to nothing at all
+    [([], 'nonzero')]
+    """
+    clip = element.args.get('clip-path')
+    if clip is None:
+        return []
+    if not isinstance(clip, draw.ClipPath):
+        return None
+    if not clip.children:
+        return [([], NONZERO)]
+    matrix = parse_transform(element.args.get('transform'))
+    regions = []
+    for child in clip.children:
+        child_matrix = parse_transform(child.args.get('transform')) if isinstance(child, draw.DrawingElement) else None
+        polygons = fill_polygons(child, tolerance) if child_matrix is not None else None
+        if matrix is None or polygons is None:
+            return None
+        full = compose_transforms(matrix, child_matrix)
+        regions.append(([apply_transform(full, p) for p in polygons], child.args.get('clip-rule', NONZERO)))
+    return regions
+
+
+def flatten_layers(d, tolerance=CURVE_TOLERANCE):
+    """
+    Replace the layers of a drawing with one path per colour, covering exactly the part of
+    the canvas where that colour can be seen. Nothing overlaps and nothing is drawn twice.
+    Only opaque, plain coloured shapes can be flattened; if the drawing has anything else
+    (text, embedded images, see-through layers...) it is left as it is.
+    :param d: Drawing object
+    :param tolerance: how far (in pixels) flattened curves may stray from the real ones
+    :return: whether the drawing was flattened
+    >>> d = draw.Drawing(500, 300)
+    >>> bh = draw_horiz_bars(d, ['black', 'red', 'black'])
+    >>> d.append(draw.Rectangle(200, 0, 100, 300, fill='red'))
+    >>> flatten_layers(d)
+    True
+    >>> [(e.args['fill'], e.args['d'].count('M')) for e in d.elements]
+    [('black', 4), ('red', 1)]
+    >>> d.append(draw.Text('hi', 10, 0, 0))
+    >>> flatten_layers(d)
+    Cannot flatten Text elements, leaving the drawing unflattened
+    False
+
+    Corners worked out in different ways (e.g. by rotating the arrows of a symbol) can be a rounding error apart,
+    so they're moved to a grid first, to stop the outlines being joined up wrong and losing holes:
+    >>> def flattened_areas(name):
+    ...     d = draw.Drawing(500, 300)
+    ...     drawn = get_shape(name).function(d, 'red')
+    ...     flattened = flatten_layers(d)
+    ...     return flattened, [(e.args['fill'], e.args['d'].count('M'),
+    ...                         round(sum(signed_area(p) for p, closed in flatten_path(e.args['d'])))) for e in d.elements]
+    >>> flattened_areas('draw_trans_symbol')
+    (True, [('red', 2, 11845)])
+    >>> flattened_areas('draw_arbitrary_star_trace')
+    (True, [('red', 7, 2070)])
+
+    Anything clipped to an empty clip path isn't drawn at all:
+    >>> d = draw.Drawing(500, 300)
+    >>> d.append(draw.Rectangle(0, 0, 500, 300, fill='red'))
+    >>> d.append(draw.Rectangle(0, 0, 500, 300, fill='blue', clip_path=draw.ClipPath()))
+    >>> flatten_layers(d), [e.args['fill'] for e in d.elements]
+    (True, ['red'])
+    """
+    x, y, w, h = d.view_box
+    regions = [([box_polygon(x, y, x + w, y + h)], NONZERO)] # only what is on the canvas counts
+    layers = {} # index of the region -> (colour, indices of the regions it is clipped to)
+    clips = {} # python id of a clip path -> indices of its regions
+    for element in d.elements:
+        paint = element_paint(element, tolerance)
+        clipped_to = clip_regions(element, tolerance)
+        if paint is None or clipped_to is None:
+            print(f'Cannot flatten {type(element).__name__} elements, leaving the drawing unflattened')
+            return False
+        if paint and clipped_to:
+            clip = id(element.args['clip-path'])
+            if clip not in clips:
+                clips[clip] = list(range(len(regions), len(regions) + len(clipped_to)))
+                regions.extend(clipped_to)
+            clipped_to = clips[clip]
+        for polygons, fill_rule, colour in paint:
+            layers[len(regions)] = (colour.strip().lower(), clipped_to)
+            regions.append((polygons, fill_rule))
+
+    def classify(inside):
+        if 0 not in inside:
+            return None
+        for r in sorted(inside, reverse=True):
+            if r in layers:
+                colour, clipped_to = layers[r]
+                if not clipped_to or any(c in inside for c in clipped_to):
+                    return colour
+        return None
+
+    grid = tolerance * SNAP_GRID
+    result = overlay(regions, classify, grid)
+    colours = []
+    for colour, clipped_to in layers.values():
+        if colour in result and colour not in colours:
+            colours.append(colour)
+
+    # check each colour covers the same stretches of some lines across the canvas as the layers did
+    lines = min(MAX_CHECK_LINES, max(1, math.ceil(h * CHECK_LINES)))
+    ys = y + (np.arange(lines) + 0.5) * h / lines
+    expected, crossings = scanline_coverage(regions, classify, ys, grid)
+    found, _ = scanline_coverage([(result[colour], NONZERO) for colour in colours],
+                                 lambda inside: colours[max(inside)], ys)
+    slack = grid * (crossings + 1)
+    if any(np.any(abs(expected.get(colour, 0) - found.get(colour, 0)) > slack)
+           for colour in set(expected) | set(found)):
+        print('The flattened colours would not cover the same areas as the layers, leaving the drawing unflattened')
+        return False
+    d.elements[:] = [draw.Path(polygons_as_path(result[colour]), fill=colour) for colour in colours]
+    return True
+
+
+if __name__ == '__main__':
+    doctest.testmod()
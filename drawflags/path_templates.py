@@ -0,0 +1,195 @@
+"""
+Traced shapes stored as path templates, so their coordinates are worked out once rather than on every call.
+
+A template is SVG path data in the coordinates it was traced in (e.g. a 48x48 icon), which is parsed,
+checked and scaled down to a unit square when it's added. Placing it on a drawing is then one
+scale-and-translate of every point, and the resulting path data is cached per (template, size, position),
+so drawing the same symbol onto hundreds of flags only does the arithmetic once.
+
+>>> square = add_path_template('square', 'M 2,2 H 8 V 8 L 2,8 Z', 10, 10)
+>>> square.commands
+(('M', (0.2, 0.2)), ('H', (0.8,)), ('V', (0.8,)), ('L', (0.2, 0.8)), ('Z', ()))
+>>> place_path_template(square, 100, 50, 10, 0)
+'M30.0,10.0 H90.0 V40.0 L30.0,40.0 Z'
+>>> place_path_template(square, 100, 50, 10, 0) is place_path_template(square, 100, 50, 10, 0)
+True
+>>> del TEMPLATES['square']
+"""
+
+import functools
+import re
+from collections import namedtuple
+
+# how many numbers each path command takes
+PATH_COMMAND_ARGS = {'M': 2, 'L': 2, 'H': 1, 'V': 1, 'C': 6, 'S': 4, 'Q': 4, 'T': 2, 'A': 7, 'Z': 0}
+
+# how many points each command has, once the path has been made absolute (with no H or V)
+COMMAND_POINTS = {'M': 1, 'L': 1, 'C': 3, 'S': 2, 'Q': 2, 'T': 1, 'A': 1, 'Z': 0}
+
+ARC_PARAMETERS = 5 # rx, ry, rotation, large_arc, sweep, before the end point
+
+TEMPLATE_TOKEN = re.compile(r'[A-Za-z]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+TEMPLATE_CACHE_SIZE = 4096 # placed paths kept, across all templates
+
+PathTemplate = namedtuple('PathTemplate', ['name', 'commands'])
+
+TEMPLATES = {}
+
+
+def parse_path_template(path_data):
+    """
+    Split path data into commands, checking that each has the right number of arguments.
+    Only absolute commands are allowed, since relative ones can't be placed by scaling each number.
+    :param path_data: SVG path data, e.g. 'M 0,0 L 1,1 Z'
+    :return: tuple of (command, tuple of numbers), with any repeated commands written out
+    >>> parse_path_template('M 0,0 1,1 C 1,2 3,4 5,6')
+    (('M', (0.0, 0.0)), ('L', (1.0, 1.0)), ('C', (1.0, 2.0, 3.0, 4.0, 5.0, 6.0)))
+    >>> parse_path_template('M 0,0 l 1,1')
+    Traceback (most recent call last):
+    ...
+    ValueError: l: only absolute path commands can be used in a template
+    >>> parse_path_template('M 0,0 C 1,2 3,4')
+    Traceback (most recent call last):
+    ...
+    ValueError: C takes 6 numbers, not 4
+    """
+    tokens = TEMPLATE_TOKEN.findall(path_data)
+    if ''.join(tokens) != re.sub(r'[\s,]', '', path_data):
+        raise ValueError(f'{path_data!r} is not path data')
+    if not tokens or tokens[0] != 'M':
+        raise ValueError('a template has to start with M')
+    commands = []
+    i = 0
+    while i < len(tokens):
+        cmd = tokens[i]
+        if cmd not in PATH_COMMAND_ARGS:
+            if cmd.upper() in PATH_COMMAND_ARGS:
+                raise ValueError(f'{cmd}: only absolute path commands can be used in a template')
+            raise ValueError(f'{cmd} is not a path command')
+        i += 1
+        n = PATH_COMMAND_ARGS[cmd]
+        numbers = []
+        while i < len(tokens) and not tokens[i].isalpha():
+            numbers.append(float(tokens[i]))
+            i += 1
+        if n == 0 or not numbers:
+            if numbers or n:
+                raise ValueError(f'{cmd} takes {n} numbers, not {len(numbers)}')
+            commands.append((cmd, ()))
+            continue
+        if len(numbers) % n:
+            raise ValueError(f'{cmd} takes {n} numbers, not {len(numbers)}')
+        for j in range(0, len(numbers), n):
+            # extra points after an M are lines
+            commands.append((cmd if cmd != 'M' or j == 0 else 'L', tuple(numbers[j:j+n])))
+    return tuple(commands)
+
+
+def add_path_template(name, path_data, width=1.0, height=1.0):
+    """
+    Parse a traced path, store it in unit space and add it to TEMPLATES
+    :param name: name to look it up by in TEMPLATES
+    :param path_data: SVG path data, in the coordinates it was traced in
+    :param width: width of the area it was traced in (becomes 1 in unit space)
+    :param height: height of the area it was traced in (becomes 1 in unit space)
+    :return: the PathTemplate
+    """
+    template = make_path_template(name, path_data, width, height)
+    TEMPLATES[name] = template
+    return template
+
+
+def make_path_template(name, path_data, width=1.0, height=1.0):
+    """
+    Like add_path_template, but without adding it to TEMPLATES, for shapes that are worked out rather than traced
+    >>> make_path_template('arc', 'M 0,10 A 5,10 90 0 1 10,10', 10, 20).commands
+    (('M', (0.0, 0.5)), ('A', (0.25, 1.0, 90.0, 0, 1, 1.0, 0.5)))
+    """
+    commands = []
+    for cmd, numbers in parse_path_template(path_data):
+        if cmd == 'H':
+            numbers = (numbers[0]/width,)
+        elif cmd == 'V':
+            numbers = (numbers[0]/height,)
+        elif cmd == 'A':
+            rx, ry, rot, large_arc, sweep, x, y = numbers
+            assert rot % 90 == 0 or width == height, 'arcs can only be stretched if they are axis-aligned'
+            if rot % 180: # rx runs up and down
+                rx, ry = rx/height, ry/width
+            else:
+                rx, ry = rx/width, ry/height
+            numbers = (rx, ry, rot, int(bool(large_arc)), int(bool(sweep)), x/width, y/height)
+        else:
+            numbers = tuple(v/width if k % 2 == 0 else v/height for k, v in enumerate(numbers))
+        commands.append((cmd, numbers))
+    return PathTemplate(name, tuple(commands))
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def place_path_template(template, x_scale, y_scale, x_offset, y_offset):
+    """
+    Scale a template up from unit space and move it into place: x becomes x_offset + x*x_scale, and similarly for y
+    :param template: PathTemplate, or the name of one. Arcs that aren't axis-aligned need x_scale == y_scale
+    :param x_scale: width the unit square is stretched to
+    :param y_scale: height the unit square is stretched to
+    :param x_offset: where the left of the unit square goes
+    :param y_offset: where the top of the unit square goes
+    :return: path data string, as drawsvg would write it
+    """
+    if isinstance(template, str):
+        template = TEMPLATES[template]
+    parts = []
+    for cmd, numbers in template.commands:
+        if cmd == 'H':
+            numbers = (x_offset + numbers[0]*x_scale,)
+        elif cmd == 'V':
+            numbers = (y_offset + numbers[0]*y_scale,)
+        elif cmd == 'A':
+            rx, ry, rot, large_arc, sweep, x, y = numbers
+            if rot % 180:
+                rx, ry = rx*abs(y_scale), ry*abs(x_scale)
+            else:
+                rx, ry = rx*abs(x_scale), ry*abs(y_scale)
+            if x_scale*y_scale < 0: # a mirror image goes round the other way
+                sweep = 1 - sweep
+            numbers = (rx, ry, rot, large_arc, sweep, x_offset + x*x_scale, y_offset + y*y_scale)
+        else:
+            numbers = [x_offset + v*x_scale if k % 2 == 0 else y_offset + v*y_scale for k, v in enumerate(numbers)]
+        parts.append(cmd + ','.join(map(str, numbers)))
+    return ' '.join(parts)
+
+
+@functools.lru_cache(maxsize=1024)
+def get_path_format(commands, precision=None):
+    """
+    A %-format string that writes out the numbers of a path with these commands
+    :param commands: command letters, e.g. 'MLZ' (no H or V)
+    :param precision: digits after the decimal point, or None to write numbers the same way drawsvg does
+    :return: string
+    >>> get_path_format('MLZ', 2)
+    'M%.2f,%.2f L%.2f,%.2f Z'
+    """
+    number = '%r' if precision is None else f'%.{precision}f'
+    parts = []
+    for cmd in commands:
+        fields = [number]*(2*COMMAND_POINTS[cmd])
+        if cmd == 'A':
+            fields = [number]*3 + ['%d']*2 + fields
+        parts.append(cmd + ','.join(fields))
+    return ' '.join(parts)
+
+
+def format_path_data(commands, numbers, precision=None):
+    """
+    Write out path data all in one go, rather than a number at a time
+    :param commands: command letters, e.g. 'MLZ' (no H or V)
+    :param numbers: all the numbers in the path, in order, as a list or numpy array
+    :param precision: digits after the decimal point, or None to write numbers the same way drawsvg does
+    :return: path data string
+    >>> format_path_data('MLZ', [0, 0.5, 10, 1/3])
+    'M0.0,0.5 L10.0,0.3333333333333333 Z'
+    """
+    if hasattr(numbers, 'tolist'):
+        numbers = numbers.tolist()
+    return get_path_format(commands, precision) % tuple(map(float, numbers))
@@ -0,0 +1,747 @@
+"""
+Save PNGs of a flag at several sizes at once.
+
+d.save_png writes the drawing out as SVG, and cairosvg parses that again before drawing it.
+For the usual set of sizes (1x for the web, 2x and 4x for high-DPI screens, and a big one for print)
+that's the same SVG written and parsed four times. save_pngs writes and parses it once and draws
+every size from that.
+
+Sizes are given as scales of the drawing's size, or as widths in pixels, and the files are named after them:
+
+>>> get_png_sizes(draw.Drawing(500, 300), scales=[1, 2, 4], widths=[3000])
+[('', 500, 300), ('@2x', 1000, 600), ('@4x', 2000, 1200), ('_3000px', 3000, 1800)]
+
+cairosvg writes 32-bit RGBA PNGs, but a flag is a few flat colours and the blends between them along
+their edges, so encode_indexed_png can usually write the same pixels as a palette of at most 256 colours,
+one byte (or fewer bits) each, with whichever PNG filter and compression settings come out smallest:
+
+>>> pixels = np.zeros((30, 50, 4), dtype=np.uint8)
+>>> pixels[:, :, 3] = 255
+>>> pixels[:15, :, 0] = 255 # red over black
+>>> png, info = encode_indexed_png(pixels)
+>>> info['colours'], info['bit_depth'], info['exact']
+(2, 1, True)
+>>> len(png) < 100
+True
+
+Images with more colours than that only fit in a palette by changing some of their edge pixels,
+so index_png_data keeps the original for those unless it's given exact_only=False.
+"""
+
+import concurrent.futures
+import copy
+import io
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import defaultdict
+
+from optimise_layers import *
+
+DPI = 96 # what cairosvg (and so save_png) takes a pixel to be
+
+RETINA_SCALES = [1, 2, 4]
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+MAX_PALETTE = 256
+
+# PNG filter types, in the order of their numbers
+PNG_FILTERS = ['none', 'sub', 'up', 'average', 'paeth']
+ADAPTIVE = 'adaptive' # the filter with the smallest sum of absolute differences, chosen row by row
+
+# zlib settings tried on the best filter, as (level, strategy)
+COMPRESSION_SETTINGS = [(9, zlib.Z_DEFAULT_STRATEGY), (9, zlib.Z_FILTERED), (9, zlib.Z_RLE)]
+
+TILE_SIZE = 1024 # pixels each way, so a tile of RGBA is 4MB
+
+STREAM_COMPRESSION = 6 # zlib level for tiled PNGs, where trying every setting would mean rendering them again
+
+FILTER_ROWS = 16 # rows filtered at a time when streaming, since filter_rows works on several copies of them
+
+
+def get_png_sizes(d, scales=(1,), widths=()):
+    """
+    :param d: Drawing object
+    :param scales: how many times bigger than the drawing (or its render size, if it's been given one) each PNG is
+    :param widths: widths in pixels, with the height worked out from the drawing's shape
+    :return: list of (file name suffix, width, height)
+    """
+    width, height = d.calc_render_size()
+    sizes = [('' if scale == 1 else f'@{scale:g}x', round(width*scale), round(height*scale)) for scale in scales]
+    sizes += [(f'_{w}px', w, round(height*w/width)) for w in widths]
+    return sizes
+
+
+def parse_drawing(d):
+    """
+    Write a drawing out and parse it, ready for drawing at any size with render_png
+    :param d: Drawing object
+    :return: cairosvg's parsed tree
+    """
+    from cairosvg.parser import Tree # like save_png, only needs cairo once a PNG is actually made
+    return Tree(bytestring=d.as_svg().encode('utf-8'))
+
+
+def render_png(tree, width, height, write_to=None):
+    """
+    Draw a parsed drawing as a PNG
+    :param tree: from parse_drawing
+    :param width: width in pixels
+    :param height: height in pixels
+    :param write_to: file name or open binary file, or None to return the PNG
+    :return: the PNG as bytes if write_to is None
+    """
+    from cairosvg.surface import PNGSurface
+    output = io.BytesIO() if write_to is None else write_to
+    # cairosvg draws by annotating the tree's nodes, so one tree is only drawn once at a time
+    PNGSurface(tree, output, DPI, output_width=width, output_height=height).finish()
+    if write_to is None:
+        return output.getvalue()
+
+
+class RasterSession:
+    """
+    Turns many drawings into PNGs, for batch jobs. cairosvg is imported once, and rather than a new
+    cairo surface for every PNG (which is what d.save_png does), a surface of each size is kept and
+    cleared for the next PNG of that size, so hundreds of 500x300 flags are all drawn on the same one.
+
+    A session isn't safe to share between threads. get_session gives each thread (and so each worker
+    of a process pool) its own.
+
+        with RasterSession() as session:
+            for name, d in flags:
+                session.save_png(d, f'output/png/{name}.png')
+    """
+
+    def __init__(self, dpi=DPI):
+        """
+        :param dpi: what a pixel is taken to be, for lengths in other units
+        """
+        from cairosvg.parser import Tree # like save_png, only needs cairo once a PNG is actually made
+        from cairosvg.surface import PNGSurface, cairo
+        session = self
+
+        class SessionSurface(PNGSurface):
+            def _create_surface(self, width, height):
+                return session.get_surface(int(round(width)), int(round(height)))
+
+            def finish(self):
+                # write the PNG, but leave the surface open for the next one
+                self.cairo.flush()
+                if self.output is not None:
+                    self.cairo.write_to_png(self.output)
+
+        self.tree_class = Tree
+        self.surface_class = SessionSurface
+        self.cairo = cairo
+        self.dpi = dpi
+        self.surfaces = {}
+        self.rendered = 0
+
+    def get_surface(self, width, height):
+        """
+        :return: a clear cairo surface of this size, its width and its height
+        """
+        surface = self.surfaces.get((width, height))
+        if surface is None:
+            surface = self.surfaces[width, height] = self.cairo.ImageSurface(self.cairo.FORMAT_ARGB32, width, height)
+        else:
+            context = self.cairo.Context(surface)
+            context.set_operator(self.cairo.OPERATOR_CLEAR)
+            context.paint()
+        return surface, width, height
+
+    def render_tree(self, tree, width, height, write_to=None):
+        """
+        Draw a parsed drawing as a PNG, like render_png
+        :param tree: from parse_drawing
+        :param width: width in pixels
+        :param height: height in pixels
+        :param write_to: file name or open binary file, or None to return the PNG
+        :return: the PNG as bytes if write_to is None
+        """
+        output = io.BytesIO() if write_to is None else write_to
+        self.surface_class(tree, output, self.dpi, output_width=width, output_height=height).finish()
+        self.rendered += 1
+        if write_to is None:
+            return output.getvalue()
+
+    def render_svg(self, svg, width=None, height=None, write_to=None):
+        """
+        :param svg: SVG as a string or bytes
+        :param width: width in pixels, or None for the SVG's own (or to keep its shape, if height is given)
+        :param height: height in pixels, likewise
+        :param write_to: see render_tree
+        """
+        tree = self.tree_class(bytestring=svg.encode('utf-8') if isinstance(svg, str) else svg)
+        return self.render_tree(tree, width, height, write_to)
+
+    def render(self, d, write_to=None):
+        """
+        Draw a drawing as a PNG at its render size, the same as d.save_png or d.rasterize would
+        :param d: Drawing object
+        :param write_to: see render_tree
+        """
+        width, height = d.calc_render_size()
+        return self.render_svg(d.as_svg(), round(width), round(height), write_to)
+
+    def save_png(self, d, filename):
+        """
+        :param d: Drawing object
+        :param filename: where to save the PNG
+        :return: filename
+        """
+        self.render(d, write_to=filename)
+        return filename
+
+    def close(self):
+        for surface in self.surfaces.values():
+            surface.finish()
+        self.surfaces.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_sessions = threading.local() # each thread's, from get_session
+
+
+def get_session():
+    """
+    The RasterSession for this thread, opened the first time it's needed. Each worker of a process pool
+    gets its own, and keeps it for every flag it's given:
+
+        with concurrent.futures.ProcessPoolExecutor() as pool:
+            pool.map(save_svg_as_png, svgs, filenames)
+    """
+    if not hasattr(_sessions, 'session'):
+        _sessions.session = RasterSession()
+    return _sessions.session
+
+
+def save_svg_as_png(svg, filename, width=None, height=None):
+    """
+    Save an SVG as a PNG with this thread's session (see get_session)
+    :param svg: SVG as a string, e.g. from d.as_svg(), since drawings themselves can't always be pickled
+    :return: filename
+    """
+    get_session().render_svg(svg, width, height, write_to=filename)
+    return filename
+
+
+def measure_png_throughput(d, count=100, session=None):
+    """
+    How fast PNGs of a drawing can be made, in memory so the disk doesn't come into it
+    :param d: Drawing object, e.g. a 500x300 flag
+    :param count: how many PNGs to make
+    :param session: RasterSession to make them with, or None to make them the way d.rasterize does
+    :return: flags per second
+    """
+    start = time.perf_counter()
+    for _ in range(count):
+        if session is None:
+            d.rasterize()
+        else:
+            session.render(d)
+    return count / (time.perf_counter() - start)
+
+
+def save_pngs(d, filename, scales=RETINA_SCALES, widths=(), tile_size=None, workers=None, session=None, sink=None,
+              palette_colours=None, exact_only=True):
+    """
+    Save PNGs of a drawing at several sizes, parsing it only once
+    :param d: Drawing object
+    :param filename: name of the 1x PNG, e.g. 'output/png/rainbow.png'. The others are named after their sizes,
+    e.g. rainbow@2x.png and rainbow_3000px.png
+    :param scales: see get_png_sizes
+    :param widths: see get_png_sizes
+    :param tile_size: if given, sizes bigger than this many pixels either way are drawn a tile at a time
+    (see save_tiled_png), so they never have to fit in memory all at once
+    :param workers: see save_tiled_png
+    :param session: RasterSession to draw them with, or None for a new surface each time
+    :param sink: where to write them (see flag_output.py), or None to write them straight to disk
+    :param palette_colours: if given, the PNGs (except tiled ones) are written as palette PNGs where that's smaller,
+    with these as the colours they were drawn with (see index_png_data)
+    :param exact_only: see index_png_data
+    :return: list of the file names saved
+    """
+    stem = filename[:-len('.png')] if filename.lower().endswith('.png') else filename
+    tree = None
+    saved_to = []
+    for suffix, width, height in get_png_sizes(d, scales, widths):
+        name = stem + suffix + '.png'
+        if tile_size and max(width, height) > tile_size:
+            save_tiled_png(d, name, width, height, tile_size, workers, sink=sink)
+            saved_to.append(name)
+            continue
+        if tree is None:
+            tree = parse_drawing(d)
+        # drawn straight to the file, unless it has somewhere else to go first
+        write_to = name if sink is None and palette_colours is None else None
+        render = render_png if session is None else session.render_tree
+        png = render(tree, width, height, write_to=write_to)
+        if palette_colours is not None:
+            png, info = index_png_data(png, palette_colours, exact_only)
+        if sink is not None:
+            sink.write(name, png)
+        elif write_to is None:
+            with open(name, 'wb') as f:
+                f.write(png)
+        saved_to.append(name)
+    return saved_to
+
+
+def get_drawing_colours(d):
+    """
+    The solid colours a drawing's elements (and gradients) are filled or stroked with
+    :param d: Drawing object
+    :return: set of (red, green, blue) from 0 to 255
+    >>> d = draw.Drawing(500, 300)
+    >>> bh = draw_horiz_bars(d, ['#ff0000', 'white'])
+    >>> sorted(get_drawing_colours(d))
+    [(255, 0, 0), (255, 255, 255)]
+    """
+    colours = set()
+
+    def visit(element):
+        for name in ['fill', 'stroke', 'stop-color']:
+            value = element.args.get(name) if hasattr(element, 'args') else None
+            if isinstance(value, str) and value.strip().lower() not in ['none', 'transparent', ''] \
+                    and not value.startswith('url('):
+                try:
+                    colours.add(tuple(round(c * 255) for c in colour_to_rgb(value.strip())))
+                except ValueError:
+                    pass
+            elif isinstance(value, draw.DrawingElement):
+                visit(value)
+        for child in getattr(element, 'children', []):
+            if isinstance(child, draw.DrawingElement):
+                visit(child)
+
+    for element in d.elements + d.other_defs:
+        visit(element)
+    return colours
+
+
+def quantise_to_palette(pixels, colours=()):
+    """
+    Find a palette for an image and which entry each pixel uses. If it has more than MAX_PALETTE colours
+    (from anti-aliasing), the colours it was drawn with are kept exactly, then the commonest of the rest,
+    and the other pixels use whichever of those is nearest.
+    :param pixels: array of height x width x RGBA, as uint8
+    :param colours: the colours the image was drawn with, as (red, green, blue), e.g. from get_drawing_colours
+    :return: palette (n x RGBA array, translucent colours first), indices (height x width array),
+    and whether every pixel is exactly its palette colour
+    """
+    height, width = pixels.shape[:2]
+    packed = np.ascontiguousarray(pixels, dtype=np.uint8).view(np.uint32).ravel()
+    unique, inverse, counts = np.unique(packed, return_inverse=True, return_counts=True)
+    rgba = unique.view(np.uint8).reshape(-1, 4)
+    exact = len(unique) <= MAX_PALETTE
+    if exact:
+        chosen = np.arange(len(unique))
+    else:
+        drawn = np.array([tuple(c) + (255,) for c in colours], dtype=np.uint8).reshape(-1, 4)
+        is_drawn = np.isin(unique, np.ascontiguousarray(drawn).view(np.uint32).ravel())
+        chosen = np.lexsort((-counts, ~is_drawn))[:MAX_PALETTE]
+    # translucent colours first, so the tRNS chunk can stop at the last of them
+    chosen = chosen[np.argsort(rgba[chosen, 3] == 255, kind='stable')]
+    palette = rgba[chosen]
+    if exact:
+        mapping = np.empty(len(unique), dtype=np.uint8)
+        mapping[chosen] = np.arange(len(chosen))
+    else:
+        mapping = np.empty(len(unique), dtype=np.uint8)
+        palette_values = palette.astype(np.int32)
+        for start in range(0, len(unique), 4096):
+            block = rgba[start:start + 4096].astype(np.int32)
+            distances = ((block[:, None, :] - palette_values[None, :, :])**2).sum(axis=2)
+            mapping[start:start + 4096] = distances.argmin(axis=1)
+    return palette, mapping[inverse.ravel()].reshape(height, width), exact
+
+
+def get_bit_depth(palette_size):
+    """
+    :return: the fewest bits per pixel a PNG can use for a palette of this many colours
+    >>> [get_bit_depth(n) for n in [2, 3, 16, 17, 256]]
+    [1, 2, 4, 8, 8]
+    """
+    for bit_depth in [1, 2, 4]:
+        if palette_size <= 2**bit_depth:
+            return bit_depth
+    return 8
+
+
+def pack_rows(indices, bit_depth):
+    """
+    Pack palette indices into bytes, several to a byte for bit depths under 8
+    :param indices: height x width array
+    :return: height x bytes-per-row array of uint8
+    >>> pack_rows(np.array([[1, 0, 1]]), 1).tolist(), pack_rows(np.array([[3, 2, 1, 0, 1]]), 2).tolist()
+    ([[160]], [[228, 64]])
+    """
+    indices = np.asarray(indices, dtype=np.uint8)
+    if bit_depth == 8:
+        return indices
+    per_byte = 8 // bit_depth
+    padded = np.pad(indices, ((0, 0), (0, -indices.shape[1] % per_byte)))
+    groups = padded.reshape(indices.shape[0], -1, per_byte)
+    shifts = (np.arange(per_byte)[::-1] * bit_depth).astype(np.uint8)
+    return (groups << shifts).sum(axis=2, dtype=np.uint8)
+
+
+def filter_rows(rows, png_filter, bytes_per_pixel=1, previous=None):
+    """
+    Apply a PNG filter to every row
+    :param rows: height x bytes-per-row array of uint8
+    :param png_filter: one of PNG_FILTERS, or ADAPTIVE
+    :param bytes_per_pixel: 1 for palette images, 4 for RGBA
+    :param previous: the row above the first one, if these rows carry on from others
+    :return: the filtered data, with each row's filter type in front of it, as bytes
+    >>> filter_rows(np.array([[1, 2, 4], [1, 2, 4]], dtype=np.uint8), 'sub')
+    b'\\x01\\x01\\x01\\x02\\x01\\x01\\x01\\x02'
+    >>> filter_rows(np.array([[1, 2, 4]], dtype=np.uint8), 'up', previous=np.array([1, 2, 4], dtype=np.uint8))
+    b'\\x02\\x00\\x00\\x00'
+    """
+    raw = rows.astype(np.int16)
+    above = np.zeros_like(raw[:1]) if previous is None else np.asarray(previous, dtype=np.int16).reshape(1, -1)
+    left = np.zeros_like(raw)
+    left[:, bytes_per_pixel:] = raw[:, :-bytes_per_pixel]
+    up = np.concatenate((above, raw[:-1]))
+    up_left = np.zeros_like(raw)
+    up_left[:, bytes_per_pixel:] = up[:, :-bytes_per_pixel]
+    estimate = left + up - up_left
+    distance_left, distance_up, distance_up_left = abs(estimate - left), abs(estimate - up), abs(estimate - up_left)
+    paeth = np.where((distance_left <= distance_up) & (distance_left <= distance_up_left), left,
+                     np.where(distance_up <= distance_up_left, up, up_left))
+    filtered = np.stack([raw, raw - left, raw - up, raw - (left + up)//2, raw - paeth]) % 256
+    if png_filter == ADAPTIVE:
+        # the usual heuristic: the filter whose bytes, as signed numbers, are smallest
+        cost = abs(filtered.astype(np.uint8).view(np.int8).astype(np.int32)).sum(axis=2)
+        types = cost.argmin(axis=0)
+    else:
+        types = np.full(len(rows), PNG_FILTERS.index(png_filter))
+    chosen = filtered[types, np.arange(len(rows))].astype(np.uint8)
+    return np.column_stack((types.astype(np.uint8), chosen)).tobytes()
+
+
+def png_chunk(kind, data):
+    """
+    :return: a PNG chunk, with its length and checksum
+    """
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+def encode_indexed_png(pixels, colours=()):
+    """
+    Write an image as a palette PNG, trying each PNG filter and then a few zlib settings and keeping the smallest
+    :param pixels: array of height x width x RGBA, as uint8
+    :param colours: the colours it was drawn with (see quantise_to_palette)
+    :return: PNG as bytes, and a dictionary of how it was encoded
+    """
+    palette, indices, exact = quantise_to_palette(pixels, colours)
+    bit_depth = get_bit_depth(len(palette))
+    rows = pack_rows(indices, bit_depth)
+    best = None
+    for png_filter in PNG_FILTERS + [ADAPTIVE]:
+        data = filter_rows(rows, png_filter)
+        compressed = zlib.compress(data, 9)
+        if best is None or len(compressed) < len(best[0]):
+            best = (compressed, data, png_filter, COMPRESSION_SETTINGS[0])
+    compressed, data, png_filter, setting = best
+    for level, strategy in COMPRESSION_SETTINGS[1:]:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 15, 9, strategy)
+        attempt = compressor.compress(data) + compressor.flush()
+        if len(attempt) < len(compressed):
+            compressed, setting = attempt, (level, strategy)
+
+    height, width = indices.shape
+    chunks = [png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, bit_depth, 3, 0, 0, 0)),
+              png_chunk(b'PLTE', palette[:, :3].tobytes())]
+    translucent = int((palette[:, 3] < 255).sum())
+    if translucent:
+        chunks.append(png_chunk(b'tRNS', palette[:translucent, 3].tobytes()))
+    chunks += [png_chunk(b'IDAT', compressed), png_chunk(b'IEND', b'')]
+    info = {'colours': len(palette), 'bit_depth': bit_depth, 'exact': exact, 'filter': png_filter,
+            'level': setting[0], 'strategy': setting[1]}
+    return PNG_SIGNATURE + b''.join(chunks), info
+
+
+def index_png_data(png, colours=(), exact_only=True):
+    """
+    Re-encode a PNG as a palette PNG (see encode_indexed_png), if that comes out smaller
+    :param png: PNG as bytes
+    :param colours: the colours it was drawn with (see quantise_to_palette)
+    :param exact_only: whether to keep the original if some pixels would have to change colour.
+    If False, a palette PNG is kept even if its anti-aliased edges are only approximately the same colours
+    :return: whichever PNG is smaller, as bytes, and a dictionary of the encoding and the sizes before and after
+    >>> pixels = np.zeros((30, 50, 4), dtype=np.uint8)
+    >>> original, info = encode_indexed_png(pixels)
+    >>> index_png_data(original)[0] == original
+    True
+    """
+    from PIL import Image # comes with cairosvg, which makes the PNGs in the first place
+    with Image.open(io.BytesIO(png)) as image:
+        pixels = np.asarray(image.convert('RGBA'))
+    indexed, info = encode_indexed_png(pixels, colours)
+    info.update({'original_bytes': len(png), 'bytes': len(indexed)})
+    if len(indexed) >= len(png) or (exact_only and not info['exact']):
+        info['bytes'] = len(png)
+        return png, info
+    return indexed, info
+
+
+def index_png(filename, colours=(), write_to=None, exact_only=True):
+    """
+    Re-encode a PNG file as a palette PNG (see index_png_data), if that comes out smaller
+    :param filename: PNG file to read
+    :param colours: the colours it was drawn with (see quantise_to_palette)
+    :param write_to: where to save it (e.g. filename, to replace the original), or None to only work out its size
+    :param exact_only: whether to keep the original if some pixels would have to change colour
+    :return: dictionary of the encoding and the file sizes before and after
+    """
+    with open(filename, 'rb') as f:
+        original = f.read()
+    png, info = index_png_data(original, colours, exact_only)
+    info['filename'] = filename
+    if write_to is not None and png is not original:
+        with open(write_to, 'wb') as f:
+            f.write(png)
+    return info
+
+
+def index_pngs_in_folder(folder, save=False, exact_only=True):
+    """
+    Work out how much smaller every PNG in a folder would be as a palette PNG
+    :param folder: e.g. 'output/examples/png/'
+    :param save: whether to overwrite the PNGs with their palette versions
+    :param exact_only: see index_png
+    :return: list of dictionaries, from index_png
+    """
+    return [index_png(os.path.join(folder, name), write_to=os.path.join(folder, name) if save else None,
+                      exact_only=exact_only)
+            for name in sorted(os.listdir(folder)) if name.lower().endswith('.png')]
+
+
+def format_index_report(reports):
+    """
+    :param reports: list of dictionaries from index_png
+    :return: a line saying how much smaller the PNGs are altogether
+    >>> format_index_report([{'original_bytes': 1000, 'bytes': 250, 'exact': True},
+    ...                      {'original_bytes': 3000, 'bytes': 1750, 'exact': False}])
+    '2 PNGs: 4000 -> 2000 bytes (50% smaller), 1 with every pixel exact'
+    """
+    original = sum(r['original_bytes'] for r in reports)
+    total = sum(r['bytes'] for r in reports)
+    return (f'{len(reports)} PNGs: {original} -> {total} bytes ({1 - total / original:.0%} smaller), '
+            f'{sum(r["exact"] for r in reports)} with every pixel exact')
+
+
+
+##################################################
+## Tiled PNGs
+##################################################
+
+def get_drawn_box(element):
+    """
+    :param element: drawsvg element
+    :return: (x_min, y_min, x_max, y_max) box, in the drawing's coordinates, that everything the element paints
+    lies within, or None if we can't tell
+    >>> get_drawn_box(draw.Rectangle(0, 0, 10, 20, fill='red', transform='translate(100, 0)'))
+    (100.0, 0.0, 110.0, 20.0)
+    >>> get_drawn_box(draw.Rectangle(0, 0, 10, 20, fill='red', filter='url(#blur)')) is None
+    True
+    """
+    if not isinstance(element, draw.DrawingElement) or 'filter' in element.args:
+        return None # filters can paint outside the element, e.g. blurs and drop shadows
+    bounds = paint_bounds(element)
+    matrix = parse_transform(element.args.get('transform'))
+    if bounds is None or matrix is None:
+        return None
+    return polygon_box(apply_transform(matrix, bounds))
+
+
+def crop_drawing(d, box, width, height):
+    """
+    A copy of a drawing showing only part of it, with the elements that are drawn entirely outside that part left out
+    :param d: Drawing object. Not altered; the copy shares its elements
+    :param box: (x_min, y_min, x_max, y_max) of the part to show, in the drawing's coordinates
+    :param width: width of the copy in pixels
+    :param height: height of the copy in pixels
+    :return: Drawing object
+    >>> d = draw.Drawing(500, 300)
+    >>> bh = draw_horiz_bars(d, RAINBOW)
+    >>> tile = crop_drawing(d, (0, 0, 250, 100), 500, 200)
+    >>> tile.view_box, len(tile.elements), len(d.elements)
+    ((0, 0, 250, 100), 2, 6)
+    """
+    referenced = referenced_elements(d)
+
+    def is_in_tile(element):
+        drawn = get_drawn_box(element)
+        return drawn is None or id(element) in referenced or boxes_overlap(drawn, box)
+
+    tile = copy.copy(d)
+    tile.view_box = (box[0], box[1], box[2] - box[0], box[3] - box[1])
+    tile.width, tile.height = tile.view_box[2:]
+    tile.set_render_size(width, height)
+    # the tiles are scaled separately, so stretch them to exactly their pixels rather than letterboxing them
+    tile.svg_args = dict(d.svg_args, preserveAspectRatio='none')
+    tile.elements = [element for element in d.elements if is_in_tile(element)]
+    tile.ordered_elements = defaultdict(list, {z: [element for element in elements if is_in_tile(element)]
+                                               for z, elements in d.ordered_elements.items()})
+    tile._cached_context = tile._cached_extra_prepost_with_context = None
+    return tile
+
+
+def get_tiles(d, width, height, tile_size=TILE_SIZE):
+    """
+    Split a drawing into rows of tiles
+    :param d: Drawing object
+    :param width: width of the whole PNG in pixels
+    :param height: height of the whole PNG in pixels
+    :param tile_size: most pixels each way in a tile
+    :return: iterator of rows from the top down, each a list of (SVG of the tile, its width, its height)
+    from left to right
+    >>> rows = get_tiles(draw.Drawing(500, 300), 2500, 1500, 1024)
+    >>> [[(w, h) for svg, w, h in row] for row in rows]
+    [[(1024, 1024), (1024, 1024), (452, 1024)], [(1024, 476), (1024, 476), (452, 476)]]
+    """
+    x, y, view_width, view_height = d.view_box
+    x_scale, y_scale = view_width / width, view_height / height
+    for top in range(0, height, tile_size):
+        bottom = min(top + tile_size, height)
+        row = []
+        for left in range(0, width, tile_size):
+            right = min(left + tile_size, width)
+            box = (x + left*x_scale, y + top*y_scale, x + right*x_scale, y + bottom*y_scale)
+            row.append((crop_drawing(d, box, right - left, bottom - top).as_svg(), right - left, bottom - top))
+        yield row
+
+
+def render_tile(svg, width, height):
+    """
+    :param svg: SVG of a tile, from get_tiles
+    :param width: width in pixels
+    :param height: height in pixels
+    :return: array of height x width x RGBA, as uint8
+    """
+    import cairosvg
+    from PIL import Image # comes with cairosvg
+    png = cairosvg.svg2png(bytestring=svg.encode('utf-8'), output_width=width, output_height=height)
+    with Image.open(io.BytesIO(png)) as image:
+        return np.asarray(image.convert('RGBA'))
+
+
+def write_png_rows(output, width, height, strips, level=STREAM_COMPRESSION):
+    """
+    Write an RGBA PNG a strip of rows at a time, so that only one strip has to be in memory
+    :param output: open binary file
+    :param width: width in pixels
+    :param height: height in pixels
+    :param strips: iterable of arrays of rows x width x RGBA, as uint8, from the top down
+    :param level: zlib compression level
+    >>> output = io.BytesIO()
+    >>> strips = [np.full((2, 3, 4), 255, dtype=np.uint8), np.zeros((1, 3, 4), dtype=np.uint8)]
+    >>> write_png_rows(output, 3, 3, strips)
+    >>> from PIL import Image
+    >>> np.asarray(Image.open(output))[:, 0].tolist()
+    [[255, 255, 255, 255], [255, 255, 255, 255], [0, 0, 0, 0]]
+    """
+    compressor = zlib.compressobj(level)
+    output.write(PNG_SIGNATURE + png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)))
+    previous = None
+    rows_written = 0
+    for strip in strips:
+        rows = np.ascontiguousarray(strip, dtype=np.uint8).reshape(len(strip), width*4)
+        for start in range(0, len(rows), FILTER_ROWS):
+            chunk = rows[start:start + FILTER_ROWS]
+            data = compressor.compress(filter_rows(chunk, ADAPTIVE, bytes_per_pixel=4, previous=previous))
+            if data:
+                output.write(png_chunk(b'IDAT', data))
+            previous = chunk[-1]
+        rows_written += len(rows)
+    assert rows_written == height, f'{rows_written} rows were written out of {height}'
+    output.write(png_chunk(b'IDAT', compressor.flush()) + png_chunk(b'IEND', b''))
+
+
+class ReplacingFile:
+    """
+    A file that's written under another name and renamed to its own once it's closed, so that it replaces
+    whatever was there (including a hard link to another file) rather than writing into it, and is never
+    left half-written. If there's an exception in its with block, it's deleted instead
+    >>> import tempfile; folder = tempfile.mkdtemp()
+    >>> with ReplacingFile(os.path.join(folder, 'test.txt')) as f:
+    ...     n = f.write(b'hello')
+    >>> os.listdir(folder)
+    ['test.txt']
+    >>> import shutil; shutil.rmtree(folder)
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.temporary = f'{filename}.{os.getpid()}.{threading.get_ident()}.tmp'
+        self.file = open(self.temporary, 'wb')
+
+    def write(self, data):
+        return self.file.write(data)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+            os.replace(self.temporary, self.filename)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+            os.remove(self.temporary)
+
+
+def save_tiled_png(d, filename, width, height=None, tile_size=TILE_SIZE, workers=None, sink=None):
+    """
+    Save a big PNG (e.g. a 20000px banner for printing) a tile at a time. Each tile only has the elements
+    that are drawn on it, and its rows go into the PNG as soon as the tiles beside it are done, so memory
+    is bounded by a row of tiles rather than the whole image.
+    :param d: Drawing object
+    :param filename: where to save it
+    :param width: width in pixels
+    :param height: height in pixels, or None to work it out from the drawing's shape
+    :param tile_size: most pixels each way in a tile
+    :param workers: how many processes to draw the tiles in, or None to draw them one at a time in this one
+    :param sink: where to write it (see flag_output.py), or None to write it straight to disk
+    :return: filename
+    """
+    if height is None:
+        height = round(d.view_box[3] * width / d.view_box[2])
+    executor = concurrent.futures.ProcessPoolExecutor(workers) if workers else None
+
+    def strips():
+        for row in get_tiles(d, width, height, tile_size):
+            if executor is None:
+                tiles = [render_tile(*tile) for tile in row]
+            else:
+                tiles = list(executor.map(render_tile, *zip(*row)))
+            yield np.concatenate(tiles, axis=1)
+
+    try:
+        with ReplacingFile(filename) if sink is None else sink.open(filename) as output:
+            write_png_rows(output, width, height, strips())
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return filename
+
+
+if __name__ == '__main__':
+    doctest.testmod()
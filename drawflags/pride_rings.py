@@ -38,6 +38,7 @@ def inner_right_of_ring(hei):
 # Functions for draw rings in the style of the Carpenter intersex flag
 ##########################################################
 
+@register_shape
 def draw_transparent_ring(d, colour_of_ring, fill_colour='none',
                       wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                       size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -84,6 +85,7 @@ def fill_outside_the_ring(d, fill_colour, border_width, wid=UNSPECIFIED, hei=UNS
                          fill=fill_colour, stroke_width=width_of_ring, stroke=fill_colour, opacity=opac,
                          fill_opacity=0))
 
+@register_shape
 def draw_border_ring(d, border_colour, border_width, fill_colour='none',
                      wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                      size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -106,6 +108,7 @@ def draw_border_ring(d, border_colour, border_width, fill_colour='none',
         fill=fill_colour, stroke_width=width_of_ring, stroke=border_colour, fill_opacity=opac))
 
 
+@register_shape
 def draw_inset_into_intersex(d, stripes, outer_colour, ring_colour,
                              wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                              size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -149,6 +152,7 @@ def draw_inset_into_intersex(d, stripes, outer_colour, ring_colour,
     return stp_h
 
 
+@register_shape
 def draw_segmented_ring(d, colours, fill_colour = 'none', border_fill='none',
                         wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                         size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -195,6 +199,7 @@ def draw_segmented_ring(d, colours, fill_colour = 'none', border_fill='none',
         d.append(ring)
 
 
+@register_shape
 def draw_ring(d, wid, hei, radius, thickness, ring_colour, fill_colour , opacity = 0):
     '''Helper function for intersex flag mashups
     image dimensions: wid x hei (int x int)
@@ -212,6 +217,7 @@ def draw_ring(d, wid, hei, radius, thickness, ring_colour, fill_colour , opacity
 
 
 
+@register_shape
 def draw_concentric_rings(d, colours, border_colour='none', inner_colour='none',
                           wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                           size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -252,6 +258,7 @@ def draw_concentric_rings(d, colours, border_colour='none', inner_colour='none',
     draw_ring(d, wid, hei, radius + (i + 1) * thickness - (thickness / 2), thick_ratio, border_colour, 'none')
 
 
+@register_shape
 def draw_bullseye(d, colours,
                   wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                   size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -286,6 +293,7 @@ def draw_bullseye(d, colours,
     draw_ring(d, wid, hei, math.ceil(radius), thickness + fudge, colours[0], 'none')
 
 
+@register_shape
 def draw_inner_bullseye(d, colours,
                         wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                         size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -4,10 +4,11 @@ Draw shapes that are neither lines nor rings.
 draw_square is unlike the others in this file
 
 """
-import drawsvg
+import functools
 
 from multicolour_shapes import *
 
+@register_shape
 def draw_text(d, text_to_add, primary_colour, secondary_colour='none', name='ch',
               wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
               size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -37,6 +38,7 @@ def draw_text(d, text_to_add, primary_colour, secondary_colour='none', name='ch'
                        text_anchor='middle', dominant_baseline='middle', font_family='Times New Roman'))  # 8pt text at (-10, -35)
 
 
+@register_shape
 def draw_side_bump(d, primary_colour, secondary_colour='none',
                    wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                    size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -73,6 +75,7 @@ def draw_side_bump(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_pile(d, primary_colour, secondary_colour='none',
               wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
               size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -108,6 +111,7 @@ def draw_pile(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_pall(d, primary_colour, secondary_colour='none',
               wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
               size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -157,6 +161,7 @@ def draw_pall(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_attraction_arrow(d, primary_colour, secondary_colour='none',
                           wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                           size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -194,6 +199,7 @@ def draw_attraction_arrow(d, primary_colour, secondary_colour='none',
     draw_heart(d, primary_colour, wid=wid/3, size_ratio=0.5, y_start=-arrow_hei, x_start=wid/3)
 
 
+@register_shape
 def draw_corners(d, primary_colour, secondary_colour='none',
                  wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                  size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -230,6 +236,7 @@ def draw_corners(d, primary_colour, secondary_colour='none',
 
 
 
+@register_shape
 def draw_topbottom(d, primary_colour, secondary_colour='none',
                    wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                    size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -265,6 +272,7 @@ def draw_topbottom(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_perisex(d, primary_colour, secondary_colour='none',
                  wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                  size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -322,6 +330,7 @@ def draw_perisex(d, primary_colour, secondary_colour='none',
     d.append(draw.Line(wid / 2, h, wid / 2, h - hangar, stroke=primary_colour, stroke_width=sw, stroke_linecap='round'))
 
 
+@register_shape
 def draw_rhombus(d, primary_colour, secondary_colour='none',
                  wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                  size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -358,6 +367,7 @@ def draw_rhombus(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_hemirhombus(d, primary_colour, secondary_colour='none',
                      wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                      size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -399,6 +409,7 @@ def draw_hemirhombus(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_square(d, primary_colour, secondary_colour='none',
                 wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                 size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -432,6 +443,7 @@ def draw_square(d, primary_colour, secondary_colour='none',
     return radius + sw
 
 
+@register_shape
 def draw_diagonal_cut_square(d, primary_colour, secondary_colour='none',
                              wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                              size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -486,6 +498,7 @@ def draw_diagonal_cut_square(d, primary_colour, secondary_colour='none',
         d.append(pr)
 
 
+@register_shape
 def draw_bissu(d, primary_colour, secondary_colour='none',
                wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -510,6 +523,7 @@ def draw_bissu(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_altersex_symbol(d, primary_colour, secondary_colour='none',
                          wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                          size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -563,6 +577,7 @@ def draw_altersex_symbol(d, primary_colour, secondary_colour='none',
     d.append(draw.Circle(x_mid, y_coord, radius, fill='none', stroke=secondary_colour, stroke_width=sw))
 
 
+@register_shape
 def draw_cross(d, primary_colour, secondary_colour='none',
                wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -597,6 +612,7 @@ def draw_cross(d, primary_colour, secondary_colour='none',
         draw.Rectangle(midx - line_width / 2, midy - (thickness*0.5), line_width, thickness, fill=primary_colour))
 
 
+@register_shape
 def draw_metis_lemniscate(d, primary_colour, secondary_colour='none',
                           wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                           size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -640,6 +656,7 @@ def draw_metis_lemniscate(d, primary_colour, secondary_colour='none',
 
 
 
+@register_shape
 def draw_chonky_infinity(d, primary_colour, secondary_colour='none',
                          wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                          size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -674,6 +691,7 @@ def draw_chonky_infinity(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_closet_symbol(d, primary_colour, secondary_colour='none',
                        wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                        size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -762,6 +780,7 @@ def rubber_helper(line_hei, sw, topln_start_y, topln_start_x, topln_descend_hypo
     return midln_start_x, midln_start_y, midln_descend_x, midln_descend_y, midln_ascend_x, midln_descend_hypot
 
 
+@register_shape
 def draw_rubber_zigzags(d, primary_colour, secondary_colour='none',
                         wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                         size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -828,6 +847,7 @@ def draw_rubber_zigzags(d, primary_colour, secondary_colour='none',
     return line_hei
 
 
+@register_shape
 def draw_refugeeline(d, primary_colour, secondary_colour='none',
                      wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                      size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -854,6 +874,7 @@ def draw_refugeeline(d, primary_colour, secondary_colour='none',
     return top_of_line
 
 
+@register_shape
 def draw_intersex_ally(d, primary_colour, secondary_colour='none',
                        wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                        size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -902,6 +923,7 @@ def draw_intersex_ally(d, primary_colour, secondary_colour='none',
 
 
 
+@register_shape
 def draw_circle(d, primary_colour, secondary_colour='none',
                 wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                 size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -929,6 +951,7 @@ def draw_circle(d, primary_colour, secondary_colour='none',
     return radius
 
 
+@register_shape
 def draw_ellipse(d, primary_colour, secondary_colour='none',
                  wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                  size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -959,6 +982,7 @@ def draw_ellipse(d, primary_colour, secondary_colour='none',
 
 
 
+@register_shape
 def draw_inverted_triangle(d, primary_colour, secondary_colour='none',
                            wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                            size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -998,6 +1022,7 @@ def draw_inverted_triangle(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_triangle(d, primary_colour, secondary_colour='none',
                   wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                   size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1045,6 +1070,7 @@ def draw_triangle(d, primary_colour, secondary_colour='none',
 
 
 
+@register_shape
 def draw_asympile(d, primary_colour, secondary_colour='none',
                   wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                   size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1085,6 +1111,7 @@ def draw_asympile(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_equals(d, primary_colour, secondary_colour='none',
                 wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                 size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1126,6 +1153,14 @@ def draw_equals(d, primary_colour, secondary_colour='none',
     return line_hei
 
 
+# the lightning bolt of the bipolar symbol, traced in a 291.20126 by 145.60063 area
+BIPOLAR_BOLT = add_path_template('bipolar_bolt', 'M 143,114 C 143,114 143,113 143,112 C 143,100 136,84 118,47 '
+                                                 'C 115,42 113,37 113,37 C 113,37 121,37 130,37 H 148 L 155,52 '
+                                                 'C 173,87 178,100 178,113 L 178,114 H 160 C 145,114 143,114 143,114 Z',
+                                 291.20126, 145.60063)
+
+
+@register_shape
 def draw_bipolar(d, primary_colour, secondary_colour='none',
                  wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                  size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1169,68 +1204,13 @@ def draw_bipolar(d, primary_colour, secondary_colour='none',
     d.append(draw.Circle(rightside, top, rad, fill=primary_colour))
     d.append(draw.Circle(rightside, bottom, rad, fill=primary_colour))
 
-    w = wid/291.20126
-    h = hei/291.20126*2
-
-    x_start -= 5*w
-    y_start -= 37.162864*h + 4*h
-    # x coordinates
-    x1 = x_start + 143.0 * w
-    x6 = x_start + 136.0 * w
-    x7 = x_start + 118.0 * w
-    x8 = x_start + 115.0 * w
-    x9 = x_start + 113.0 * w
-    x12 = x_start + 121.0 * w
-    x13 = x_start + 130.0 * w
-    x14 = x_start + 148.0 * w
-    x15 = x_start + 155.0 * w
-    x16 = x_start + 173.0 * w
-    x17 = x_start + 178.0 * w
-    x20 = x_start + 160.0 * w
-    x21 = x_start + 145.0 * w
-    # y coordinates
-    y1 = y_start + 114.0 * h
-    y3 = y_start + 113.0 * h
-    y4 = y_start + 112.0 * h
-    y5 = y_start + 100.0 * h
-    y6 = y_start + 84.0 * h
-    y7 = y_start + 47.0 * h
-    y8 = y_start + 42.0 * h
-    y9 = y_start + 37.0 * h
-    y14 = y_start + 52.0 * h
-    y15 = y_start + 87.0 * h
-
-    p = draw.Path(fill=primary_colour)
-    p.M(x1, y1)
-    p.C(x1, y1, x1, y3, x1, y4)
-    p.C(x1, y5, x6, y6, x7, y7)
-    p.C(x8, y8, x9, y9, x9, y9)
-    p.C(x9, y9, x12, y9, x13, y9)
-    p.H(x14)
-    p.L(x15, y14)
-    p.C(x16, y15, x17, y5, x17, y3)
-    p.L(x17, y1)
-    p.H(x20)
-    p.C(x21, y1, x1, y1, x1, y1)
-    p.Z()
-    d.append(p)
-
-    p = draw.Path(fill=primary_colour, transform=f'translate(0, {2*midy}) scale(1,-1)')
-    p.M(x1, y1)
-    p.C(x1, y1, x1, y3, x1, y4)
-    p.C(x1, y5, x6, y6, x7, y7)
-    p.C(x8, y8, x9, y9, x9, y9)
-    p.C(x9, y9, x12, y9, x13, y9)
-    p.H(x14)
-    p.L(x15, y14)
-    p.C(x16, y15, x17, y5, x17, y3)
-    p.L(x17, y1)
-    p.H(x20)
-    p.C(x21, y1, x1, y1, x1, y1)
-    p.Z()
-    d.append(p)
+    # the lightning bolt, and its reflection in the middle
+    path_data = place_path_template(BIPOLAR_BOLT, wid, hei, x_start - 5*wid/291.20126, y_start - 41.162864*hei/145.60063)
+    d.append(draw.Path(path_data, fill=primary_colour))
+    d.append(draw.Path(path_data, fill=primary_colour, transform=f'translate(0, {2*midy}) scale(1,-1)'))
 
 
+@register_shape
 def draw_belt(d, primary_colour, secondary_colour='none',
               wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
               size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1255,6 +1235,7 @@ def draw_belt(d, primary_colour, secondary_colour='none',
     return belt_thickness
 
 
+@register_shape
 def draw_utrinque(d, primary_colour, secondary_colour='none',
                   wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                   size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1290,6 +1271,7 @@ def draw_utrinque(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_diamond(d, primary_colour, secondary_colour='none',
                  wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                  size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1331,6 +1313,7 @@ def draw_diamond(d, primary_colour, secondary_colour='none',
 
 
 
+@register_shape
 def draw_teardrop(d, primary_colour, secondary_colour='none',
                   wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                   size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1372,6 +1355,7 @@ def draw_teardrop(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_caed(d, primary_colour, secondary_colour='none',
               wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
               size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1408,6 +1392,19 @@ def draw_caed(d, primary_colour, secondary_colour='none',
     d.append(draw.Rectangle(mid_left, bottom-mid_height, each_wid, mid_height, fill=secondary_colour))
 
 
+# based on noun-infinity-7281819.svg Created by Elin Erkani, on a 110x110 grid
+# starts at the right butt and goes round the inside of the right C, crosses over to the left C,
+# comes back along the outside from the left butt, and round the outside of the right C to the start
+OPEN_LINEAR_INFINITY = add_path_template('open_linear_infinity',
+                                         'M 64,59 C 68,64 74,69 80,69 C 93,69 99,54 90,45 C 88,43 84,41 80,41 '
+                                         'C 71,41 60,55 54,62.5 C 48,69 40,77 30,77 C 11,77 1,53 14,40 '
+                                         'C 18,36 24,33 30,33 C 38,33 46,39 51,45 L 46,51 '
+                                         'C 42,46 36,41 30,41 C 17,41 11,56 20,65 C 22,67 26,69 30,69 '
+                                         'C 40,69 50,55 57,47.5 C 63,41 71,33 80,33 C 99,33 109,57 96,70 '
+                                         'C 92,74 86,77 80,77 C 72,77 64,71 59,65 L 64,59 Z', 110, 110)
+
+
+@register_shape
 def draw_open_linear_infinity(d, primary_colour, secondary_colour='none',
                               wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                               size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1430,154 +1427,63 @@ def draw_open_linear_infinity(d, primary_colour, secondary_colour='none',
     """
     wid, hei, x_mid, y_mid, x_end, y_end = get_standard_dimensions(d, wid, hei, x_start, y_start)
 
-    # based on noun-infinity-7281819.svg Created by Elin Erkani
-    w = wid/110
-    h = stretch_ratio* hei/110
-
-    # x coordinates
-    butt_width = 5*w
-    dist_bw_butts = (64-46)*w
-    x_right_inner_butt = x_mid+dist_bw_butts/2#x_start + 64.0 * w
-    x_left_inner_butt = x_mid-dist_bw_butts/2 #x_start + 46.0 * w
-    x_left_outer_butt = x_left_inner_butt + butt_width #x_start + 51.0 * w
-    x_right_outer_butt = x_right_inner_butt - butt_width # x_start + 59.0 * w
-
-    width_bw_cshapes = (80-30)*w
-    x_right_cshape_opening = x_mid + width_bw_cshapes/2 #x_start + 80.0 * w
-    x_left_cshape_opening = x_mid - width_bw_cshapes/2 #x_start + 30.0 * w
-
-    x_inner_cshape_upper = x_start + 90.0 * w
-    x_left_inner_cshape_bottom = x_start + 20.0 * w
-
-    x_right_midliner = x_start + 54.0 * w
-    x_left_midliner = x_start + 57.0 * w
-
-    x_left_cshape_outer = x_start + 14.0 * w
-    x_right_cshape_outer = x_start + 96.0 * w
-
-    # x control points
-    cx_outerwid = (109-1)*w
-    cx_leftmost = x_mid-cx_outerwid/2#x_start + 1.0 * w
-    cx_rightmost = x_mid+cx_outerwid/2#x_start + 109.0 * w
-
-    cx_cshape_inner = cx_outerwid - 20*w #(99-11)*w
-    x17 = x_mid-cx_cshape_inner/2 #x_start + 11.0 * w
-    x6 = x_mid+cx_cshape_inner/2 #x_start + 99.0 * w
-
-    x30 = x_start + 17.0 * w
-    x5 = x_start + 93.0 * w
-
-    x20 = x_start + 18.0 * w
-    x45 = x_start + 92.0 * w
-
-    x33 = x_start + 22.0 * w
-    x8 = x_start + 88.0 * w
-
-    x21 = x_start + 24.0 * w
-    x46 = x_start + 86.0 * w
-
-    x34 = x_start + 26.0 * w
-    x9 = x_start + 84.0 * w
-
-    x28 = x_start + 36.0 * w
-    cx_right_bw_butt_and_shape = x_start + 74.0 * w
-
-    x23 = x_start + 38.0 * w
-    x48 = x_start + 72.0 * w
-
-    x15 = x_start + 40.0 * w
-    x11 = x_start + 71.0 * w
-
-    cx_buttward_dist = 4*w
-    cx_left_buttward = x_left_inner_butt - cx_buttward_dist #x_start + 42.0 * w
-    cx_right_buttward = x_right_inner_butt + cx_buttward_dist #x_start + 68.0 * w
-
-    x14 = x_start + 48.0 * w
-    x39 = x_start + 63.0 * w
-
-    dist_bw_holes = butt_width*2 # (60-50)*w # 10
-    cx_left_hole_mid = x_mid - dist_bw_holes/2 # x_start + 50.0 * w
-    cx_right_hole_mid = x_mid + dist_bw_holes/2 #x_start + 60.0 * w
-
-    # y coordinates
-    inf_height = (77-33)*h # 44
-    path_height = 16*h
-    cshape_height = (70-40)*h #30
-
-    y_top = y_mid - inf_height*.5 #y_start + 33.0 * h
-    y_bottom = y_mid + inf_height*0.5 #y_start + 77.0 * h
-
-    y_outer_side_top = y_mid - cshape_height/2#y_start + 40.0 * h
-    y_outer_bottom_right = y_mid + cshape_height/2 #y_start + 70.0 * h
-
-    hole_inner_height = inf_height - path_height #(69-41)*h
-    y_top_inner_hole = y_mid - hole_inner_height/2#y_start + 41.0 * h
-    y_bottom_inner_hole = y_mid + hole_inner_height/2 #y_start + 69.0 * h
-
-    y_inner_uppish = cshape_height*(2/3) #(65-45)*h # 20
-    y_left_outer_butt = y_mid - y_inner_uppish/2#y_start + 45.0 * h
-    y_right_outer_butt = y_mid + y_inner_uppish/2 #y_start + 65.0 * h
-
-    y_butt_inner = path_height/2 #(59-51)*h # 8
-    y_butt_inner_left = y_mid - y_butt_inner/2#y_start + 51.0 * h
-    y_butt_inner_right = y_mid + y_butt_inner/2 #y_start + 59.0 * h
-
-    y_midportion = cshape_height/2 # (62-47-1)*h #15
-    y_right_midliner = y_mid + y_midportion/2#y_start + 62.0 * h
-    y_left_midliner = y_mid - y_midportion/2#y_start + 47.0 * h
+    y_scale = stretch_ratio*hei
 
-    # paired control points
-    cy_highest = (74-36)*h
-    cy_high = y_mid - 0.5*cy_highest #y_start + 36.0 * h
-    cy_low = y_mid + 0.5*cy_highest #y_start + 74.0 * h
-
-    cy1 = (71-39)*h
-    y24 = y_mid - cy1/2#y_start + 39.0 * h
-    y49 = y_mid + cy1/2 #y_start + 71.0 * h
-
-    cy2 = (67-43)*h
-    y8 = y_mid - cy2/2 # y_start + 43.0 * h
-    y33 = y_mid + cy2/2 # y_start + 67.0 * h
-
-    cy3 = (64-46)*h
-    y27 = y_mid - cy3/2 #y_start + 46.0 * h
-    y2 = y_mid + cy3/2 #y_start + 64.0 * h
+    sw = hei/100
+    p = draw.Path(place_path_template(OPEN_LINEAR_INFINITY, wid, y_scale, x_start, y_mid - y_scale/2),
+                  stroke=secondary_colour, stroke_width=sw, fill=primary_colour,
+                  transform=f'translate(0, {hei}) scale(1,-1)') #transform=f'rotate(180,{x_mid},{y_mid})')
+    d.append(p)
 
-    cy4 = (57-53)*h
-    y18 = y_mid - cy4/2 #y_start + 53.0 * h
-    y43 = y_mid + cy4/2 #y_start + 57.0 * h
 
-    cy5 = (56-54)*h
-    y6 = y_mid -cy5/2 #y_start + 54.0 * h
-    y31 = y_mid + cy5/2 #y_start + 56.0 * h
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def get_simple_infinity_template(size_ratio, stretch_ratio, thick_ratio, aspect):
+    """
+    Helper function for draw_simple_infinity, which is worked out from its ratios rather than traced.
+    :param aspect: width/height of the area it's drawn into
+    :return: PathTemplate in units of the height, centred on (0, 0)
+    """
+    sw = size_ratio*thick_ratio/8
 
-    #y_mid = y_mid # y_start + 55.0 * h
-    #y14 = y_bottom_inner_hole # y_start + 68.0 * h
+    # the size of the X area between the C and reverse C
+    cross_wid = size_ratio*aspect/6
+    x_c_left_mid = -cross_wid
+    x_c_right_mid = cross_wid
 
-    sw = hei/100
-    p = draw.Path(stroke=secondary_colour, stroke_width=sw, fill=primary_colour, transform=f'translate(0, {hei}) scale(1,-1)') #transform=f'rotate(180,{x_mid},{y_mid})')
-    p.M(x_right_inner_butt, y_butt_inner_right)
-    p.C(cx_right_buttward, y2, cx_right_bw_butt_and_shape, y_bottom_inner_hole, x_right_cshape_opening, y_bottom_inner_hole) # middish bottom right
-    p.C(x5, y_bottom_inner_hole, x6, y6, x_inner_cshape_upper, y_left_outer_butt) # right C
-    p.C(x8, y8, x9, y_top_inner_hole, x_right_cshape_opening, y_top_inner_hole) # right C
-    p.C(x11, y_top_inner_hole, cx_right_hole_mid, y_mid, x_right_midliner, y_right_midliner)
-    p.C(x14, y_bottom_inner_hole, x15, y_bottom, x_left_cshape_opening, y_bottom)
-    p.C(x17, y_bottom, cx_leftmost, y18, x_left_cshape_outer, y_outer_side_top)
-    p.C(x20, cy_high, x21, y_top, x_left_cshape_opening, y_top)
-    p.C(x23, y_top, x_left_inner_butt, y24, x_left_outer_butt, y_left_outer_butt)
-    p.L(x_left_inner_butt, y_butt_inner_left) # the other butt
-    p.C(cx_left_buttward, y27, x28, y_top_inner_hole, x_left_cshape_opening, y_top_inner_hole) # now going back around the outside
-    p.C(x30, y_top_inner_hole, x17, y31, x_left_inner_cshape_bottom, y_right_outer_butt)
-    p.C(x33, y33, x34, y_bottom_inner_hole, x_left_cshape_opening, y_bottom_inner_hole)
-    p.C(x15, y_bottom_inner_hole, cx_left_hole_mid, y_mid, x_left_midliner, y_left_midliner)
-    p.C(x39, y_top_inner_hole, x11, y_top, x_right_cshape_opening, y_top)
-    p.C(x6, y_top, cx_rightmost, y43, x_right_cshape_outer, y_outer_bottom_right)
-    p.C(x45, cy_low, x46, y_bottom, x_right_cshape_opening, y_bottom)
-    p.C(x48, y_bottom, x_right_inner_butt, y49, x_right_outer_butt, y_right_outer_butt)
-    p.L(x_right_inner_butt, y_butt_inner_right).Z()
-    d.append(p)
+    # middle rectangle
+    rect_wid = stretch_ratio*cross_wid/3
+    rect_hei = rect_wid
+    x_rect_left = -rect_wid
+    x_rect_right = rect_wid
+    y_rect_top = -rect_hei
+    y_rect_bottom = rect_hei
 
+    c_hei = size_ratio/4
+    y_c_top = -c_hei
+    y_c_bottom = c_hei
+    c_wid = cross_wid
 
+    # start at the reference rectangle
+    path_data = (f'M {x_rect_left},{y_rect_bottom} '
+                 # the left C, bottom to top
+                 f'C {x_rect_left-sw/2},{y_rect_bottom+sw/2} {(x_c_left_mid+x_rect_left)/2},{(y_rect_bottom+2*y_c_bottom)/3} '
+                 f'{x_c_left_mid},{y_c_bottom} '
+                 f'A {c_wid},{c_hei} 90 1 1 {x_c_left_mid},{y_c_top} '
+                 # the cross-over
+                 f'C {(x_c_left_mid+x_rect_left)/2},{(y_rect_top+2*y_c_top)/3} {x_rect_left-sw/2},{y_rect_top-sw/2} '
+                 f'{x_rect_left},{y_rect_top} '
+                 f'L {x_rect_right},{y_rect_bottom} '
+                 f'C {x_rect_right+sw/2},{y_rect_bottom+sw/2} {(x_c_right_mid+x_rect_right)/2},{(y_rect_bottom+2*y_c_bottom)/3} '
+                 f'{x_c_right_mid},{y_c_bottom} '
+                 # the right C, bottom to top
+                 f'A {c_wid},{c_hei} 90 1 0 {x_c_right_mid},{y_c_top} '
+                 # and the curve back to the rectangle
+                 f'C {(x_c_right_mid+x_rect_right)/2},{(y_rect_top+2*y_c_top)/3} {x_rect_right+sw/2},{y_rect_top-sw/2} '
+                 f'{x_rect_right},{y_rect_top}')
+    return make_path_template('simple_infinity', path_data)
+
+
+@register_shape
 def draw_simple_infinity(d, primary_colour, secondary_colour='none',
                          wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                          size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1601,61 +1507,12 @@ def draw_simple_infinity(d, primary_colour, secondary_colour='none',
     wid, hei, x_mid, y_mid, x_end, y_end = get_standard_dimensions(d, wid, hei, x_start, y_start)
 
     sw = size_ratio*thick_ratio*hei/8
-
-    # the size of the X area between the C and reverse C
-    cross_wid = size_ratio*wid/6
-    x_c_left_mid = x_mid - cross_wid
-    x_c_right_mid = x_mid + cross_wid
-
-    # middle rectangle
-    rect_wid = stretch_ratio*cross_wid/3
-    rect_hei = rect_wid
-    x_rect_left = x_mid - rect_wid
-    x_rect_right = x_mid + rect_wid
-    y_rect_top = y_mid - rect_hei
-    y_rect_bottom = y_mid + rect_hei
-
-    c_hei = size_ratio*hei/4
-    y_c_top = y_mid - c_hei
-    y_c_bottom = y_mid + c_hei
-
-    c_wid = cross_wid#size_ratio*wid/6
-    x_c_left_end = x_c_left_mid - c_wid
-    x_c_right_end = x_c_right_mid + c_wid
-
-    '''
-    p = draw.Path(stroke=secondary_colour, stroke_width=sw, fill='none')
-    # reference rectangle
-    p.M(x_rect_right, y_rect_top)
-    p.L(x_rect_right, y_rect_bottom)
-    p.L(x_rect_left, y_rect_bottom)
-    p.L(x_rect_left, y_rect_top)
-    p.L(x_rect_right, y_rect_top).Z()
-    d.append(p)
-    '''
-
-    p = draw.Path(stroke=primary_colour, stroke_width=sw, fill=secondary_colour)
-    # start at the reference rectangle
-    p.M(x_rect_left, y_rect_bottom)
-
-    # the left C, bottom to top
-    p.C( x_rect_left-sw/2, y_rect_bottom+sw/2, (x_c_left_mid+x_rect_left)/2, (y_rect_bottom+2*y_c_bottom)/3 , x_c_left_mid, y_c_bottom)
-    p.A(c_wid, c_hei, rot=90, large_arc=1, sweep=1, ex=x_c_left_mid, ey=y_c_top)
-
-    # the cross-over
-    p.C( (x_c_left_mid+x_rect_left)/2, (y_rect_top+2*y_c_top)/3,  x_rect_left-sw/2, y_rect_top-sw/2, x_rect_left, y_rect_top )
-    p.L(x_rect_right, y_rect_bottom)
-    p.C( x_rect_right+sw/2, y_rect_bottom+sw/2, (x_c_right_mid+x_rect_right)/2, (y_rect_bottom+2*y_c_bottom)/3 , x_c_right_mid, y_c_bottom)
-
-    # the right C, bottom to top
-    p.A(c_wid, c_hei, rot=90, large_arc=1, sweep=0, ex=x_c_right_mid, ey=y_c_top)
-
-    # and the curve back to the rectangle
-    p.C( (x_c_right_mid+x_rect_right)/2, (y_rect_top+2*y_c_top)/3, x_rect_right+sw/2, y_rect_top-sw/2, x_rect_right, y_rect_top)
-
-    d.append(p)
+    template = get_simple_infinity_template(size_ratio, stretch_ratio, thick_ratio, wid/hei)
+    d.append(draw.Path(place_path_template(template, hei, hei, x_mid, y_mid),
+                       stroke=primary_colour, stroke_width=sw, fill=secondary_colour))
 
 
+@register_shape
 def draw_attraction_stance(d, primary_colour, secondary_colour='none',
                            wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                            size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1714,6 +1571,7 @@ def draw_attraction_stance(d, primary_colour, secondary_colour='none',
     return x_ring
 
 
+@register_shape
 def draw_attraction_outline(d, primary_colour, secondary_colour='none',
                             wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                             size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1754,6 +1612,7 @@ def draw_attraction_outline(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_attraction_favourable(d, primary_colour, secondary_colour='none',
                                wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                                size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1779,6 +1638,7 @@ def draw_attraction_favourable(d, primary_colour, secondary_colour='none',
     draw_cross(d, secondary_colour, x_start=-x_ring*0.5, size_ratio=0.6, thick_ratio=1.75)
 
 
+@register_shape
 def draw_attraction_heart(d, primary_colour, secondary_colour='none',
                           wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                           size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1804,6 +1664,7 @@ def draw_attraction_heart(d, primary_colour, secondary_colour='none',
     draw_heart(d, secondary_colour, x_start=-x_ring*0.5, size_ratio=0.4, thick_ratio=1.75)
 
 
+@register_shape
 def draw_attraction_indifferent(d, primary_colour, secondary_colour='none',
                                 wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                                 size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1830,6 +1691,7 @@ def draw_attraction_indifferent(d, primary_colour, secondary_colour='none',
     return x_ring
 
 
+@register_shape
 def draw_attraction_repulsed(d, primary_colour, secondary_colour='none',
                              wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                              size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1858,6 +1720,7 @@ def draw_attraction_repulsed(d, primary_colour, secondary_colour='none',
     d.append(draw.Rectangle(x_ring-minus_wid, y_mid-sw*0.5, minus_wid*2, sw, fill=secondary_colour))
 
 
+@register_shape
 def draw_tilde(d, primary_colour, secondary_colour='none',
                wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1912,6 +1775,7 @@ def draw_tilde(d, primary_colour, secondary_colour='none',
     return tot_hei
 
 
+@register_shape
 def draw_attraction_averse(d, primary_colour, secondary_colour='none',
                            wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                            size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1938,6 +1802,7 @@ def draw_attraction_averse(d, primary_colour, secondary_colour='none',
     draw_tilde(d, secondary_colour, x_start=-x_ring * 0.5, size_ratio=0.4, thick_ratio=.5, radius_ratio=0.4)
 
 
+@register_shape
 def draw_oscillator(d, primary_colour, secondary_colour='none',
                     wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                     size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1969,6 +1834,7 @@ def draw_oscillator(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_attraction_ambivalent(d, primary_colour, secondary_colour='none',
                                wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                                size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1997,6 +1863,7 @@ def draw_attraction_ambivalent(d, primary_colour, secondary_colour='none',
     draw_tilde(d, secondary_colour, x_start=-x_ring * 0.5, size_ratio=0.4, thick_ratio=.5, stretch_ratio=0.4, y_start=y_start+height_diff)
 
 
+@register_shape
 def draw_attraction_oscillating(d, primary_colour, secondary_colour='none',
                                 wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                                 size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -2024,6 +1891,7 @@ def draw_attraction_oscillating(d, primary_colour, secondary_colour='none',
     draw_oscillator(d, secondary_colour, x_start=-x_ring * 0.5, size_ratio=0.45, thick_ratio=.4, stretch_ratio=0.35)
 
 
+@register_shape
 def draw_squircle(d, primary_colour, secondary_colour='none',
                   wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                   size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -22,10 +22,38 @@ TO IMPLEMENT
 - sideways vees for use with piles
 """
 
-import drawsvg as draw
+import importlib.util
 import math
-import doctest
-import numpy as np
+import sys
+
+
+def lazy_import(name):
+    """
+    Import a module the first time one of its attributes is used, rather than straight away.
+    drawsvg, numpy and doctest take most of the time spent importing this package,
+    and e.g. looking up which shapes there are shouldn't have to wait for them.
+    :param name: name of the module
+    :return: the module (or a stand-in that turns into it when first used)
+    >>> lazy_import('math') is math
+    True
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+draw = lazy_import('drawsvg')
+doctest = lazy_import('doctest')
+np = lazy_import('numpy')
+
+from shape_registry import *
+from path_templates import *
 
 # common orientations
 HORIZONTAL = 'H'
@@ -45,6 +73,12 @@ UNSPECIFIED = -1.0
 # for convenience in testing
 RAINBOW = ['red', 'orange', 'yellow', 'green', 'blue', 'purple']
 
+# gradient options for stripes and concentric shapes
+SMOOTH = 'smooth' # one element with a gradient between the colours, blended by the SVG renderer (in sRGB)
+OKLAB = 'oklab' # same, but blended in OKLab so the colours in between don't go muddy
+OKLAB_STEPS = 8 # stops per pair of colours used to approximate blending in OKLab
+TRANSPARENT_COLOURS = ('none', 'transparent') # become see-through gradient stops
+
 
 ##################################################
 ## Helper functions
@@ -189,8 +223,177 @@ def get_relative_sizes(lst):
     return new_colours, list(relquants)
 
 
+def colour_to_rgb(colour):
+    """
+    Turn a colour into red, green and blue between 0 and 1
+    :param colour: hex code (#rgb or #rrggbb) or colour name
+    :return: tuple of three floats
+    >>> colour_to_rgb('#ff8000')
+    (1.0, 0.5019607843137255, 0.0)
+    >>> colour_to_rgb('#fff')
+    (1.0, 1.0, 1.0)
+    """
+    if colour.startswith('#') and len(colour) in (4, 7):
+        digits = colour[1:]
+        if len(digits) == 3:
+            digits = ''.join(2*c for c in digits)
+        return tuple(int(digits[i:i+2], 16) / 255 for i in (0, 2, 4))
+    from PIL import ImageColor # only needed for colour names. Comes with cairosvg, which save_png uses anyway
+    return tuple(c / 255 for c in ImageColor.getrgb(colour)[:3])
+
+
+def rgb_to_hex(rgb):
+    """
+    :param rgb: red, green and blue between 0 and 1
+    :return: hex code
+    >>> rgb_to_hex((1.0, 0.5, 0.0))
+    '#ff8000'
+    """
+    return '#' + ''.join(f'{round(min(1, max(0, c)) * 255):02x}' for c in rgb)
+
+
+# matrices from https://bottosson.github.io/posts/oklab/
+LINEAR_RGB_TO_LMS = ((0.4122214708, 0.5363325363, 0.0514459929),
+                     (0.2119034982, 0.6806995451, 0.1073969566),
+                     (0.0883024619, 0.2817188376, 0.6299787005))
+LMS_TO_OKLAB = ((0.2104542553, 0.7936177850, -0.0040720468),
+                (1.9779984951, -2.4285922050, 0.4505937099),
+                (0.0259040371, 0.7827717662, -0.8086757660))
+
+
+def rgb_to_oklab(rgb):
+    """
+    :param rgb: red, green and blue between 0 and 1 (sRGB)
+    :return: numpy array of L, a, b
+    >>> [float(round(c, 3)) for c in rgb_to_oklab((1.0, 1.0, 1.0))]
+    [1.0, 0.0, 0.0]
+    """
+    rgb = np.array(rgb, dtype=float)
+    linear = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    return np.array(LMS_TO_OKLAB) @ np.cbrt(np.array(LINEAR_RGB_TO_LMS) @ linear)
+
+
+def oklab_to_rgb(lab):
+    """
+    :param lab: L, a, b
+    :return: tuple of red, green and blue between 0 and 1 (sRGB), clipped to the sRGB gamut
+    >>> rgb_to_hex(oklab_to_rgb(rgb_to_oklab(colour_to_rgb('#3bb07d'))))
+    '#3bb07d'
+    """
+    linear = np.linalg.solve(LINEAR_RGB_TO_LMS, np.linalg.solve(LMS_TO_OKLAB, lab) ** 3)
+    linear = np.clip(linear, 0, 1)
+    rgb = np.where(linear <= 0.0031308, linear * 12.92, 1.055 * linear ** (1 / 2.4) - 0.055)
+    return tuple(float(c) for c in rgb)
+
+
+def get_gradient_stops(colours, offsets, gradient=SMOOTH):
+    """
+    Work out the stops for a gradient through a list of colours.
+    SVG renderers blend between stops in sRGB, so for OKLab we add extra stops in between each pair of colours.
+    :param colours: list of colours
+    :param offsets: where along the gradient (from 0 to 1, increasing) each colour is at its purest
+    :param gradient: SMOOTH or OKLAB
+    :return: list of (offset, colour)
+    >>> get_gradient_stops(['red', 'blue'], [0, 1])
+    [(0, 'red'), (1, 'blue')]
+    >>> stops = get_gradient_stops(['#ff0000', '#0000ff'], [0, 1], gradient=OKLAB)
+    >>> len(stops), stops[0], stops[-1]
+    (9, (0, '#ff0000'), (1, '#0000ff'))
+    >>> stops[4]
+    (0.5, '#8c53a2')
+    >>> get_gradient_stops(['none', '#0000ff'], [0, 1], gradient=OKLAB)  # fades in, with nothing to blend in OKLab
+    [(0, 'none'), (1, '#0000ff')]
+    """
+    assert len(colours) == len(offsets), 'Need one offset for each colour'
+    if gradient != OKLAB:
+        return list(zip(offsets, colours))
+    stops = [(offsets[0], colours[0])]
+    for i in range(1, len(colours)):
+        if colours[i] != colours[i-1] and colours[i] not in TRANSPARENT_COLOURS and \
+                colours[i-1] not in TRANSPARENT_COLOURS:
+            start, end = rgb_to_oklab(colour_to_rgb(colours[i-1])), rgb_to_oklab(colour_to_rgb(colours[i]))
+            for step in range(1, OKLAB_STEPS):
+                t = step / OKLAB_STEPS
+                offset = offsets[i-1] + t*(offsets[i] - offsets[i-1])
+                stops.append((offset, rgb_to_hex(oklab_to_rgb(start + t*(end - start)))))
+        stops.append((offsets[i], colours[i]))
+    return stops
+
+
+def add_gradient_stops(grad, colours, offsets, gradient=SMOOTH):
+    """
+    Add stops to a draw.LinearGradient or draw.RadialGradient (see get_gradient_stops).
+    'none' and 'transparent' become stops with no opacity, in the colours either side of them,
+    so the gradient fades out and in rather than through black.
+    :return: the gradient
+    >>> grad = add_gradient_stops(draw.LinearGradient(0, 0, 0, 300), ['red', 'none', 'blue'], [0, 0.5, 1])
+    >>> [(stop.args['offset'], stop.args['stop-color'], stop.args.get('stop-opacity')) for stop in grad.children]
+    [(0, 'red', None), (0.5, 'red', 0), (0.5, 'blue', 0), (1, 'blue', None)]
+    """
+    stops = get_gradient_stops(colours, offsets, gradient)
+    for i, (offset, colour) in enumerate(stops):
+        if colour not in TRANSPARENT_COLOURS:
+            grad.add_stop(round(offset, 6), colour)
+            continue
+        before = [c for o, c in stops[:i] if c not in TRANSPARENT_COLOURS]
+        after = [c for o, c in stops[i+1:] if c not in TRANSPARENT_COLOURS]
+        for neighbour in dict.fromkeys(before[-1:] + after[:1]) or ['black']:
+            grad.add_stop(round(offset, 6), neighbour, opacity=0)
+    return grad
+
+
+def get_stripe_offsets(colours):
+    """
+    Gradient offsets for a list of stripes: each colour is at its purest in the middle of its stripe
+    >>> get_stripe_offsets(['a', 'b', 'c', 'd'])
+    [0.125, 0.375, 0.625, 0.875]
+    """
+    return [(i + 0.5) / len(colours) for i in range(len(colours))]
+
+
+class PathBuilder:
+    """
+    Builds several paths made of the same commands (e.g. one for each stripe) all at once.
+    The numbers go into a numpy array, set a whole column (the same point of every path) at a time,
+    and each path is then written out in one step, rather than a p.M or p.L call for every point.
+    >>> b = PathBuilder('MLLZ', 2)
+    >>> b.set_points(0, np.array([0, 10]), 5, 5, 10, 0)
+    >>> b.get_path_data()
+    ['M0.0,0.0 L5.0,5.0 L10.0,0.0 Z', 'M0.0,10.0 L5.0,5.0 L10.0,0.0 Z']
+    >>> b.get_path_data(precision=1)[1]
+    'M0.0,10.0 L5.0,5.0 L10.0,0.0 Z'
+    """
+
+    def __init__(self, commands, count=1):
+        """
+        :param commands: command letters of each path, e.g. 'MLLLZ' (no H or V)
+        :param count: how many paths
+        """
+        self.commands = commands
+        size = sum(2*COMMAND_POINTS[cmd] + (ARC_PARAMETERS if cmd == 'A' else 0) for cmd in commands)
+        self.numbers = np.empty((count, size))
+
+    def set_points(self, *numbers):
+        """
+        :param numbers: every number in the paths, in order (x1, y1, x2, y2...). Each one is either
+        the same for all the paths, or an array with one for each path
+        """
+        assert len(numbers) == self.numbers.shape[1], f'{self.commands} takes {self.numbers.shape[1]} numbers'
+        for i, n in enumerate(numbers):
+            self.numbers[:, i] = n
+
+    def get_path_data(self, precision=None):
+        """
+        :param precision: digits after the decimal point, or None to write numbers the same way drawsvg does
+        :return: list of path data strings, one for each path
+        """
+        path_format = get_path_format(self.commands, precision)
+        return [path_format % tuple(row) for row in self.numbers.tolist()]
+
+
 ##################################################
 
+@register_shape
 def draw_stripes(d, colours, n_bars = EMPTY,
                  wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                  size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -218,10 +421,11 @@ def draw_stripes(d, colours, n_bars = EMPTY,
 
 
 
+@register_shape
 def draw_horiz_bars(d, colours,
                     wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                     size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
-                    orientation=HORIZONTAL):
+                    orientation=HORIZONTAL, gradient=False):
     """
     Add horizontal bars to the flag
     :param d: Drawing object
@@ -232,6 +436,7 @@ def draw_horiz_bars(d, colours,
     :param y_start: the height to start drawing bars from. Default is zero, but if drawing a flag inside another
     you will want to use this parameter
     :param fudge: to ensure there's no gaps between flags
+    :param gradient: SMOOTH or OKLAB to draw one rectangle with a gradient through the colours instead of bars
     :return: the height of the bars drawn
     >>> d = draw.Drawing(500, 300)
     >>> draw_horiz_bars(d, RAINBOW)
@@ -240,11 +445,25 @@ def draw_horiz_bars(d, colours,
     True
     >>> type(d.elements[0])
     <class 'drawsvg.elements.Rectangle'>
+    >>> d = draw.Drawing(500, 300)
+    >>> draw_horiz_bars(d, RAINBOW, gradient=SMOOTH)
+    50.0
+    >>> len(d.elements), type(d.elements[0].args['fill'])
+    (1, <class 'drawsvg.defs.LinearGradient'>)
     """
     wid, hei, x_mid, y_mid, x_end, y_end = get_standard_dimensions(d, wid, hei, x_start, y_start)
     new_colours, rel_sizes = get_relative_sizes(colours)
     ang_offset = angle_offset_for_orientation(orientation)
 
+    if gradient:
+        grad = draw.LinearGradient(x_start, y_start, x_start, y_start + hei)
+        add_gradient_stops(grad, colours, get_stripe_offsets(colours), gradient)
+        if orientation != HORIZONTAL:
+            d.append(draw.Rectangle(x_start, y_start, wid, hei, fill=grad, transform=f'rotate({ang_offset},{x_mid},{y_mid})'))
+        else:
+            d.append(draw.Rectangle(x_start, y_start, wid, hei, fill=grad))
+        return float(min(rel_sizes)*hei)
+
     fudge =  min(1, hei / 1000) # here to make sure no gaps between stripes on hi res flags
     current_height = y_start
     stp_hei = hei
@@ -261,10 +480,11 @@ def draw_horiz_bars(d, colours,
     return stp_hei
 
 
+@register_shape
 def draw_vert_bars(d, colours, buffer=0,
                    wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                    size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
-                   orientation=HORIZONTAL):
+                   orientation=HORIZONTAL, gradient=False):
     """
     Add vertical bars to the flag
     :param d: Drawing object
@@ -275,6 +495,7 @@ def draw_vert_bars(d, colours, buffer=0,
     you will want to use this parameter
     :param wid: width of the area that the bars are being added to
     :param hei: height of the area that the bars are being added to
+    :param gradient: SMOOTH or OKLAB to draw one rectangle with a gradient through the colours instead of bars
     :return: the height of the bars drawn
     >>> d = draw.Drawing(500, 300)
     >>> draw_vert_bars(d, RAINBOW)
@@ -283,12 +504,26 @@ def draw_vert_bars(d, colours, buffer=0,
     True
     >>> type(d.elements[0])
     <class 'drawsvg.elements.Rectangle'>
+    >>> d = draw.Drawing(500, 300)
+    >>> draw_vert_bars(d, RAINBOW, gradient=OKLAB)
+    83.33333333333333
+    >>> len(d.elements), len(d.elements[0].args['fill'].children)
+    (1, 41)
     """
     wid, hei, x_mid, y_mid, x_end, y_end = get_standard_dimensions(d, wid, hei, x_start, y_start)
     new_colours, rel_sizes = get_relative_sizes(colours)
     ang_offset = angle_offset_for_orientation(orientation)
 
     axis_length = get_primary_axis_length(wid, hei, ang_offset)
+    if gradient:
+        stp_wid = float(min(rel_sizes)*axis_length)
+        grad = draw.LinearGradient(x_start, y_start, x_start + axis_length, y_start)
+        add_gradient_stops(grad, colours, get_stripe_offsets(colours), gradient)
+        rect = draw.Rectangle(x_start, y_start - buffer*stp_wid, axis_length, hei + 2*buffer*stp_wid, fill=grad)
+        if orientation != HORIZONTAL:
+            rect.args['transform'] = f'rotate({ang_offset},{x_mid},{y_mid})'
+        d.append(rect)
+        return stp_wid
     fudge =  min(1, axis_length / 1000) # here to make sure no gaps between stripes on hi res flags
     current_width = x_start
     stp_wid = axis_length
@@ -305,16 +540,18 @@ def draw_vert_bars(d, colours, buffer=0,
     return stp_wid
 
 
+@register_shape
 def draw_diagonal_stripes(d, colours, fudge=2,
                           wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                           size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
-                          orientation=HORIZONTAL):
+                          orientation=HORIZONTAL, gradient=False):
     """
     Draw diagonal stripes in the style of the Magill Disability Pride Flag
     :param d: Drawing object
     :param wid: width of the area you are adding diagonal stripes to
     :param hei: height of the area you are adding diagonal stripes to
     :param colours: list of colours (str, hex codes) for the stripes
+    :param gradient: SMOOTH or OKLAB to draw one rectangle with a gradient through the colours instead of stripes
     :return: stripe width
     >>> d = draw.Drawing(500, 300)
     >>> draw_diagonal_stripes(d, RAINBOW)
@@ -323,10 +560,23 @@ def draw_diagonal_stripes(d, colours, fudge=2,
     True
     >>> type(d.elements[0])
     <class 'drawsvg.elements.Path'>
+    >>> d = draw.Drawing(500, 300)
+    >>> draw_diagonal_stripes(d, RAINBOW, gradient=SMOOTH)
+    166.66666666666666
+    >>> len(d.elements), type(d.elements[0])
+    (1, <class 'drawsvg.elements.Rectangle'>)
     """
     wid, hei = get_effective_dimensions(d, wid, hei)
 
     stripe_width = (2 * wid) / (len(colours))
+    if gradient:
+        # the stripes run from (x, top) to (x + wid, bottom), so the gradient runs perpendicular to that,
+        # from the line through the top left of the first stripe to the line 2*wid further along
+        scale = 2*wid / (1 + (wid/hei)**2)
+        grad = draw.LinearGradient(x_start - wid, y_start, x_start - wid + scale, y_start - scale*wid/hei)
+        add_gradient_stops(grad, colours, get_stripe_offsets(colours), gradient)
+        d.append(draw.Rectangle(x_start, y_start, wid, hei, fill=grad))
+        return stripe_width
     fudge = fudge * len(colours) / 10
     for i, c in enumerate(colours):
         up_left = -wid + math.floor(i * stripe_width) + x_start
@@ -347,16 +597,18 @@ def draw_diagonal_stripes(d, colours, fudge=2,
     return stripe_width
 
 
+@register_shape
 def draw_reverse_diagonal_stripes(d, colours, offset=2,
                                   wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                                   size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
-                                  orientation=HORIZONTAL):
+                                  orientation=HORIZONTAL, gradient=False):
     """
     Draw diagonal stripes, in the mirror image orientation of the Magill Disability Pride Flag
     :param d: Drawing object
     :param wid: width of the area you are adding diagonal stripes to
     :param hei: height of the area you are adding diagonal stripes to
     :param colours: list of colours (str, hex codes) for the stripes
+    :param gradient: SMOOTH or OKLAB to draw one rectangle with a gradient through the colours instead of stripes
     :return: stripe width
     >>> d = draw.Drawing(500, 300)
     >>> draw_reverse_diagonal_stripes(d, RAINBOW)
@@ -369,6 +621,13 @@ def draw_reverse_diagonal_stripes(d, colours, offset=2,
     wid, hei = get_effective_dimensions(d, wid, hei)
 
     stripe_width = (2 * wid) / (len(colours))
+    if gradient:
+        # mirror image of draw_diagonal_stripes: the stripes run from (x, top) to (x - wid, bottom)
+        scale = 2*wid / (1 + (wid/hei)**2)
+        grad = draw.LinearGradient(x_start, y_start, x_start + scale, y_start + scale*wid/hei)
+        add_gradient_stops(grad, colours, get_stripe_offsets(colours), gradient)
+        d.append(draw.Rectangle(x_start, y_start, wid, hei, fill=grad))
+        return stripe_width
     offset = offset * len(colours) / 10
     for i, c in enumerate(colours):
         up_left = 0 + math.floor(i * stripe_width) + x_start
@@ -389,6 +648,7 @@ def draw_reverse_diagonal_stripes(d, colours, offset=2,
     return stripe_width
 
 
+@register_shape
 def draw_multipile(d, colours,
                    wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                    size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -406,6 +666,10 @@ def draw_multipile(d, colours,
     :param thick_ratio: controls how thich each line is
     :param orientation: not supported
     :return: width at thickest part of the first triangle
+    >>> d = draw.Drawing(500, 300)
+    >>> draw_multipile(d, ['white', 'black'])
+    >>> len(d.elements)
+    2
     """
     # draw a multipile
     wid, hei, x_mid, y_mid, x_end, y_end = get_standard_dimensions(d, wid, hei, x_start, y_start)
@@ -449,23 +713,24 @@ def draw_multipile(d, colours,
         p.L(x_curr_left, y_start).Z()
         d.append(p)
 
-    i = 3
-    while i < len(colours):
-        x_curr_left += line_width
-        x_curr_right += line_width
-        p = draw.Path(fill=colours[i])
-        p.M(x_curr_right, y_start)
-        p.L(x_curr_right + indentation, y_mid)
-        p.L(x_curr_right, y_end)
-        p.L(x_curr_left, y_end)
-        p.L(x_curr_left + indentation, y_mid)
-        p.L(x_curr_left, y_start).Z()
-        d.append(p)
-        i += 1
+    # and the rest each come one line further along
+    if len(colours) > 3:
+        x_curr_right = x_curr_right + line_width*np.arange(1, len(colours) - 2)
+        x_curr_left = x_curr_right - line_width
+        paths = PathBuilder('MLLLLLZ', len(colours) - 3)
+        paths.set_points(x_curr_right, y_start,
+                         x_curr_right + indentation, y_mid,
+                         x_curr_right, y_end,
+                         x_curr_left, y_end,
+                         x_curr_left + indentation, y_mid,
+                         x_curr_left, y_start)
+        for colour, path_data in zip(colours[3:], paths.get_path_data()):
+            d.append(draw.Path(path_data, fill=colour))
 
     return None
 
 
+@register_shape
 def draw_vees(d, colours,
               wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
               size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -494,19 +759,21 @@ def draw_vees(d, colours,
     line_height = sw/aspect_ratio
 
     fudge = min(2, hei/1000)
-    for i, c in enumerate(colours):
-        p = draw.Path(stroke_width=0, fill=c, stroke_linecap='square')
-        p.M(line_width * i, y_start)
-        p.L(mid_x, hei - line_height*i + fudge)  # go to middle
-        p.L(wid - line_width * i, y_start)
-        p.L(wid - line_width * (i+1), y_start)  # turn back
-        p.L(mid_x, hei - line_height*(i+1))  # back to middle
-        p.L(line_width * (i+1), y_start)
-        p.L(line_width * i, y_start).Z()
-        d.append(p)
+    i = np.arange(len(colours))
+    paths = PathBuilder('MLLLLLLZ', len(colours))
+    paths.set_points(line_width * i, y_start,
+                     mid_x, hei - line_height*i + fudge,  # go to middle
+                     wid - line_width * i, y_start,
+                     wid - line_width * (i+1), y_start,  # turn back
+                     mid_x, hei - line_height*(i+1),  # back to middle
+                     line_width * (i+1), y_start,
+                     line_width * i, y_start)
+    for c, path_data in zip(colours, paths.get_path_data()):
+        d.append(draw.Path(path_data, stroke_width=0, fill=c, stroke_linecap='square'))
     return line_width
 
 
+@register_shape
 def draw_chevrons(d, colours,
                   wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                   size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -557,10 +824,11 @@ def draw_chevrons(d, colours,
     return line_height
 
 
+@register_shape
 def draw_concentric_rectangles(d, colours,
                                wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                                size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
-                               orientation=HORIZONTAL):
+                               orientation=HORIZONTAL, gradient=False):
     """
     Draw concentric rectangles from the outside to the inside
     :param d: Drawing object
@@ -569,6 +837,8 @@ def draw_concentric_rectangles(d, colours,
     :param hei: height that makes up the area that is being drawn into (in pixels)
     :param x_start: the x-coordinate of the upper left corner of the rectangular area that is being drawn into
     :param y_start: the y-coordinate of the upper left corner of the rectangular area that is being drawn into
+    :param gradient: SMOOTH or OKLAB to draw the top, bottom, left and right sides as four shapes, each with a
+    gradient through the colours from the edge to the middle, instead of a frame for each colour
     :return: stripe height
     >>> d = draw.Drawing(500, 300)
     >>> draw_concentric_rectangles(d, RAINBOW)
@@ -577,6 +847,11 @@ def draw_concentric_rectangles(d, colours,
     True
     >>> type(d.elements[0])
     <class 'drawsvg.elements.Path'>
+    >>> d = draw.Drawing(500, 300)
+    >>> draw_concentric_rectangles(d, RAINBOW, gradient=OKLAB)
+    25.0
+    >>> len(d.elements), type(d.elements[0].args['fill'])
+    (4, <class 'drawsvg.defs.LinearGradient'>)
     """
     wid, hei = get_effective_dimensions(d, wid, hei)
 
@@ -585,29 +860,49 @@ def draw_concentric_rectangles(d, colours,
     leftmost = x_start
     topmost = y_start
 
-    for i, colour in enumerate(colours):
-        p = draw.Path(fill=colour)
-        # y coordinates
-        outer_top = topmost + i*line_height
-        inner_top = outer_top + line_height
-        outer_bottom = hei - i*line_height
-        inner_bottom = outer_bottom - line_height
-        # x coordinates
-        outer_left = leftmost + i*line_width
-        inner_left = outer_left + line_width
-        outer_right = wid - i*line_width
-        inner_right = outer_right - line_width
-        # the path
-        p.M(outer_left, outer_top) # start in upper left corner
-        p.L(outer_right, outer_top).L(outer_right, outer_bottom).L(outer_left, outer_bottom) # go around
-        p.L(outer_left, inner_top).L(inner_left, inner_top) # start on the inner
-        p.L(inner_left, inner_bottom).L(inner_right, inner_bottom).L(inner_right, inner_top) # circle back
-        p.L(outer_left, inner_top).L(outer_left, outer_top).Z() # return to origin
-        d.append(p)
+    i = np.arange(len(colours))
+    # y coordinates
+    outer_top = topmost + i*line_height
+    inner_top = outer_top + line_height
+    outer_bottom = hei - i*line_height
+    inner_bottom = outer_bottom - line_height
+    # x coordinates
+    outer_left = leftmost + i*line_width
+    inner_left = outer_left + line_width
+    outer_right = wid - i*line_width
+    inner_right = outer_right - line_width
+    if gradient:
+        # the frames meet along the diagonals, so each side is one shape with the frames running across it
+        offsets = get_stripe_offsets(colours)
+        left, top, right, bottom = outer_left[0], outer_top[0], outer_right[0], outer_bottom[0]
+        middle_left, middle_top = inner_left[-1], inner_top[-1]
+        middle_right, middle_bottom = inner_right[-1], inner_bottom[-1]
+        sides = [((left, top), (right, top), (middle_right, middle_top), (middle_left, middle_top)),
+                 ((right, top), (right, bottom), (middle_right, middle_bottom), (middle_right, middle_top)),
+                 ((right, bottom), (left, bottom), (middle_left, middle_bottom), (middle_right, middle_bottom)),
+                 ((left, bottom), (left, top), (middle_left, middle_top), (middle_left, middle_bottom))]
+        for corners in sides:
+            # from the middle of the outside edge straight in to the middle of the inside one
+            edge_x, edge_y = (corners[0][0] + corners[1][0]) / 2, (corners[0][1] + corners[1][1]) / 2
+            middle_x, middle_y = (corners[2][0] + corners[3][0]) / 2, (corners[2][1] + corners[3][1]) / 2
+            grad = draw.LinearGradient(edge_x, edge_y, middle_x, middle_y)
+            add_gradient_stops(grad, colours, offsets, gradient)
+            d.append(draw.Lines(*[c for corner in corners for c in corner], close=True, fill=grad))
+        return float(line_height)
+    # the paths
+    paths = PathBuilder('M' + 'L'*10 + 'Z', len(colours))
+    paths.set_points(outer_left, outer_top, # start in upper left corner
+                     outer_right, outer_top, outer_right, outer_bottom, outer_left, outer_bottom, # go around
+                     outer_left, inner_top, inner_left, inner_top, # start on the inner
+                     inner_left, inner_bottom, inner_right, inner_bottom, inner_right, inner_top, # circle back
+                     outer_left, inner_top, outer_left, outer_top) # return to origin
+    for colour, path_data in zip(colours, paths.get_path_data()):
+        d.append(draw.Path(path_data, fill=colour))
     return line_height
 
 
 
+@register_shape
 def draw_seychelles(d, colours,
                     wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                     size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -649,6 +944,7 @@ def draw_seychelles(d, colours,
     return last_height
 
 
+@register_shape
 def draw_starburst(d, colours,
                    wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                    size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -688,10 +984,11 @@ def draw_starburst(d, colours,
     return (2*wid + 2*hei)/len(colours)
 
 
+@register_shape
 def draw_concentric_circles(d, colours,
                             wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                             size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
-                            orientation=HORIZONTAL):
+                            orientation=HORIZONTAL, gradient=False):
     """
     Draw concentric circles from the outside inward
     :param d: Drawing object
@@ -700,6 +997,7 @@ def draw_concentric_circles(d, colours,
     :param hei: height that makes up the area that is being drawn into (in pixels)
     :param x_start: the x-coordinate of the upper left corner of the rectangular area that is being drawn into
     :param y_start: the y-coordinate of the upper left corner of the rectangular area that is being drawn into
+    :param gradient: SMOOTH or OKLAB to draw one circle with a radial gradient through the colours instead of rings
     :return: perimiter length of a segment
     >>> d = draw.Drawing(500, 300)
     >>> draw_concentric_circles(d, RAINBOW)
@@ -708,6 +1006,11 @@ def draw_concentric_circles(d, colours,
     True
     >>> type(d.elements[0])
     <class 'drawsvg.elements.Circle'>
+    >>> d = draw.Drawing(500, 300)
+    >>> draw_concentric_circles(d, RAINBOW, gradient=SMOOTH)
+    41.666666666666664
+    >>> len(d.elements), d.elements[0].args['r'], type(d.elements[0].args['fill'])
+    (1, 270.8333333333333, <class 'drawsvg.defs.RadialGradient'>)
     """
     wid, hei = get_effective_dimensions(d, wid, hei)
     centre_x = x_start + wid/2
@@ -716,6 +1019,14 @@ def draw_concentric_circles(d, colours,
     radius = (max(wid, hei) /2 )/ len(colours)
     radius *= size_ratio
     stroke_wid = radius
+    if gradient:
+        # each colour is at its purest in the middle of the ring it would otherwise have been drawn as
+        ring_radii = [radius*(len(colours)-i) - stroke_wid/2 + radius*stretch_ratio*0.5 for i in range(len(colours))]
+        outer_radius = ring_radii[0] + stroke_wid/2
+        grad = draw.RadialGradient(centre_x, centre_y, outer_radius)
+        add_gradient_stops(grad, colours[::-1], [max(0, r / outer_radius) for r in ring_radii[::-1]], gradient)
+        d.append(draw.Circle(centre_x, centre_y, outer_radius, fill=grad))
+        return stroke_wid
     for i, colour in enumerate(colours):
         if i == len(colours)-1:
             fill_colour = colours[i]
@@ -727,10 +1038,11 @@ def draw_concentric_circles(d, colours,
 
 
 
+@register_shape
 def draw_concentric_ellipses(d, colours,
                              wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                              size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
-                             orientation=HORIZONTAL):
+                             orientation=HORIZONTAL, gradient=False):
     """
     Draw concentric circles from the outside inward
     :param d: Drawing object
@@ -739,6 +1051,7 @@ def draw_concentric_ellipses(d, colours,
     :param hei: height that makes up the area that is being drawn into (in pixels)
     :param x_start: the x-coordinate of the upper left corner of the rectangular area that is being drawn into
     :param y_start: the y-coordinate of the upper left corner of the rectangular area that is being drawn into
+    :param gradient: SMOOTH or OKLAB to draw one ellipse with a radial gradient through the colours instead of rings
     :return: perimiter length of a segment
     >>> d = draw.Drawing(500, 300)
     >>> draw_concentric_ellipses(d, RAINBOW)
@@ -747,6 +1060,11 @@ def draw_concentric_ellipses(d, colours,
     True
     >>> type(d.elements[0])
     <class 'drawsvg.elements.Ellipse'>
+    >>> d = draw.Drawing(500, 300)
+    >>> draw_concentric_ellipses(d, RAINBOW, gradient=SMOOTH)
+    41.666666666666664
+    >>> len(d.elements), d.elements[0].args['fill'].args['gradientTransform']
+    (1, 'matrix(1 0 0 0.6 0 60.0)')
     """
     wid, hei = get_effective_dimensions(d, wid, hei)
     centre_x = wid/2
@@ -756,6 +1074,15 @@ def draw_concentric_ellipses(d, colours,
     y_radius = (hei/2)/len(colours)
 
     stroke_wid = max(x_radius, y_radius)
+    if gradient:
+        # each ring shows between its own outside edge and the next one's, so the rings are evenly spaced
+        # both ways, and a circular gradient squashed to the shape of the ellipse matches them
+        squash = y_radius / x_radius
+        squash_transform = f'matrix(1 0 0 {round(squash, 6)} 0 {round(centre_y*(1 - squash), 6)})'
+        grad = draw.RadialGradient(centre_x, centre_y, wid/2, gradientTransform=squash_transform)
+        add_gradient_stops(grad, colours[::-1], get_stripe_offsets(colours), gradient)
+        d.append(draw.Ellipse(centre_x, centre_y, wid/2, hei/2, fill=grad))
+        return stroke_wid
     for i, colour in enumerate(colours):
         this_x_radius = x_radius*(len(colours)-i) - stroke_wid/2
         this_y_radius = y_radius*(len(colours)-i) - stroke_wid/2
@@ -763,6 +1090,7 @@ def draw_concentric_ellipses(d, colours,
     return stroke_wid
 
 
+@register_shape
 def draw_concentric_beziers(d, colours,
                             wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                             size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -837,10 +1165,11 @@ def draw_concentric_beziers(d, colours,
     return stroke_wid
 
 
+@register_shape(cost=MANY)
 def draw_concentric_infinities(d, colours, bg_colour='none',
                                wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                                size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
-                               orientation=HORIZONTAL):
+                               orientation=HORIZONTAL, gradient=False):
     """
     Draw concentric infinity loops in the style of the Autistic Pride Day logo.
     :param d: drawing object
@@ -850,7 +1179,18 @@ def draw_concentric_infinities(d, colours, bg_colour='none',
     :param hei: height of the area the symbol is being added to
     :param size_ratio: scaling factor (radius)
     :param stretch_ratio: how far apart the two midpoints are
+    :param gradient: SMOOTH or OKLAB to draw each loop as one circle with a radial gradient through the colours
+    instead of a ring for each colour. The bands where the loops cross follow curves, which a gradient can't,
+    so they are still drawn one for each colour.
     :return: none
+    >>> d = draw.Drawing(500, 300)
+    >>> draw_concentric_infinities(d, RAINBOW, 'black')
+    >>> len(d.elements)
+    20
+    >>> d = draw.Drawing(500, 300)
+    >>> draw_concentric_infinities(d, RAINBOW, 'black', gradient=SMOOTH)
+    >>> len(d.elements), type(d.elements[0].args['fill'])
+    (10, <class 'drawsvg.defs.RadialGradient'>)
     """
     wid, hei = get_effective_dimensions(d, wid, hei)
     total_thickness = stretch_ratio*size_ratio*(hei / 3)
@@ -867,15 +1207,28 @@ def draw_concentric_infinities(d, colours, bg_colour='none',
     each_thickness = total_thickness /(len(colours) + 1)
     greatest_radius = size_ratio*(hei/2) - each_thickness
 
-    # left concentric circles
-    for i, colour in enumerate(colours):
-        this_radius = greatest_radius - i*each_thickness
-        d.append(draw.Circle( left_centre, midy, this_radius, stroke=colour, stroke_width=each_thickness, fill='none' ))
-
-    # right concentric circles
-    for i, colour in enumerate(reversed(colours)):
-        this_radius = greatest_radius - i*each_thickness
-        d.append(draw.Circle( right_centre, midy, this_radius, stroke=colour, stroke_width=each_thickness, fill='none' ))
+    if gradient:
+        # see-through in the middle of each loop, up to the inside edge of the innermost ring
+        outer_radius = greatest_radius + each_thickness/2
+        hole = (greatest_radius - (len(colours) - 0.5)*each_thickness) / outer_radius
+        ring_offsets = [(greatest_radius - i*each_thickness) / outer_radius for i in range(len(colours))][::-1]
+        for centre, loop_colours in [(left_centre, colours), (right_centre, colours[::-1])]:
+            inside_out = loop_colours[::-1]
+            grad = draw.RadialGradient(centre, midy, outer_radius)
+            add_gradient_stops(grad, ['none', inside_out[0]] + inside_out, [hole, hole] + ring_offsets, gradient)
+            d.append(draw.Circle(centre, midy, outer_radius, fill=grad))
+    else:
+        # left concentric circles
+        for i, colour in enumerate(colours):
+            this_radius = greatest_radius - i*each_thickness
+            d.append(draw.Circle(left_centre, midy, this_radius, stroke=colour, stroke_width=each_thickness,
+                                 fill='none'))
+
+        # right concentric circles
+        for i, colour in enumerate(reversed(colours)):
+            this_radius = greatest_radius - i*each_thickness
+            d.append(draw.Circle(right_centre, midy, this_radius, stroke=colour, stroke_width=each_thickness,
+                                 fill='none'))
 
     # add background-coloured lines to give the cut-off effect
     linedraws = [bg_colour] + colours + [bg_colour]
@@ -907,6 +1260,7 @@ def draw_concentric_infinities(d, colours, bg_colour='none',
         d.append(p)
 
 
+@register_shape
 def draw_concentric_tees(d, colours,
                          wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                          size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -961,6 +1315,7 @@ def draw_concentric_tees(d, colours,
     return tee_wid
 
 
+@register_shape
 def draw_ally_stripes(d, colours,
                       wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                       size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1005,6 +1360,7 @@ def draw_ally_stripes(d, colours,
 
 
 
+@register_shape
 def draw_armpit_stripes(d, colours,
                         wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                         size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1050,6 +1406,7 @@ def draw_armpit_stripes(d, colours,
     '''
 
 
+@register_shape
 def draw_buddhist(d, colours,
                   wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                   size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1076,6 +1433,7 @@ def draw_buddhist(d, colours,
     return changed_wid
 
 
+@register_shape
 def draw_pluralrole(d, colours,
                     wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                     size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1165,6 +1523,7 @@ def draw_pluralrole(d, colours,
     return diamond_radius
 
 
+@register_shape
 def draw_concentric_exes(d, colours,
                          wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                          size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -1193,27 +1552,28 @@ def draw_concentric_exes(d, colours,
     d.append(draw.Rectangle(x_start, y_start, wid, hei, fill=colours[0]))
 
     n = len(colours) - 1
-    for i in range(len(colours)-1):
-        line_width = base_line_width*(n-i)
-        line_height = base_line_height*(n-i)
-        p = draw.Path(fill=colours[i+1])
-        p.M(x_start, y_start)
-        p.L(x_start + line_width, y_start)
-        p.L(x_mid, y_mid-line_height)
-        p.L(x_end - line_width, y_start)
-        p.L(x_end, y_start) # upper right corner
-        p.L(x_end, y_start + line_height)
-        p.L(x_mid + line_width, y_mid)
-        p.L(x_end, y_end-line_height)
-        p.L(x_end, y_end) # lower right corner
-        p.L(x_end - line_width, y_end)
-        p.L(x_mid, y_mid + line_height)
-        p.L(x_start + line_width, y_end)
-        p.L(x_start, y_end) # lower left corner
-        p.L(x_start, y_end - line_height)
-        p.L(x_mid - line_width, y_mid)
-        p.L(x_start, y_start + line_height).Z()
-        d.append(p)
+    i = np.arange(n)
+    line_width = base_line_width*(n-i)
+    line_height = base_line_height*(n-i)
+    paths = PathBuilder('M' + 'L'*15 + 'Z', n)
+    paths.set_points(x_start, y_start,
+                     x_start + line_width, y_start,
+                     x_mid, y_mid-line_height,
+                     x_end - line_width, y_start,
+                     x_end, y_start, # upper right corner
+                     x_end, y_start + line_height,
+                     x_mid + line_width, y_mid,
+                     x_end, y_end-line_height,
+                     x_end, y_end, # lower right corner
+                     x_end - line_width, y_end,
+                     x_mid, y_mid + line_height,
+                     x_start + line_width, y_end,
+                     x_start, y_end, # lower left corner
+                     x_start, y_end - line_height,
+                     x_mid - line_width, y_mid,
+                     x_start, y_start + line_height)
+    for colour, path_data in zip(colours[1:], paths.get_path_data()):
+        d.append(draw.Path(path_data, fill=colour))
 
 
 
@@ -0,0 +1,127 @@
+"""
+A registry of all the drawing functions, so that they can be looked up by name
+(e.g. for flag specs) or by what they are, rather than every script keeping its own dictionary.
+
+Every draw_* function is registered with the @register_shape decorator. It records
+- category: which kind of shape it is (from the module it's in)
+- colour_kind: whether it takes a list of colours, or a primary (and maybe secondary) colour
+- colour_args: the names of its colour parameters
+- defaults: its keyword arguments and their defaults
+- standard: whether it takes the usual wid, hei, x_start, y_start, size_ratio... orientation parameters
+- cost: roughly how many elements it adds (FEW, PER_COLOUR or MANY)
+
+>>> @register_shape(cost=MANY)
+... def draw_dots(d, colours, wid=-1.0, hei=-1.0, x_start=0, y_start=0,
+...               size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
+...               orientation='H'):
+...     pass
+>>> shape = get_shape('draw_dots')
+>>> shape.function is draw_dots, shape.colour_kind, shape.colour_args, shape.standard, shape.cost
+(True, 'list', ('colours',), True, 'many')
+>>> shape.defaults['size_ratio']
+1.0
+>>> del SHAPES['draw_dots']
+"""
+
+import importlib
+import os
+from collections import namedtuple
+
+# categories, from the module each function is in
+CATEGORIES = {'pride_stripes': 'stripes',
+              'pride_rings': 'rings',
+              'stars_and_hearts': 'stars and hearts',
+              'gender_symbols': 'gender symbols',
+              'multicolour_shapes': 'multicolour shapes',
+              'pride_shapes': 'shapes',
+              'embedding_icons': 'icons'}
+
+# colour kinds
+COLOUR_LIST = 'list' # colours (or stripes): a list of colours
+SINGLE_COLOUR = 'single' # primary_colour, and maybe secondary_colour
+
+# cost hints: roughly how many elements a function adds to the drawing
+FEW = 'few' # a handful, whatever the colours
+PER_COLOUR = 'per colour' # about one for each colour
+MANY = 'many' # several for each colour
+
+STANDARD_PARAMETERS = ('wid', 'hei', 'x_start', 'y_start', 'size_ratio', 'stretch_ratio',
+                       'sharp_ratio', 'sparse_ratio', 'thick_ratio', 'orientation')
+
+NO_DEFAULT = object()
+
+Shape = namedtuple('Shape', ['name', 'function', 'category', 'colour_kind', 'colour_args',
+                             'defaults', 'standard', 'cost'])
+
+SHAPES = {}
+
+
+def register_shape(function=None, category=None, cost=None):
+    """
+    Decorator that adds a drawing function to SHAPES. Use as @register_shape or e.g. @register_shape(cost=MANY)
+    :param function: the function being decorated
+    :param category: defaults to the category of the module it's in
+    :param cost: FEW, PER_COLOUR or MANY. Defaults to PER_COLOUR for functions that take a list of colours, FEW otherwise
+    :return: the function, unchanged
+    """
+    if function is None:
+        return lambda function: register_shape(function, category=category, cost=cost)
+
+    parameters = get_defaults(function)
+    colour_args = tuple(p for p in parameters if 'colour' in p or p == 'stripes')
+    colour_kind = COLOUR_LIST if 'colours' in parameters or 'stripes' in parameters else SINGLE_COLOUR
+    if category is None:
+        module_name = os.path.splitext(os.path.basename(function.__code__.co_filename))[0]
+        category = CATEGORIES.get(module_name, module_name)
+    if cost is None:
+        cost = PER_COLOUR if colour_kind == COLOUR_LIST else FEW
+    defaults = {name: default for name, default in parameters.items() if default is not NO_DEFAULT}
+    SHAPES[function.__name__] = Shape(function.__name__, function, category, colour_kind, colour_args,
+                                      defaults, all(p in parameters for p in STANDARD_PARAMETERS), cost)
+    return function
+
+
+def get_defaults(function):
+    """
+    Like inspect.signature, but much quicker to import and run, since every draw_* function goes through it
+    :return: dictionary of parameter name to default (NO_DEFAULT if it hasn't got one), in order
+    >>> get_defaults(lambda d, colours, wid=-1.0, *, thick_ratio=1.0: None) == \\
+    ...     {'d': NO_DEFAULT, 'colours': NO_DEFAULT, 'wid': -1.0, 'thick_ratio': 1.0}
+    True
+    """
+    code = function.__code__
+    names = code.co_varnames[:code.co_argcount + code.co_kwonlyargcount]
+    positional = names[:code.co_argcount]
+    defaults = dict.fromkeys(names, NO_DEFAULT)
+    defaults.update(zip(positional[len(positional) - len(function.__defaults__ or ()):], function.__defaults__ or ()))
+    defaults.update(function.__kwdefaults__ or {})
+    return defaults
+
+
+def load_shapes():
+    """
+    Import all the modules with shapes in them, so that every shape is registered
+    (importing the drawflags package on its own doesn't import them)
+    """
+    for module_name in CATEGORIES:
+        importlib.import_module(module_name)
+
+
+def get_shape(name):
+    """
+    :param name: name of a drawing function, e.g. 'draw_heart'
+    :return: its Shape. Raises a KeyError if there's no such shape.
+    """
+    if name not in SHAPES:
+        load_shapes()
+    return SHAPES[name]
+
+
+def find_shapes(category=None, colour_kind=None, standard=None, cost=None):
+    """
+    :return: list of the Shapes that match everything given
+    """
+    load_shapes()
+    wanted = {'category': category, 'colour_kind': colour_kind, 'standard': standard, 'cost': cost}
+    return [shape for shape in SHAPES.values()
+            if all(value is None or getattr(shape, key) == value for key, value in wanted.items())]
@@ -1,5 +1,6 @@
 from pride_rings import *
 
+@register_shape
 def draw_arbitrary_star(d, primary_colour, secondary_colour='none', num_points=5, square=True,
                         wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                         size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -53,6 +54,7 @@ def draw_arbitrary_star(d, primary_colour, secondary_colour='none', num_points=5
     return sw
 
 
+@register_shape
 def draw_fivesided_star(d, primary_colour, secondary_colour='none',
                         wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                         size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -76,6 +78,7 @@ def draw_fivesided_star(d, primary_colour, secondary_colour='none',
                                orientation=orientation, sharp_ratio=sharp_ratio * 0.5, thick_ratio=thick_ratio)
 
 
+@register_shape
 def draw_sevensided_star(d, primary_colour, secondary_colour='none',
                          wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                          size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -101,6 +104,7 @@ def draw_sevensided_star(d, primary_colour, secondary_colour='none',
                                      thick_ratio=thick_ratio)
 
 
+@register_shape
 def draw_australian_star(d, primary_colour, secondary_colour='none',
                          wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                          size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -125,6 +129,7 @@ def draw_australian_star(d, primary_colour, secondary_colour='none',
                                orientation=orientation, sharp_ratio=secondary_size, thick_ratio=thick_ratio)
 
 
+@register_shape
 def draw_southern_cross(d, primary_colour, secondary_colour='none',
                         wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                         size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -187,6 +192,7 @@ def draw_southern_cross(d, primary_colour, secondary_colour='none',
 
 
 
+@register_shape
 def draw_arbitrary_star_trace(d, primary_colour, secondary_colour='none',  num_points=5, offset=2,
                              square=True, sw=0,
                               wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
@@ -237,6 +243,7 @@ def draw_arbitrary_star_trace(d, primary_colour, secondary_colour='none',  num_p
     return sw
 
 
+@register_shape
 def draw_pointed_arbitrary_star_trace(d, primary_colour, secondary_colour='none',  num_points=5,
                                         square=True, sw=0,
                                       wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
@@ -301,6 +308,7 @@ def draw_pointed_arbitrary_star_trace(d, primary_colour, secondary_colour='none'
     return sw
 
 
+@register_shape
 def draw_morocco_star(d, primary_colour, secondary_colour='none',
                       wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                       size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -331,6 +339,7 @@ def draw_morocco_star(d, primary_colour, secondary_colour='none',
 
 
 
+@register_shape
 def draw_star_of_david(d, primary_colour, secondary_colour='none',
                        wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                        size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -385,6 +394,7 @@ def draw_star_of_david(d, primary_colour, secondary_colour='none',
 
 
 
+@register_shape
 def draw_nautstar(d, primary_colour, secondary_colour='none',
                   wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                   size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -420,6 +430,7 @@ def draw_nautstar(d, primary_colour, secondary_colour='none',
     draw_fivesided_star(d, secondary_colour, size_ratio=0.74, orientation=rotateby, y_start=-this_hei*0.015, x_start=.3*this_wid)
 
 
+@register_shape
 def draw_therian(d, primary_colour, secondary_colour='none',
                  wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                  size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -466,6 +477,7 @@ def draw_therian(d, primary_colour, secondary_colour='none',
     d.append(p)
 
 
+@register_shape
 def draw_otherkin(d, primary_colour, secondary_colour='none',
                   wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                   size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -500,6 +512,7 @@ def draw_otherkin(d, primary_colour, secondary_colour='none',
     draw_arbitrary_star_trace(d, primary_colour, num_points=7, offset=3, thick_ratio=2.2*thick_ratio, size_ratio=1.13*size_ratio, y_start=y_offset)
 
 
+@register_shape
 def draw_nonhuman(d, primary_colour, secondary_colour='none',
                   wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                   size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -546,6 +559,15 @@ def draw_nonhuman(d, primary_colour, secondary_colour='none',
 
 
 
+# path traced from https://commons.wikimedia.org/wiki/File:Icons8_flat_like.svg, on a 48x48 grid
+# starts from the right crest and goes anticlockwise: the trough, the left crest, down the left side
+# to the bottom, a symmetric copy up the right side, and back to the right crest
+# (originally the curve to the bottom had its first control x be 32.9 instead of 33 but I'm simplifying)
+HEART = add_path_template('heart', 'M 34,6 C 29.8,6 26.1,8.1 24,11.4 C 21.9,8.1 18.2,6 14,6 C 7.4,6 2,11.4 2,18 '
+                                   'C 2,30 24,39.9 24,39.9 S 46,30 46,18 C 46,11.4 40.6,6 34,6 Z', 48, 48)
+
+
+@register_shape
 def draw_heart(d, primary_colour, secondary_colour='none',
                wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -563,10 +585,8 @@ def draw_heart(d, primary_colour, secondary_colour='none',
     :param thick_ratio: scaling factor for the line width (if outline of heart is used). Default is hei/100 if outlining, 0 if not.
     :return: none
     """
-    # path traced from https://commons.wikimedia.org/wiki/File:Icons8_flat_like.svg
     wid, hei = get_effective_dimensions(d, wid, hei)
-    h = (hei/48)
-    w = h #(wid/48)
+    scale = size_ratio*hei
 
     # the way inkscape centred the heart on the y axis looks off
     # this is a kludge to fix it
@@ -580,53 +600,16 @@ def draw_heart(d, primary_colour, secondary_colour='none',
     if orientation in [VERTICAL, HORIZONTAL]:
         rotateby += 90
 
-    # the sides
-    max_wid = (24-2)*w*size_ratio
-    rightmost = midx+max_wid #wid-x_margin + x_start
-    leftmost = midx-max_wid#x_margin + x_start
-    y_side = midy - (24-18)*h*size_ratio # 18*h+ yoffs # 21 before centring
-    cy_sidetop = midy - (24-11.4)*h*size_ratio #11.4*h+ yoffs #14.4
-    cy_sidelower = midy + (30-24)*h*size_ratio #30*h+ yoffs #33
-
-    # the two bumps
-    crest_from_midx = (34-24)*w*size_ratio
-    cx_outer_from_midx = (40.6-24)*w*size_ratio
-    cx_inner_from_midx = (29.8-24)*w*size_ratio
-    top_crests = midy - (24-6)*h*size_ratio #6*h+ yoffs # 9
-    x_rightcrest = midx+crest_from_midx#34 * w + xoffs # 34
-    x_leftcrest = midx-crest_from_midx#wid - x_rightcrest # 14
-    cx_outer_rightcrest = midx+cx_outer_from_midx#40.6*w+ xoffs
-    cx_outer_leftcrest = midx-cx_outer_from_midx##wid-cx_outer_rightcrest
-    cx_inner_rightcrest = midx+cx_inner_from_midx#29.8*w+ xoffs
-    cx_inner_leftcrest = midx-cx_inner_from_midx#wid-cx_inner_rightcrest
-
-    # the trough in the middle
-    top_from_midy = (24-8.1)*h*size_ratio
-    cx_trough_from_midx = (26.1-24)*w*size_ratio
-    cy_trough = midy - top_from_midy  # 8.1*h+ yoffs #11.3
-    cx_righttrough = midx+cx_trough_from_midx #26.1*w+ xoffs
-    cx_lefttrough = midx-cx_trough_from_midx #wid-cx_righttrough
-
-    # the bottom
-    bottom = midy + top_from_midy #hei-top_crests #45*h + yoffs
-
+    path_data = place_path_template(HEART, scale, scale, midx - scale/2, midy - scale/2)
     if rotateby != 0:
-        p = draw.Path(fill=primary_colour, stroke=secondary_colour, transform=f'rotate({rotateby},{midx},{midy})')
+        p = draw.Path(path_data, fill=primary_colour, stroke=secondary_colour, transform=f'rotate({rotateby},{midx},{midy})')
     else:
         sw = thick_ratio*(hei/100)
-        p = draw.Path(fill=primary_colour, stroke=secondary_colour, stroke_width=sw)
-    p.M(x_rightcrest,top_crests) # start from right crest
-    p.C(cx_inner_rightcrest,top_crests,cx_righttrough,cy_trough,midx,cy_sidetop) # go ccw to the trough
-    p.C(cx_lefttrough,cy_trough,cx_inner_leftcrest,top_crests,x_leftcrest,top_crests) # ccw to left crest
-    p.C(cx_outer_leftcrest,top_crests,leftmost,cy_sidetop,leftmost,y_side) # left side
-    # originally this had the first cx be 32.9 instead of 33 but I'm simplifying:
-    p.C(leftmost,cy_sidelower,midx,bottom,midx,bottom) # go to the bottom
-    p.S(rightmost,cy_sidelower,rightmost,y_side) # symmetric copy of last curve
-    p.C(rightmost,cy_sidetop,cx_outer_rightcrest,top_crests,x_rightcrest,top_crests) # return to right crest
-    p.Z()
+        p = draw.Path(path_data, fill=primary_colour, stroke=secondary_colour, stroke_width=sw)
     d.append(p)
 
 
+@register_shape
 def draw_semihearts(d, primary_colour, secondary_colour='none',
                     wid=UNSPECIFIED, hei=UNSPECIFIED, x_start=0, y_start=0,
                     size_ratio=1.0, stretch_ratio=1.0, sharp_ratio=1.0, sparse_ratio=1.0, thick_ratio=1.0,
@@ -0,0 +1,153 @@
+"""
+A Drawing that writes itself out as it goes.
+
+draw.Drawing keeps every element in d.elements until save_svg writes them all at once.
+That's fine for a flag with a dozen stripes, but designs with tens of thousands of elements
+(gradients made of thousands of thin bars, dense star fields...) use a lot of memory and
+take a long time to save.
+
+StreamingDrawing has the same append as draw.Drawing, so all the draw_* functions work
+with it unchanged, but each element is written to the file (or socket) as soon as it is
+appended and then forgotten. Only the defs the elements refer to (clip paths, gradients...)
+are kept, so that each of them is only written once.
+
+>>> import io
+>>> out = io.StringIO()
+>>> with StreamingDrawing(500, 300, out) as d:
+...     bh = draw_horiz_bars(d, RAINBOW)
+>>> d.element_count, len(d.elements)
+(6, 0)
+>>> out.getvalue().count('<rect')
+6
+"""
+
+import socket
+from collections import defaultdict
+from io import StringIO
+
+from drawsvg import types
+from drawsvg.drawing import XML_HEADER, SVG_START, SVG_END
+
+from pride_stripes import *
+
+
+class StreamingDrawing(draw.Drawing):
+    """
+    A draw.Drawing that writes each element as soon as it is appended.
+    Call close() when you are done (or use it in a with block) to finish the file.
+    Anything that needs d.elements afterwards (optimise_layers, save_png...) won't work,
+    since the elements are not kept. The Drawing methods that write the whole drawing again
+    (as_svg, save_svg, save_png, rasterize, as_html, save_html, and so save_flag and render_in_memory)
+    raise a TypeError. Rasterise the file it wrote instead, e.g. with save_svg_as_png.
+
+    >>> with StreamingDrawing(500, 300, StringIO()) as d:
+    ...     bh = draw_horiz_bars(d, RAINBOW)
+    >>> d.save_png('output/streamed.png')
+    Traceback (most recent call last):
+    ...
+    TypeError: A StreamingDrawing has already streamed its elements to its output, so it can't be written again
+    """
+
+    def __init__(self, width, height, output, origin=(0, 0), **svg_args):
+        """
+        :param width: width of the canvas
+        :param height: height of the canvas
+        :param output: file name, open text file (anything with a write method), or socket
+        :param origin: same as for draw.Drawing
+        """
+        super().__init__(width, height, origin=origin, **svg_args)
+        self.owns_output = not hasattr(output, 'write')
+        if isinstance(output, socket.socket):
+            output = output.makefile('w', encoding='utf-8')
+        elif self.owns_output:
+            output = open(output, 'w', encoding='utf-8')
+        self.output = output
+        self.started = False
+        self.closed = False
+        self.element_count = 0
+        self.written_defs = [] # kept so their python ids (used as keys below) are never reused
+        self.written_def_ids = set()
+        id_index = 0
+
+        def id_gen(base=''):
+            nonlocal id_index
+            id_index += 1
+            return f'{self.id_prefix}{base}{id_index - 1}'
+
+        self.id_map = defaultdict(id_gen)
+
+    def def_already_written(self, element):
+        """
+        Used as drawsvg's is_duplicate while writing defs: marks the def as written
+        :return: whether the def had already been written
+        """
+        if id(element) in self.written_def_ids:
+            return True
+        self.written_def_ids.add(id(element))
+        self.written_defs.append(element)
+        return False
+
+    def start(self):
+        """
+        Write the start of the SVG file. This happens on the first append, so that
+        e.g. set_pixel_scale can still be used before drawing.
+        """
+        self.started = True
+        img_width, img_height = self.calc_render_size()
+        svg_args = dict(width=img_width, height=img_height, viewBox=' '.join(map(str, self.view_box)))
+        svg_args.update(self.svg_args)
+        self.output.write(XML_HEADER)
+        self.output.write(SVG_START)
+        self.context.write_svg_document_args(self, svg_args, self.output)
+        self.output.write('>\n')
+
+    def append(self, element, *, z=None):
+        """
+        Write an element (and any defs it refers to that haven't been written yet)
+        :param element: drawsvg element
+        :param z: not supported, since elements are written in the order they are appended
+        """
+        assert z is None, 'A StreamingDrawing can only draw elements in the order they are appended'
+        assert not self.closed, 'Cannot append to a StreamingDrawing that has been closed'
+        if not self.started:
+            self.start()
+        local = types.LocalContext(self.context, element, self, ())
+        defs = StringIO()
+        element.write_svg_defs(self.id_map, self.def_already_written, defs, local, False)
+        if defs.getvalue():
+            self.output.write('<defs>\n' + defs.getvalue() + '</defs>\n')
+        element.write_svg_element(self.id_map, lambda e: id(e) in self.written_def_ids,
+                                  self.output, local, False)
+        self.output.write('\n')
+        self.element_count += 1
+
+    def close(self):
+        """
+        Finish the SVG file (and close it, if StreamingDrawing opened it)
+        """
+        if self.closed:
+            return
+        if not self.started:
+            self.start()
+        self.output.write(SVG_END)
+        self.output.flush()
+        if self.owns_output:
+            self.output.close()
+        self.closed = True
+
+    def as_svg(self, *args, **kwargs):
+        raise TypeError('A StreamingDrawing has already streamed its elements to its output, '
+                        "so it can't be written again")
+
+    def save_svg(self, *args, **kwargs):
+        self.as_svg() # before draw.Drawing.save_svg opens (and empties) the file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+if __name__ == '__main__':
+    doctest.testmod()
@@ -0,0 +1,420 @@
+"""
+Write smaller SVGs.
+
+drawsvg writes every coordinate as a full float (166.66666666666666), every attribute it was given
+(stroke-width="0" on shapes with no stroke), and the same fill and stroke on every element that uses them.
+Thousands of flags that way add up. export_svg writes a drawing out with
+- coordinates rounded to a precision relative to the size of the canvas, e.g. with precision 5 a 500x300 flag
+  gets 2 decimal places, so nothing moves by more than 0.005 pixels
+- attributes that are the same as their default (or as what they'd inherit) left out, along with stroke
+  attributes on shapes that have no stroke
+- fill/stroke combinations that several elements share moved into classes in a <style>
+- paths that are drawn several times (moved, scaled or mirrored) written once in <defs> and drawn with <use>
+- no whitespace between elements
+and write_svg saves it, optionally gzipped as .svgz.
+
+>>> d = draw.Drawing(500, 300)
+>>> line_width = draw_vees(d, ['#FF0000', '#FFFFFF']*3)
+>>> d.elements[1].args['d']
+'M45.45454545454545,0.0 L250.0,245.75454545454548 L454.54545454545456,0.0 L409.0909090909091,0.0 L250.0,190.90909090909093 L90.9090909090909,0.0 L45.45454545454545,0.0 Z'
+>>> svg = export_svg(d)
+>>> svg[:svg.index('/>', svg.index('/>') + 2) + 2]
+'<svg xmlns="http://www.w3.org/2000/svg" width="500" height="300" viewBox="0 0 500 300"><path d="M0,0L250,300.3L500,0L454.55,0L250,245.45L45.45,0L0,0Z" fill="#FF0000" /><path d="M45.45,0L250,245.75L454.55,0L409.09,0L250,190.91L90.91,0L45.45,0Z" fill="#FFFFFF" />'
+>>> round(len(svg) / len(d.as_svg()), 2)
+0.41
+"""
+
+import gzip
+import math
+import re
+import xml.etree.ElementTree as ElementTree
+
+from svg_paths import *
+
+XLINK_NAMESPACE = '{http://www.w3.org/1999/xlink}'
+ElementTree.register_namespace('', SVG_NAMESPACE.strip('{}'))
+ElementTree.register_namespace('xlink', XLINK_NAMESPACE.strip('{}'))
+
+COORDINATE_PRECISION = 5 # significant figures of the largest coordinate on the canvas
+
+# attributes that are positions or lengths on the canvas, and so are rounded to the coordinate precision
+COORDINATE_ATTRIBUTES = ['x', 'y', 'width', 'height', 'cx', 'cy', 'r', 'rx', 'ry', 'fx', 'fy',
+                         'x1', 'y1', 'x2', 'y2', 'd', 'points', 'stroke-width', 'font-size',
+                         'stroke-dasharray', 'stroke-dashoffset']
+
+# attributes that are numbers but not coordinates (angles, scales...), rounded to the same significant figures
+NUMBER_ATTRIBUTES = ['transform', 'gradientTransform', 'offset', 'opacity', 'fill-opacity', 'stroke-opacity',
+                     'stop-opacity']
+
+# inherited properties and their initial values
+INHERITED_DEFAULTS = {'fill': 'black', 'fill-opacity': '1', 'fill-rule': 'nonzero',
+                      'stroke': 'none', 'stroke-width': '1', 'stroke-opacity': '1', 'stroke-linecap': 'butt',
+                      'stroke-linejoin': 'miter', 'stroke-miterlimit': '4', 'stroke-dasharray': 'none',
+                      'stroke-dashoffset': '0'}
+
+STROKE_ATTRIBUTES = [name for name in INHERITED_DEFAULTS if name.startswith('stroke-')]
+
+# attributes of shapes that default to 0 (they don't on gradients, so those are left alone)
+ZERO_DEFAULTS = ['x', 'y', 'cx', 'cy']
+
+SHAPE_TAGS = ['rect', 'circle', 'ellipse', 'line', 'path', 'polygon', 'polyline', 'use', 'image', 'text', 'g']
+
+# the attributes that can be moved into classes
+STYLE_ATTRIBUTES = list(INHERITED_DEFAULTS) + ['opacity']
+
+NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+# elements whose contents inherit from wherever they're used rather than from their parents
+REFERENCED_TAGS = ['defs', 'symbol', 'clipPath', 'mask', 'pattern', 'marker']
+
+# elements whose text is part of the drawing
+TEXT_TAGS = ['text', 'tspan', 'textPath', 'style', 'title', 'desc']
+
+# the ways a repeated path can be flipped, tried in this order
+MIRRORS = [(1, 1), (-1, 1), (1, -1), (-1, -1)]
+
+SHAPE_KEY_DECIMALS = 6 # paths are the same shape if they match to this many places once scaled to a unit box
+
+# attributes that are worked out after the transform, so would move with a shared path
+PLACED_ATTRIBUTES = ['clip-path', 'mask', 'filter']
+
+
+def get_decimal_places(width, height, precision=COORDINATE_PRECISION):
+    """
+    :return: how many decimal places coordinates need to keep precision significant figures across the canvas
+    >>> get_decimal_places(500, 300), get_decimal_places(5000, 3000), get_decimal_places(50, 30, precision=1)
+    (2, 1, 0)
+    """
+    return max(0, precision - len(str(int(max(abs(width), abs(height))))))
+
+
+def format_rounded(value, decimal_places):
+    """
+    Write a number with at most decimal_places decimal places, and nothing that isn't needed
+    >>> format_rounded(166.66666666666666, 2), format_rounded(-0.5, 2), format_rounded(-0.001, 2), format_rounded(20.0, 2)
+    ('166.67', '-.5', '0', '20')
+    """
+    text = f'{value:.{decimal_places}f}'
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    if text.startswith('0.'):
+        text = text[1:]
+    elif text.startswith('-0.'):
+        text = '-' + text[2:]
+    return '0' if text == '-0' else text
+
+
+def format_significant(value, precision):
+    """
+    Write a number to precision significant figures, for numbers that aren't coordinates
+    >>> format_significant(0.7071067811865476, 5), format_significant(-1.0, 5), format_significant(1e-20, 5)
+    ('.70711', '-1', '0')
+    """
+    if abs(value) < 1e-9:
+        return '0'
+    return format_rounded(value, max(0, precision - 1 - math.floor(math.log10(abs(value)))))
+
+
+def round_numbers(text, format_number):
+    """
+    :return: text with every number in it rewritten by format_number
+    """
+    return NUMBER.sub(lambda match: format_number(float(match.group())), text)
+
+
+def compact_path_data(path_data):
+    """
+    Leave out the spaces and commas path data doesn't need
+    >>> compact_path_data('M 10,-5 L 20 , 30 Z')
+    'M10-5L20,30Z'
+    """
+    path_data = re.sub(r'\s*,\s*|\s+', ',', path_data.strip())
+    path_data = re.sub(r',?([A-Za-z]),?', r'\1', path_data)
+    return re.sub(r',(?=-)', '', path_data)
+
+
+def get_class_name(i):
+    """
+    :return: a short class name for the i-th class: a, b... z, ba, bb...
+    """
+    name = ''
+    while True:
+        name = 'abcdefghijklmnopqrstuvwxyz'[i % 26] + name
+        i //= 26
+        if i == 0:
+            return name
+
+
+def simplify_element(element, inherited, decimal_places, precision, minify):
+    """
+    Round the numbers in an element and its children, and (if minify) leave out attributes that change nothing
+    :param inherited: the values of the inherited properties the element would get from its parent,
+    or None if that depends on where it's used
+    """
+    tag = element.tag.split('}')[-1]
+    if tag in REFERENCED_TAGS:
+        inherited = None
+    in_bounding_box = tag.endswith('Gradient') and element.get('gradientUnits') != 'userSpaceOnUse'
+    for name, value in list(element.attrib.items()):
+        if name in COORDINATE_ATTRIBUTES and not in_bounding_box:
+            value = round_numbers(value, lambda n: format_rounded(n, decimal_places))
+            if name == 'd' and minify:
+                value = compact_path_data(value)
+        elif name in NUMBER_ATTRIBUTES or (name in COORDINATE_ATTRIBUTES and in_bounding_box):
+            value = round_numbers(value, lambda n: format_significant(n, precision))
+        element.set(name, value)
+
+    if minify:
+        for name, value in list(element.attrib.items()):
+            if name in INHERITED_DEFAULTS:
+                if inherited is not None and value.lower() == inherited[name].lower():
+                    del element.attrib[name]
+            elif tag in SHAPE_TAGS and ((name in ZERO_DEFAULTS and value == '0') or (name == 'opacity' and value == '1')
+                                        or (name == 'transform' and not value.strip())):
+                del element.attrib[name]
+        # a shape with no stroke doesn't need to say how it isn't stroked
+        stroke = element.get('stroke', inherited and inherited['stroke'])
+        if tag in SHAPE_TAGS and tag != 'g' and len(element) == 0 and stroke == 'none':
+            for name in STROKE_ATTRIBUTES:
+                element.attrib.pop(name, None)
+        if tag not in TEXT_TAGS:
+            element.text = None
+        element.tail = None
+
+    if inherited is not None:
+        inherited = dict(inherited)
+        inherited.update({name: element.get(name) for name in INHERITED_DEFAULTS if element.get(name) is not None})
+    for child in element:
+        simplify_element(child, inherited, decimal_places, precision, minify)
+
+
+def move_styles_into_classes(root):
+    """
+    Replace fill/stroke attributes that several elements share with a class, defined in a <style> at the top
+    :param root: the <svg> element
+    :return: how many classes were made
+    >>> root = ElementTree.fromstring('<svg xmlns="http://www.w3.org/2000/svg">' + 3*'<circle r="5" fill="red" '
+    ...                               'stroke="black" stroke-width="2" />' + '<rect width="5" fill="red" /></svg>')
+    >>> move_styles_into_classes(root)
+    1
+    >>> ElementTree.tostring(root, encoding='unicode')[40:]
+    '<style>.a{fill:red;stroke:black;stroke-width:2}</style><circle r="5" class="a" /><circle r="5" class="a" /><circle r="5" class="a" /><rect width="5" fill="red" /></svg>'
+    """
+    uses = {}
+    for element in root.iter():
+        if element.tag.split('}')[-1] not in SHAPE_TAGS or element.get('class') is not None:
+            continue
+        style = tuple((name, element.get(name)) for name in STYLE_ATTRIBUTES if element.get(name) is not None)
+        if style:
+            uses.setdefault(style, []).append(element)
+
+    rules = []
+    for style, elements in uses.items():
+        attribute_bytes = sum(len(f' {name}="{value}"') for name, value in style)
+        class_name = get_class_name(len(rules))
+        rule = f'.{class_name}{{' + ';'.join(f'{name}:{value}' for name, value in style) + '}'
+        if len(elements)*attribute_bytes <= len(rule) + len(elements)*len(f' class="{class_name}"'):
+            continue
+        rules.append(rule)
+        for element in elements:
+            for name, value in style:
+                del element.attrib[name]
+            element.set('class', class_name)
+    if rules:
+        style_element = ElementTree.Element(SVG_NAMESPACE + 'style')
+        style_element.text = ''.join(rules)
+        root.insert(0, style_element)
+    return len(rules)
+
+
+def get_shape_key(path):
+    """
+    What a path looks like once its size and position are taken away, so that paths that are the same shape
+    (like the stars of the Southern Cross) have the same key
+    :param path: SvgPath
+    :return: key, and the (x, y) of the corner and the size of the box it was scaled down from, or None if it's flat
+    """
+    x_min, y_min, x_max, y_max = path.get_bounds()
+    size = max(x_max - x_min, y_max - y_min)
+    if size <= 0:
+        return None
+    unit = path.placed(1/size, 1/size, -x_min/size, -y_min/size)
+    return (path.commands, tuple(np.round(unit.numbers, SHAPE_KEY_DECIMALS).tolist())), (x_min, y_min, size)
+
+
+def format_placement(scale_x, scale_y, x_offset, y_offset):
+    """
+    :return: the shortest transform that scales by scale_x and scale_y and then moves by the offsets
+    >>> format_placement(1, 1, 0, 0), format_placement(1, 1, 20, 0), format_placement(-2, 2, 5, 0)
+    ('', 'translate(20 0)', 'matrix(-2 0 0 2 5 0)')
+    """
+    if scale_x == 1 and scale_y == 1:
+        if x_offset == 0 and y_offset == 0:
+            return ''
+        return f'translate({x_offset:g} {y_offset:g})'
+    return f'matrix({scale_x:g} 0 0 {scale_y:g} {x_offset:g} {y_offset:g})'
+
+
+def share_repeated_paths(root, decimal_places=17):
+    """
+    Write each path that's drawn more than once (moved, scaled or mirrored) into <defs> once,
+    and draw every copy of it with a <use>, so that e.g. the four stars of the Southern Cross are one path
+    :param root: the <svg> element
+    :param decimal_places: what the path data will be rounded to, to work out whether sharing it saves anything
+    :return: how many paths were shared
+    >>> d = draw.Drawing(500, 300)
+    >>> flag = [10.125, 10.125, 60.875, 10.125, 60.875, 40.625, 30.375, 40.625, 30.375, 80.875, 10.125, 80.875]
+    >>> d.append(draw.Lines(*flag, close=True, fill='red'))
+    >>> d.append(draw.Lines(*[v + 100 for v in flag], close=True, fill='green')) # moved
+    >>> d.append(draw.Lines(*[v*2 for v in flag], close=True, fill='blue')) # bigger
+    >>> d.append(draw.Lines(*[500 - v if i % 2 == 0 else v for i, v in enumerate(flag)], close=True)) # mirrored
+    >>> root = ElementTree.fromstring(d.as_svg())
+    >>> share_repeated_paths(root)
+    1
+    >>> [element.get('transform') for element in root.iter(SVG_NAMESPACE + 'use')]
+    [None, 'translate(100 100)', 'matrix(2 0 0 2 0 0)', 'matrix(-1 0 0 1 500 0)']
+    """
+    groups = {} # shape key: list of (element, mirror, corner, size, stroke, stroke_width, dashed)
+
+    def visit(element, stroke, stroke_width, dashed):
+        tag = element.tag.split('}')[-1]
+        if tag in REFERENCED_TAGS:
+            return
+        stroke = element.get('stroke', stroke)
+        stroke_width = element.get('stroke-width', stroke_width)
+        dashed = dashed or element.get('stroke-dasharray', 'none') != 'none'
+        if tag == 'path' and element.get('d') and element.get('id') is None:
+            path = SvgPath.from_path_data(element.get('d'))
+            shapes = [(mirror, get_shape_key(path.placed(*mirror, 0, 0))) for mirror in MIRRORS]
+            if shapes[0][1] is not None:
+                # join the first shape it's a mirror image of, or start a new one
+                mirror, (key, (x, y, size)) = next((shape for shape in shapes if shape[1][0] in groups), shapes[0])
+                groups.setdefault(key, []).append((element, mirror, (x, y), size, stroke, stroke_width, dashed))
+        for child in element:
+            visit(child, stroke, stroke_width, dashed)
+
+    visit(root, INHERITED_DEFAULTS['stroke'], INHERITED_DEFAULTS['stroke-width'], False)
+
+    used_ids = {element.get('id') for element in root.iter() if element.get('id') is not None}
+    # the first <use> also needs xmlns:xlink on the <svg>, if nothing else uses it
+    namespace_bytes = len(f' xmlns:xlink="{XLINK_NAMESPACE.strip("{}")}"')
+    if any(name.startswith(XLINK_NAMESPACE) for element in root.iter() for name in element.attrib):
+        namespace_bytes = 0
+    defs = None
+    shared = 0
+    for copies in groups.values():
+        first, first_mirror, (first_x, first_y), first_size = copies[0][:4]
+        placements = []
+        for element, mirror, (x, y), size, stroke, stroke_width, dashed in copies:
+            # the path is mirror * (scale * first path + offset), since each mirror is its own inverse
+            scale = size / first_size
+            if abs(scale - 1) < 1e-9:
+                scale = 1
+            placement = (mirror[0]*scale, mirror[1]*scale, mirror[0]*(x - scale*first_x), mirror[1]*(y - scale*first_y))
+            if element is not first:
+                if any('url(' in element.get(name, '') for name in ['fill', 'stroke']) or \
+                        any(element.get(name) is not None for name in PLACED_ATTRIBUTES):
+                    continue # these would be placed along with it
+                if scale != 1 and (dashed or stroke != 'none' and PATH_NUMBER.fullmatch(stroke_width.strip()) is None):
+                    continue # can't work out what the stroke would be scaled to
+            placements.append((element, placement, stroke, stroke_width, scale))
+        # worth it if the copies of the path data left out are longer than the <use>s and <defs> that replace them
+        path_bytes = len(compact_path_data(round_numbers(first.get('d'), lambda n: format_rounded(n, decimal_places))))
+        use_bytes = sum(len(' xlink:href="#a"') + len(format_placement(*placement)) + len(' transform=""')
+                        for element, placement, stroke, stroke_width, scale in placements)
+        if len(placements) < 2 or (len(placements) - 1)*path_bytes <= len('<path id="a" />') + use_bytes + namespace_bytes:
+            continue
+        namespace_bytes = 0
+
+        if defs is None:
+            defs = root.find(SVG_NAMESPACE + 'defs')
+            if defs is None:
+                defs = ElementTree.Element(SVG_NAMESPACE + 'defs')
+                root.insert(0, defs)
+        i = len(used_ids)
+        while get_class_name(i) in used_ids:
+            i += 1
+        path_id = get_class_name(i)
+        used_ids.add(path_id)
+        ElementTree.SubElement(defs, SVG_NAMESPACE + 'path', {'id': path_id, 'd': first.get('d')})
+        for element, placement, stroke, stroke_width, scale in placements:
+            element.tag = SVG_NAMESPACE + 'use'
+            del element.attrib['d']
+            element.set(XLINK_NAMESPACE + 'href', '#' + path_id)
+            if scale != 1 and stroke != 'none':
+                # the stroke is scaled along with the path
+                element.set('stroke-width', repr(float(stroke_width) / scale))
+            # the element's own transform goes on the outside
+            transform = ' '.join(t for t in [element.get('transform', '').strip(), format_placement(*placement)] if t)
+            if transform:
+                element.set('transform', transform)
+        shared += 1
+    return shared
+
+
+def export_svg(d, precision=COORDINATE_PRECISION, minify=True, share_paths=True):
+    """
+    :param d: Drawing object
+    :param precision: significant figures of the largest coordinate on the canvas (see get_decimal_places),
+    or None to keep every digit
+    :param minify: whether to leave out defaults and whitespace, and use classes for shared styles
+    :param share_paths: whether to write repeated paths once and <use> them (see share_repeated_paths)
+    :return: SVG text
+    """
+    svg = d.as_svg()
+    if precision is None and not minify and not share_paths:
+        return svg
+    root = ElementTree.fromstring(svg)
+    if precision is None:
+        decimal_places, precision = 17, 17
+    else:
+        view_box = d.view_box
+        decimal_places = get_decimal_places(view_box[2], view_box[3], precision)
+    if share_paths:
+        share_repeated_paths(root, decimal_places)
+    simplify_element(root, INHERITED_DEFAULTS, decimal_places, precision, minify)
+    if minify:
+        for defs in root.findall(SVG_NAMESPACE + 'defs'):
+            if len(defs) == 0:
+                root.remove(defs)
+        move_styles_into_classes(root)
+        return ElementTree.tostring(root, encoding='unicode')
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + ElementTree.tostring(root, encoding='unicode') + '\n'
+
+
+def write_svg(d, filename, precision=COORDINATE_PRECISION, minify=True, share_paths=True, svgz=False, sink=None):
+    """
+    Save a drawing with export_svg
+    :param filename: where to save it. If svgz, it's gzipped, and should end in .svgz
+    :param sink: where to write it (see flag_output.py), or None to write it straight to disk
+    :return: dictionary of how big it would have been, how big it is, and how precise its coordinates are
+    """
+    original = d.as_svg().encode('utf-8')
+    data = export_svg(d, precision=precision, minify=minify, share_paths=share_paths).encode('utf-8')
+    if svgz:
+        data = gzip.compress(data, mtime=0)
+    if sink is not None:
+        sink.write(filename, data)
+    else:
+        with open(filename, 'wb') as f:
+            f.write(data)
+    view_box = d.view_box
+    decimal_places = None if precision is None else get_decimal_places(view_box[2], view_box[3], precision)
+    return {'filename': filename, 'original_bytes': len(original), 'bytes': len(data),
+            'decimal_places': decimal_places,
+            'max_error': None if decimal_places is None else 0.5 * 10**-decimal_places}
+
+
+def format_export_report(report):
+    """
+    :param report: dictionary returned by write_svg
+    :return: one line describing how much smaller the file is, and how precise
+    >>> format_export_report({'filename': 'svg/intersex.svg', 'original_bytes': 1000, 'bytes': 400,
+    ...                       'decimal_places': 2, 'max_error': 0.005})
+    'svg/intersex.svg: 1000 -> 400 bytes (60% smaller), coordinates to 2 decimal places (within 0.005px)'
+    """
+    saving = 1 - report['bytes'] / report['original_bytes']
+    line = f"{report['filename']}: {report['original_bytes']} -> {report['bytes']} bytes ({saving:.0%} smaller)"
+    if report['decimal_places'] is None:
+        return line + ', coordinates at full precision'
+    return line + f", coordinates to {report['decimal_places']} decimal places (within {report['max_error']:g}px)"
@@ -0,0 +1,296 @@
+"""
+Read SVG path data at run time, rather than turning it into Python to paste into a drawing function.
+
+An SvgPath is a string of command letters and one numpy array of all the numbers in the path.
+Every command is made absolute when it's read (and H and V become L), so the whole path can be
+moved, scaled, rotated or flipped in one go and written straight back out as path data.
+A traced symbol is then just data: its path data (or the SVG file it came from) and the area it
+was traced in, added as a template (see path_templates.py) and drawn like any other.
+
+>>> p = SvgPath.from_path_data('m 10,10 h 20 v 10 l -20,0 z')
+>>> p.commands, p.points.tolist()
+('MLLLZ', [[10.0, 10.0], [30.0, 10.0], [30.0, 20.0], [10.0, 20.0]])
+>>> p.transformed(2, 0, 0, 2, 5, 0).to_path_data()
+'M25.0,20.0 L65.0,20.0 L65.0,40.0 L25.0,40.0 Z'
+>>> p.normalised().to_path_data(precision=2)
+'M0.00,0.00 L1.00,0.00 L1.00,1.00 L0.00,1.00 Z'
+>>> template = add_svg_template('box', 'M 10,10 h 20 v 10 h -20 z', 40, 40)
+>>> place_path_template(template, 4, 4, 0, 0)
+'M1.0,1.0 L3.0,1.0 L3.0,2.0 L1.0,2.0 Z'
+>>> del TEMPLATES['box']
+"""
+
+import functools
+import os
+import re
+import xml.etree.ElementTree as ElementTree
+
+from optimise_layers import *
+
+SVG_NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+
+PATH_SEGMENT = re.compile(r'([MmLlHhVvCcSsQqTtAaZz])([^MmLlHhVvCcSsQqTtAaZz]*)')
+
+PATH_NUMBER = re.compile(SVG_NUMBER)
+
+# the flags of an arc are single digits, and don't have to be separated from what comes after them
+ARC_ARGUMENTS = re.compile(r'[\s,]*'.join([f'({SVG_NUMBER})']*3 + ['([01])']*2 + [f'({SVG_NUMBER})']*2))
+
+SVG_NAMESPACE = '{http://www.w3.org/2000/svg}'
+
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+
+def parse_path_data(path_data):
+    """
+    Read SVG path data, with any of the commands, relative or absolute
+    :param path_data: string, e.g. 'm 0,0 h 10 a 5 5 0 1010,0 z'
+    :return: command letters (all absolute, with H and V made into L), list of the numbers in the path
+    >>> parse_path_data('m 0,0 h 10 a 5 5 0 1010,0 z')
+    ('MLAZ', [0.0, 0.0, 10.0, 0.0, 5.0, 5.0, 0.0, 1.0, 0.0, 20.0, 0.0])
+    >>> parse_path_data('M 0,0 1,1 c 1,1 2,2 3,3 s 1,1 2,2')
+    ('MLCS', [0.0, 0.0, 1.0, 1.0, 2.0, 2.0, 3.0, 3.0, 4.0, 4.0, 5.0, 5.0, 6.0, 6.0])
+    >>> parse_path_data('M 0,0 C 1,2 3,4')
+    Traceback (most recent call last):
+    ...
+    ValueError: C takes 6 numbers, not 4
+    """
+    commands = []
+    numbers = []
+    x = y = start_x = start_y = 0.0
+    position = 0
+    for match in PATH_SEGMENT.finditer(path_data):
+        if path_data[position:match.start()].strip(' \t\r\n,'):
+            raise ValueError(f'{path_data[position:match.start()]!r} is not path data')
+        position = match.end()
+        cmd, text = match.groups()
+        upper = cmd.upper()
+        number_pattern = ARC_ARGUMENTS if upper == 'A' else PATH_NUMBER
+        if number_pattern.sub('', text).strip(' \t\r\n,'):
+            raise ValueError(f'{cmd}{text} has something in it that is not a number')
+        args = [float(v) for v in (PATH_NUMBER.findall(text) if upper != 'A' else
+                                   [v for arc in ARC_ARGUMENTS.findall(text) for v in arc])]
+        n = PATH_COMMAND_ARGS[upper]
+        if n == 0:
+            if args:
+                raise ValueError(f'{cmd} takes no numbers')
+            commands.append('Z')
+            x, y = start_x, start_y
+            continue
+        if not args or len(args) % n:
+            raise ValueError(f'{cmd} takes {n} numbers, not {len(args)}')
+        for i in range(0, len(args), n):
+            dx, dy = (x, y) if cmd != upper else (0.0, 0.0)
+            values = args[i:i+n]
+            if upper == 'H':
+                values = [values[0] + dx, y]
+            elif upper == 'V':
+                values = [x, values[0] + dy]
+            elif upper == 'A':
+                values = values[:ARC_PARAMETERS] + [values[5] + dx, values[6] + dy]
+            else:
+                values = [v + (dy if k % 2 else dx) for k, v in enumerate(values)]
+            # H and V are lines, and so are any extra points after an M
+            command = 'L' if upper in 'HV' or (upper == 'M' and i > 0) else upper
+            commands.append(command)
+            numbers.extend(values)
+            x, y = values[-2], values[-1]
+            if command == 'M':
+                start_x, start_y = x, y
+    if path_data[position:].strip(' \t\r\n,'):
+        raise ValueError(f'{path_data[position:]!r} is not path data')
+    if not commands or commands[0] != 'M':
+        raise ValueError('path data has to start with M or m')
+    return ''.join(commands), numbers
+
+
+@functools.lru_cache(maxsize=1024)
+def get_path_layout(commands):
+    """
+    Where each kind of number is in the numbers of a path with these commands
+    :param commands: command letters, e.g. 'MLCZ'
+    :return: indices of the x coordinates, the y coordinates, and the first parameter of each arc
+    >>> [a.tolist() for a in get_path_layout('MLAZ')]
+    [[0, 2, 9], [1, 3, 10], [4]]
+    """
+    xs, arcs = [], []
+    position = 0
+    for cmd in commands:
+        if cmd == 'A':
+            arcs.append(position)
+            position += ARC_PARAMETERS
+        for i in range(COMMAND_POINTS[cmd]):
+            xs.append(position)
+            position += 2
+    xs = np.array(xs, dtype=np.intp)
+    return xs, xs + 1, np.array(arcs, dtype=np.intp)
+
+
+class SvgPath:
+    """
+    A path held as its command letters (all absolute, with no H or V) and a numpy array of its numbers
+    """
+
+    def __init__(self, commands, numbers):
+        """
+        :param commands: command letters, e.g. 'MCZ'
+        :param numbers: all the numbers in the path, in order (for an arc: rx, ry, rotation, large_arc, sweep, x, y)
+        """
+        self.commands = commands
+        self.numbers = np.asarray(numbers, dtype=np.float64)
+        self.x_index, self.y_index, self.arc_index = get_path_layout(commands)
+        expected = len(self.x_index)*2 + len(self.arc_index)*ARC_PARAMETERS
+        if len(self.numbers) != expected:
+            raise ValueError(f'{commands} takes {expected} numbers, not {len(self.numbers)}')
+
+    @classmethod
+    def from_path_data(cls, path_data):
+        """
+        :param path_data: SVG path data string, with any of the commands
+        :return: SvgPath
+        """
+        return cls(*parse_path_data(path_data))
+
+    def __repr__(self):
+        return f'SvgPath.from_path_data({self.to_path_data()!r})'
+
+    @property
+    def points(self):
+        """
+        :return: array of the (x, y) of every point in the path, control points included
+        """
+        return np.column_stack((self.numbers[self.x_index], self.numbers[self.y_index]))
+
+    def get_bounds(self):
+        """
+        The box around every point in the path, control points included. That's a box around any curves,
+        since they stay inside their control points, but arcs can bulge out of it.
+        :return: x_min, y_min, x_max, y_max
+        """
+        xs, ys = self.numbers[self.x_index], self.numbers[self.y_index]
+        return float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max())
+
+    def transformed(self, a, b, c, d, e, f):
+        """
+        Apply an affine transformation, the same as an SVG transform of matrix(a, b, c, d, e, f):
+        x becomes a*x + c*y + e and y becomes b*x + d*y + f
+        :return: new SvgPath
+        >>> SvgPath.from_path_data('M 0,0 A 10,5 0 0 1 20,0').transformed(0, 1, -1, 0, 0, 0).to_path_data(precision=1)
+        'M0.0,0.0 A10.0,5.0,90.0,0,1,0.0,20.0'
+        """
+        numbers = self.numbers.copy()
+        xs, ys = self.numbers[self.x_index], self.numbers[self.y_index]
+        numbers[self.x_index] = a*xs + c*ys + e
+        numbers[self.y_index] = b*xs + d*ys + f
+        if len(self.arc_index):
+            arcs = self.numbers[self.arc_index[:, None] + np.arange(ARC_PARAMETERS)]
+            rx, ry, rotation, large_arc, sweep = arcs.T
+            if b == 0 and c == 0 and np.all(rotation % 90 == 0):
+                # stays lined up with the axes, so only the radii change
+                sideways = rotation % 180 == 90
+                rx, ry = (np.where(sideways, abs(d), abs(a))*rx, np.where(sideways, abs(a), abs(d))*ry)
+            else:
+                # the ellipse is the unit circle through rotate(rotation) scale(rx, ry), and then the matrix
+                radians = np.radians(rotation)
+                cos, sin = np.cos(radians), np.sin(radians)
+                ellipse = np.empty((len(rx), 2, 2))
+                ellipse[:, 0, 0], ellipse[:, 0, 1] = cos*rx, -sin*ry
+                ellipse[:, 1, 0], ellipse[:, 1, 1] = sin*rx, cos*ry
+                u, radii, vt = np.linalg.svd(np.array([[a, c], [b, d]]) @ ellipse)
+                rx, ry = radii[:, 0], radii[:, 1]
+                rotation = np.degrees(np.arctan2(u[:, 1, 0], u[:, 0, 0])) % 180
+            if a*d - b*c < 0: # a mirror image goes round the other way
+                sweep = 1 - sweep
+            numbers[self.arc_index[:, None] + np.arange(ARC_PARAMETERS)] = np.column_stack(
+                (rx, ry, rotation, large_arc, sweep))
+        return SvgPath(self.commands, numbers)
+
+    def placed(self, x_scale, y_scale, x_offset, y_offset):
+        """
+        Scale and move the path: x becomes x_offset + x*x_scale, and similarly for y
+        :return: new SvgPath
+        """
+        return self.transformed(x_scale, 0, 0, y_scale, x_offset, y_offset)
+
+    def normalised(self, box=None):
+        """
+        Scale and move the path so that a box around it becomes the unit square
+        :param box: x, y, width, height of the box (e.g. the viewBox it was traced in). Defaults to get_bounds
+        :return: new SvgPath
+        """
+        if box is None:
+            x_min, y_min, x_max, y_max = self.get_bounds()
+            box = (x_min, y_min, x_max - x_min, y_max - y_min)
+        x, y, width, height = box
+        return self.placed(1/width, 1/height, -x/width, -y/height)
+
+    def to_path_data(self, precision=None):
+        """
+        :param precision: digits after the decimal point, or None to write numbers the same way drawsvg does
+        :return: SVG path data string
+        """
+        return format_path_data(self.commands, self.numbers, precision)
+
+    def to_drawsvg_path(self, precision=None, **kwargs):
+        """
+        :param kwargs: passed on to draw.Path, e.g. fill
+        :return: draw.Path
+        """
+        return draw.Path(self.to_path_data(precision), **kwargs)
+
+
+def add_svg_template(name, path_data, width=1.0, height=1.0):
+    """
+    Like add_path_template, but the path data can use any of the commands, relative ones included
+    :param name: name to look it up by in TEMPLATES
+    :param path_data: SVG path data, in the coordinates it was traced in
+    :param width: width of the area it was traced in
+    :param height: height of the area it was traced in
+    :return: the PathTemplate
+    """
+    return add_path_template(name, SvgPath.from_path_data(path_data).to_path_data(), width, height)
+
+
+def read_svg_paths(filename):
+    """
+    Read every path in an SVG file, with the transforms of the groups they're in applied
+    :param filename: name of an SVG file
+    :return: list of SvgPaths, (x, y, width, height) of the viewBox
+    """
+    root = ElementTree.parse(filename).getroot()
+    if root.get('viewBox'):
+        box = tuple(float(v) for v in re.split(r'[\s,]+', root.get('viewBox').strip()))
+    else:
+        box = (0.0, 0.0, float(PATH_NUMBER.match(root.get('width')).group()),
+               float(PATH_NUMBER.match(root.get('height')).group()))
+    paths = []
+
+    def visit(element, matrix):
+        if element.tag in [SVG_NAMESPACE + 'defs', SVG_NAMESPACE + 'clipPath', SVG_NAMESPACE + 'mask']:
+            return
+        transform = parse_transform(element.get('transform'))
+        if transform is None:
+            raise ValueError(f'{filename}: can\'t read the transform {element.get("transform")!r}')
+        matrix = compose_transforms(matrix, transform)
+        if element.tag == SVG_NAMESPACE + 'path' and element.get('d'):
+            path = SvgPath.from_path_data(element.get('d'))
+            paths.append(path if matrix == IDENTITY else path.transformed(*matrix))
+        for child in element:
+            visit(child, matrix)
+
+    visit(root, IDENTITY)
+    return paths, box
+
+
+def load_svg_templates(filename, name=None):
+    """
+    Add the paths in an SVG file to TEMPLATES, in the unit square that its viewBox becomes
+    :param filename: name of an SVG file
+    :param name: templates are called name_1, name_2... Defaults to the name of the file
+    :return: list of PathTemplates, in the order they're drawn in the file
+    """
+    if name is None:
+        name = os.path.splitext(os.path.basename(filename))[0]
+    paths, box = read_svg_paths(filename)
+    return [add_path_template(f'{name}_{i+1}', path.normalised(box).to_path_data())
+            for i, path in enumerate(paths)]
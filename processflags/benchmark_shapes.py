@@ -0,0 +1,238 @@
+"""
+Benchmarks for every drawing function in the shape registry (drawflags/shape_registry.py),
+at several canvas sizes and numbers of colours.
+
+Run from the top folder of the repository:
+
+    python processflags/benchmark_shapes.py --output output/benchmarks.json
+
+For each draw_* function, canvas width and number of colours it records
+- build_seconds: how long the function takes to add its shapes to the drawing
+- elements: how many elements it added (counting the ones inside groups)
+- svg_seconds: how long d.as_svg() takes
+- svg_bytes: how big the SVG is
+- png_seconds: how long the SVG takes to rasterise (None if there's nothing to rasterise it with, or with --no-png)
+
+Functions that take one or two colours rather than a list are only run once at each size. Times are the
+quickest of --repeat runs. Give a file written by an earlier run as the baseline to see what got slower or bigger:
+
+    python processflags/benchmark_shapes.py --baseline output/benchmarks.json --output output/benchmarks_new.json
+
+It exits with status 1 if anything is more than --threshold slower, or bigger at all (elements and SVG bytes
+don't depend on the machine, so any increase is a regression). It also times importing drawflags and its shape
+modules in a fresh interpreter, and exits with status 1 if that takes longer than drawflags.IMPORT_TIME_BUDGET.
+"""
+import argparse
+import colorsys
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, 'drawflags/')
+from instrumentation import *
+from shape_registry import *
+
+sys.path.insert(0, '.')
+import drawflags
+
+load_shapes() # import them all now, so the imports aren't timed
+
+WIDTHS = [100, 1000, 10000] # canvas widths, in pixels
+COLOUR_COUNTS = [1, 7, 200]
+ASPECT_RATIO = 5 / 3 # width / height of the canvas
+
+TIMINGS = ['build_seconds', 'svg_seconds', 'png_seconds']
+SIZES = ['elements', 'svg_bytes']
+TIME_THRESHOLD = 0.25 # how much slower something can get before it counts as a regression
+MIN_SECONDS = 0.002 # changes in times quicker than this are noise
+
+
+def get_colours(count):
+    """
+    :return: list of count colours, spread around the colour wheel
+    >>> get_colours(3)
+    ['#FF0000', '#00FF00', '#0000FF']
+    """
+    colours = []
+    for i in range(count):
+        r, g, b = colorsys.hsv_to_rgb(i / count, 1, 1)
+        colours.append('#%02X%02X%02X' % (round(r * 255), round(g * 255), round(b * 255)))
+    return colours
+
+
+def get_arguments(shape, width, height, colours):
+    """
+    :param shape: Shape from the registry
+    :return: dictionary of the arguments it needs (besides d) to draw it on a width x height canvas
+    >>> get_arguments(get_shape('draw_ring'), 500, 300, ['#FF0000'])
+    {'wid': 500, 'hei': 300, 'radius': 100.0, 'thickness': 30.0, 'ring_colour': '#FF0000', 'fill_colour': '#FF0000'}
+    >>> get_arguments(get_shape('draw_text'), 500, 300, ['#FF0000'])
+    {'text_to_add': 'Pride', 'primary_colour': '#FF0000'}
+    """
+    needed = {'wid': width, 'hei': height, 'radius': height / 3, 'thickness': height / 10,
+              'border_width': height / 20, 'text_to_add': 'Pride'}
+    arguments = {}
+    for name, default in get_defaults(shape.function).items():
+        if name == 'd' or default is not NO_DEFAULT:
+            continue
+        if name in ['colours', 'stripes']:
+            arguments[name] = colours
+        elif name in shape.colour_args:
+            arguments[name] = colours[0]
+        else:
+            arguments[name] = needed[name]
+    return arguments
+
+
+def benchmark_shape(shape, width, colours, repeat=5, png=True):
+    """
+    :param shape: Shape from the registry
+    :param width: width of the canvas, in pixels
+    :param colours: list of colours to draw it with
+    :param repeat: how many times to run it, keeping the quickest times
+    :param png: whether to time rasterising it
+    :return: dictionary of measurements (see the top of this file)
+    >>> result = benchmark_shape(get_shape('draw_horiz_bars'), 500, get_colours(6), repeat=1, png=False)
+    >>> result['elements'], result['svg_bytes'] > 0, result['png_seconds']
+    (6, True, None)
+    """
+    height = round(width / ASPECT_RATIO)
+    arguments = get_arguments(shape, width, height, colours)
+    result = dict.fromkeys(TIMINGS)
+    for _ in range(repeat):
+        d = draw.Drawing(width, height)
+        start = time.perf_counter()
+        shape.function(d, **arguments)
+        build_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        svg = d.as_svg()
+        svg_seconds = time.perf_counter() - start
+        png_seconds = None
+        if png:
+            start = time.perf_counter()
+            try:
+                get_session().render_svg(svg, width, height)
+                png_seconds = time.perf_counter() - start
+            except (ImportError, OSError): # no cairo
+                png = False
+        for name, seconds in zip(TIMINGS, [build_seconds, svg_seconds, png_seconds]):
+            if seconds is not None and (result[name] is None or seconds < result[name]):
+                result[name] = seconds
+    result['elements'] = sum(count_elements(element) for element in d.elements)
+    result['svg_bytes'] = len(svg.encode('utf-8'))
+    return result
+
+
+def run_benchmarks(shapes, widths=WIDTHS, colour_counts=COLOUR_COUNTS, repeat=5, png=True, log=None):
+    """
+    :param shapes: list of Shapes to benchmark
+    :param log: file to write a line to as each one finishes, or None
+    :return: dictionary of 'name widthpx ncolours' to its measurements, or to {'error': message} if it failed
+    """
+    results = {}
+    # so the first one doesn't include importing drawsvg and numpy, which are only imported once they're used
+    d = draw.Drawing(1, 1)
+    get_shape('draw_horiz_bars').function(d, get_colours(2))
+    d.as_svg()
+    np.zeros(1)
+    for shape in shapes:
+        counts = colour_counts if shape.colour_kind == COLOUR_LIST else [1]
+        for width in widths:
+            for count in counts:
+                key = f'{shape.name} {width}px {count}colours'
+                try:
+                    results[key] = benchmark_shape(shape, width, get_colours(count), repeat, png)
+                except Exception as e:
+                    results[key] = {'error': f'{type(e).__name__}: {e}'}
+                if log is not None:
+                    print(key, results[key], file=log, flush=True)
+    return results
+
+
+def compare_results(baseline, results, threshold=TIME_THRESHOLD):
+    """
+    :param baseline: results from an earlier run (see run_benchmarks)
+    :param results: results from this run
+    :param threshold: fraction that times can go up by before it counts
+    :return: list of (key, measurement, before, after) for everything that got slower or bigger
+    >>> before = {'draw_heart 100px 1colours': {'build_seconds': 0.010, 'svg_seconds': 0.0001, 'elements': 1}}
+    >>> after = {'draw_heart 100px 1colours': {'build_seconds': 0.020, 'svg_seconds': 0.0005, 'elements': 2}}
+    >>> compare_results(before, after)
+    [('draw_heart 100px 1colours', 'build_seconds', 0.01, 0.02), ('draw_heart 100px 1colours', 'elements', 1, 2)]
+    """
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        for name in TIMINGS + SIZES:
+            before, after = old.get(name), result.get(name)
+            if before is None or after is None:
+                continue
+            if name in SIZES:
+                slower = after > before
+            else:
+                slower = after > before * (1 + threshold) and after - before > MIN_SECONDS
+            if slower:
+                regressions.append((key, name, before, after))
+    return regressions
+
+
+def main(args):
+    shapes = find_shapes()
+    if args.shapes:
+        shapes = [shape for shape in shapes if any(pattern in shape.name for pattern in args.shapes)]
+    import_seconds = drawflags.measure_import_time()
+    results = run_benchmarks(shapes, args.widths, args.colours, args.repeat, not args.no_png,
+                             log=sys.stdout if args.verbose else None)
+    too_slow_to_import = import_seconds > drawflags.IMPORT_TIME_BUDGET
+    print(f'importing drawflags took {1000 * import_seconds:.1f}ms '
+          f'({"over" if too_slow_to_import else "within"} its {1000 * drawflags.IMPORT_TIME_BUDGET:.0f}ms budget)')
+    errors = [key for key, result in results.items() if 'error' in result]
+    print(f'{len(results)} benchmarks of {len(shapes)} shapes, {len(errors)} failed')
+    for key in errors:
+        print(f'  {key}: {results[key]["error"]}')
+    slowest = sorted((key for key in results if key not in errors),
+                     key=lambda key: results[key]['build_seconds'] + results[key]['svg_seconds'], reverse=True)
+    for key in slowest[:10]:
+        result = results[key]
+        print(f'  {key}: build {1000 * result["build_seconds"]:.1f}ms, {result["elements"]} elements, '
+              f'svg {1000 * result["svg_seconds"]:.1f}ms, {result["svg_bytes"]} bytes' +
+              (f', png {1000 * result["png_seconds"]:.1f}ms' if result['png_seconds'] is not None else ''))
+
+    if args.output:
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        meta = {'python': platform.python_version(), 'machine': platform.machine(), 'widths': args.widths,
+                'colours': args.colours, 'repeat': args.repeat, 'date': datetime.datetime.now().isoformat(),
+                'import_seconds': import_seconds}
+        with open(args.output, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare_results(baseline, results, args.threshold)
+        print(f'{len(regressions)} regressions against {args.baseline}')
+        for key, name, before, after in regressions:
+            print(f'  {key} {name}: {before:.6g} -> {after:.6g}')
+        return 1 if regressions or too_slow_to_import else 0
+    return 1 if too_slow_to_import else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark every drawing function')
+    parser.add_argument('--shapes', nargs='+', help='only the draw_* functions with any of these in their names')
+    parser.add_argument('--widths', nargs='+', type=int, default=WIDTHS, help='canvas widths, in pixels')
+    parser.add_argument('--colours', nargs='+', type=int, default=COLOUR_COUNTS, help='numbers of colours')
+    parser.add_argument('--repeat', type=int, default=5, help='runs of each, keeping the quickest')
+    parser.add_argument('--no-png', action='store_true', help="don't time rasterising")
+    parser.add_argument('-o', '--output', help='JSON file to write the results to')
+    parser.add_argument('--baseline', help='JSON file from an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=TIME_THRESHOLD,
+                        help='fraction times can go up by before they count as regressions')
+    parser.add_argument('-v', '--verbose', action='store_true', help='print each result as it finishes')
+    sys.exit(main(parser.parse_args()))
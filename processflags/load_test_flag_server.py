@@ -0,0 +1,95 @@
+"""
+Load test for the flag server (drawflags/flag_server.py).
+
+Run from the top folder of the repository. With no --port, a server is started in this process
+(rendering in a process pool) with the flags in drawflags/examples.toml:
+
+    python processflags/load_test_flag_server.py --requests 2000 --concurrency 50
+
+or against a server that's already running:
+
+    python -m drawflags serve drawflags/examples.toml --port 8000
+    python processflags/load_test_flag_server.py --port 8000
+
+Each client keeps its connection open and asks for random flags at random sizes,
+so there's a mix of cache hits, coalesced requests and renders.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, 'drawflags/')
+from flag_server import *
+
+
+def percentile(values, p):
+    """
+    >>> percentile([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 50)
+    5
+    """
+    ordered = sorted(values)
+    return ordered[max(0, round(p / 100 * len(ordered)) - 1)]
+
+
+async def run_client(host, port, targets, count, latencies, statuses):
+    connection = await asyncio.open_connection(host, port)
+    try:
+        for i in range(count):
+            start = time.perf_counter()
+            status, headers, body = await http_request(host, port, random.choice(targets), connection=connection)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+    finally:
+        connection[1].close()
+        await connection[1].wait_closed()
+
+
+async def load_test(host, port, targets, requests, concurrency):
+    """
+    :return: seconds taken, list of latencies, Counter of statuses
+    """
+    latencies, statuses = [], Counter()
+    per_client = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*[run_client(host, port, targets, n, latencies, statuses) for n in per_client if n])
+    return time.perf_counter() - start, latencies, statuses
+
+
+async def main(args):
+    server = None
+    if args.port is None:
+        server = FlagServer(load_manifest(EXAMPLES), workers=args.workers, cache_bytes=int(args.cache_mb * 2**20))
+        port = await server.start(args.host, 0)
+        names = list(server.catalogue)
+    else:
+        port = args.port
+        status, headers, body = await http_request(args.host, port, '/flags')
+        names = json.loads(body)
+    targets = [f'/flags/{name}.{filetype}?width={width}'
+               for name in names for filetype in args.formats for width in args.widths]
+
+    seconds, latencies, statuses = await load_test(args.host, port, targets, args.requests, args.concurrency)
+    print(f'{args.requests} requests ({len(targets)} different) from {args.concurrency} clients in {seconds:.2f}s: '
+          f'{args.requests / seconds:.0f} requests/s')
+    print('latency: ' + ', '.join(f'p{p} {1000 * percentile(latencies, p):.1f}ms' for p in (50, 95, 99, 100)))
+    print('statuses: ' + ', '.join(f'{status}: {n}' for status, n in sorted(statuses.items())))
+    status, headers, body = await http_request(args.host, port, '/stats')
+    print('server: ' + ', '.join(f'{key}: {value}' for key, value in json.loads(body).items()))
+    if server is not None:
+        await server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test the flag server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, help='port of a running server (default: start one here)')
+    parser.add_argument('-n', '--requests', type=int, default=1000)
+    parser.add_argument('-c', '--concurrency', type=int, default=20)
+    parser.add_argument('--formats', nargs='+', default=['svg'], help='svg and/or png')
+    parser.add_argument('--widths', nargs='+', type=int, default=[250, 500, 1000])
+    parser.add_argument('--workers', type=int, help='render processes for the server started here')
+    parser.add_argument('--cache-mb', type=float, default=64, help='cache size for the server started here')
+    asyncio.run(main(parser.parse_args()))
@@ -1,9 +1,18 @@
+import copy
 import doctest
 import sys
 import os
 sys.path.insert(0, 'drawflags/')
 from embedding_icons import *
-from IPython.display import Image
+from optimise_layers import *
+from path_booleans import *
+from streaming_canvas import *
+from svg_paths import *
+from svg_export import *
+from level_of_detail import *
+from png_export import *
+from flag_output import *
+from instrumentation import *
 
 def get_info_for_line(line_info, headers, keyword):
     """
@@ -75,33 +84,34 @@ def get_headers(f, DELIM='\t'):
 
 def separate_svg_path(s):
     """
-    Take a string representing an SVG path and turn it into a new string that
-    represents the path in drawsvg.
-    :param s: a path string. Must be all absolute.
-    :return:
+    Split a string representing an SVG path into its commands.
+    :param s: a path string, with any of the commands
+    :return: list of strings, one for each command
     >>> s = 'M233.14606,2008.031C659.81265,2747.0389999999998,1783.8721,2105.1105,1357.2055,1366.1024C1781.7582,619.3380099999999,2919.4029,1263.3265999999999,2484.9812,2004.3931M1366.1206,76.818124C507.12735,71.109224,498.21223,1371.7897,1357.2055,1366.1024M2637.1773000000003,1366.1184C2648.5952,-351.86798,65.859465,-351.90088,77.233765,1366.0864C88.458065,3061.4318,2625.91,3061.4641,2637.1773,1366.1184Z'
     >>> separate_svg_path(s)
     ['M233.14606,2008.031', 'C659.81265,2747.0389999999998,1783.8721,2105.1105,1357.2055,1366.1024', 'C1781.7582,619.3380099999999,2919.4029,1263.3265999999999,2484.9812,2004.3931', 'M1366.1206,76.818124', 'C507.12735,71.109224,498.21223,1371.7897,1357.2055,1366.1024', 'M2637.1773000000003,1366.1184', 'C2648.5952,-351.86798,65.859465,-351.90088,77.233765,1366.0864', 'C88.458065,3061.4318,2625.91,3061.4641,2637.1773,1366.1184', 'Z']
     >>> s = 'M 1366.1206,76.818124 C 507.12735,71.109224 498.21223,1371.7897 1357.2055,1366.1024'
     >>> separate_svg_path(s)
-    ['M1366.1206,76.818124', 'C507.12735,71.109224498.21223,1371.78971357.2055,1366.1024']
+    ['M1366.1206,76.818124', 'C507.12735,71.109224,498.21223,1371.7897,1357.2055,1366.1024']
+    >>> separate_svg_path('m 10,10 h 20 a 5 5 0 1010,0 z')
+    ['m10,10', 'h20', 'a5,5,0,1,0,10,0', 'z']
     """
-    s = s.replace(' ','')
     sections = []
-    curr_section = ''
-    for char in s:
-        if char in ['M', 'S', 'L', 'Z', 'C', 'Q', 'A', 'H']: # any others?
-            sections.append(curr_section)
-            curr_section = ''
-        curr_section += char
-    sections.append(curr_section)
-    return sections[1:]
+    for match in PATH_SEGMENT.finditer(s):
+        cmd, text = match.groups()
+        if cmd in 'Aa':
+            numbers = [v for arc in ARC_ARGUMENTS.findall(text) for v in arc]
+        else:
+            numbers = PATH_NUMBER.findall(text)
+        sections.append(cmd + ','.join(numbers))
+    return sections
 
 def parse_svg_path(s, rounding_precision=3, firstx=0, firsty=0, rounding_func=round, translate_x=0, translate_y=0):
     """
-    Take a string representing an SVG path and turn it into a new string that
-    represents the path in drawsvg.
-    :param s: a path string. Must be all absolute.
+    Take a string representing an SVG path and print drawsvg code that draws it, with each coordinate as a variable.
+    To draw a traced symbol you don't need to generate code: add it as a template with add_svg_template
+    or load_svg_templates (see svg_paths.py), and draw it with place_path_template.
+    :param s: a path string, with any of the commands. Relative ones are made absolute, and H and V become L.
     :return:
     >>> s = 'M233.14606,2008.031C659.81265,2747.0389999999998,1783.8721,2105.1105,1357.2055,1366.1024C1781.7582,619.3380099999999,2919.4029,1263.3265999999999,2484.9812,2004.3931M1366.1206,76.818124C507.12735,71.109224,498.21223,1371.7897,1357.2055,1366.1024M2637.1773000000003,1366.1184C2648.5952,-351.86798,65.859465,-351.90088,77.233765,1366.0864C88.458065,3061.4318,2625.91,3061.4641,2637.1773,1366.1184Z'
     >>> parse_svg_path(s, rounding_precision=-2)
@@ -168,38 +178,49 @@ def parse_svg_path(s, rounding_precision=3, firstx=0, firsty=0, rounding_func=ro
     p.C(x14, y16, x12, y16, x12, y4)
     p.Z()
     d.append(p)
+    >>> parse_svg_path('m 10,10 h 20 a 5 5 0 1010,0 z')
+    #x coordinates
+    x1 = x_start + 10.0*w
+    x2 = x_start + 30.0*w
+    x3 = x_start + 40.0*w
+    #y coordinates
+    y1 = y_start + 10.0*h
+    <BLANKLINE>
+    p.M(x1, y1)
+    p.L(x2, y1)
+    p.A(5.0*w, 5.0*h, 0.0, 1, 0, x3, y1)
+    p.Z()
+    d.append(p)
     """
-    s = s.replace(' ','')
-    sections = separate_svg_path(s)
-    varstart = {0:'x', 1:'y'}
+    path = SvgPath.from_path_data(s)
+    numbers = path.numbers.tolist()
     vars_seen = {'x':firstx, 'y':firsty}
     varnames = {'x':{}, 'y':{}}
     offsets = {'x':translate_x, 'y':translate_y}
 
+    def varname(axis, num):
+        vars_seen[axis] += 1
+        numval = rounding_func(num, rounding_precision) + offsets[axis]
+        if numval not in varnames[axis]:
+            varnames[axis][numval] = axis + str(vars_seen[axis])
+        return varnames[axis][numval]
+
     commands = []
-    for cm in sections:
-        cmd = cm[0]
-        nums = cm[1:].split(',')
+    position = 0
+    for cmd in path.commands:
         vars = []
-        if cmd not in ['Z']:
-            for i, num in enumerate(nums):
-                axis = varstart[i%2]
-                vars_seen[axis] += 1
-
-                numval = rounding_func(float(num), rounding_precision)+ offsets[axis]
-                if numval not in varnames[axis]:
-                    varnames[axis][numval] = axis + str(vars_seen[axis])
-                varname = varnames[axis][numval]
-                vars.append(varname)
-
-
-                #print(i, num, axis, varname)
+        if cmd == 'A':
+            rx, ry, rot, large_arc, sweep = numbers[position:position + ARC_PARAMETERS]
+            vars = [f'{rounding_func(rx, rounding_precision)}*w', f'{rounding_func(ry, rounding_precision)}*h',
+                    str(rot), str(int(large_arc)), str(int(sweep))]
+            position += ARC_PARAMETERS
+        for i in range(COMMAND_POINTS[cmd]):
+            vars.append(varname('x', numbers[position]))
+            vars.append(varname('y', numbers[position + 1]))
+            position += 2
         varlist = ', '.join(vars)
         commands.append(f'p.{cmd}({varlist})')
 
-
-    #assert vars_seen['x'] == vars_seen['y']
-
     axisalters = {'x':'w', 'y':'h'}
     for axis in varnames: # print variable assignments
         print(f'#{axis} coordinates')
@@ -210,11 +231,54 @@ def parse_svg_path(s, rounding_precision=3, firstx=0, firsty=0, rounding_func=ro
         print(cmd)
     print('d.append(p)')
 
-def save_flag(d, name, directory='output/', save_png=True, save_svg=True, show_image=False, suffix='', prefix='', same_folder=False):
+def save_flag(d, name, directory='output/', save_png=True, save_svg=True, show_image=False, suffix='', prefix='', same_folder=False,
+              optimise=False, flatten=False, precision=None, minify=False, share_paths=False, svgz=False, report=False,
+              thumbnail=None, png_scales=None, png_widths=None, indexed_png=False, png_tile_size=None,
+              session=None, sink=None, manifest=None, lossy_png=False):
     # keep same_folder False as the Notebooks are set up that way
+    # optimise: tidy up redundant layers (see optimise_layers.py) before saving
+    # flatten: save one path per colour with no overlaps, e.g. for print shops (see path_booleans.py)
+    # precision, minify, svgz: write a smaller SVG, with rounded coordinates, no defaults, and/or gzipped (see svg_export.py)
+    # share_paths: write paths that are drawn more than once (e.g. the stars of the Southern Cross) once, and <use> them
+    # report: print how much smaller the SVG is
+    # thumbnail: width in pixels to save a thumbnail at, leaving out detail that can't be seen at that size (see level_of_detail.py)
+    # png_scales, png_widths: save PNGs at these scales (e.g. [1, 2, 4]) and widths in pixels, parsing the SVG once (see png_export.py)
+    # indexed_png: save PNGs with a palette of the flag's colours rather than as 32-bit colour, which is much smaller.
+    #     PNGs that would need some of their edge pixels changing to fit in a palette are kept as they are...
+    # lossy_png: ...unless this is True, when they're written with those pixels changed to the nearest palette colour
+    # png_tile_size: draw PNGs bigger than this many pixels a tile at a time, e.g. 20000px print banners that wouldn't fit in memory
+    # session: a RasterSession to draw PNGs with, for saving lots of flags in one go (see png_export.py)
+    # sink: where the files go (see flag_output.py). By default they're written to disk; a MemorySink keeps them instead
+    # show_image shows the PNG from memory, so it doesn't need saving: use save_png=False, save_svg=False to only look at it
+    # manifest: folder to keep a manifest of hashes in (e.g. 'output/examples/'), so that only changed files are rewritten,
+    #     identical ones are hard-linked, and python -m drawflags sync can list what needs publishing (see ManifestSink).
+    #     That reads and rewrites the whole manifest for each flag, so when saving a batch pass one shared
+    #     sink=ManifestSink(folder) instead, and close it at the end (it's a context manager)
     assert directory.endswith('/')
+    own_sink = sink is None and manifest is not None
+    if own_sink:
+        sink = ManifestSink(manifest)
+    if isinstance(sink, ManifestSink):
+        # what the files are made from: the drawing as it was given, and how it's being saved
+        sink.spec_hash = get_spec_hash([d.as_svg(), optimise, flatten, precision, minify, share_paths, svgz, thumbnail,
+                                        png_scales, png_widths, indexed_png, png_tile_size, lossy_png])
+    if optimise or flatten or thumbnail:
+        d = copy.deepcopy(d) # so the drawing it was given is left as it was
+    if optimise:
+        optimise_layers(d)
+    if flatten:
+        flatten_layers(d)
+    if thumbnail:
+        reduce_detail(d, thumbnail)
+        d.set_render_size(w=thumbnail)
+    if minify and precision is None:
+        precision = COORDINATE_PRECISION
+    if sink is None:
+        sink = FileSink()
+    export = precision is not None or minify or share_paths or svgz
     whether_save = {'png':save_png, 'svg':save_svg}
     saved_to = []
+    shown_png = None
     for filetype in whether_save:
         if whether_save[filetype]:
             if same_folder:
@@ -222,17 +286,35 @@ def save_flag(d, name, directory='output/', save_png=True, save_svg=True, show_i
             else:
                 png_loc = directory + filetype + '/'
             png_name = png_loc + prefix + name + suffix + '.' + filetype
-            if not os.path.exists(png_loc):
-                os.makedirs(png_loc)
+            if filetype == 'svg' and svgz:
+                png_name += 'z'
             if filetype == 'png':
-                d.save_png(png_name)
+                colours = get_drawing_colours(d) if indexed_png else None
+                if png_scales or png_widths or png_tile_size:
+                    pngs = save_pngs(d, png_name, scales=png_scales or ([] if png_widths else [1]), widths=png_widths or [],
+                                     tile_size=png_tile_size, session=session, sink=sink, palette_colours=colours,
+                                     exact_only=not lossy_png)
+                else:
+                    png = shown_png = render_png_data(d, session)
+                    if colours is not None:
+                        png, index_info = index_png_data(png, colours, exact_only=not lossy_png)
+                    sink.write(png_name, png)
+                    pngs = [png_name]
+                saved_to.extend(pngs)
+            elif export:
+                export_report = write_svg(d, png_name, precision=precision, minify=minify,
+                                          share_paths=share_paths, svgz=svgz, sink=sink)
+                if report:
+                    print(format_export_report(export_report))
                 saved_to.append(png_name)
             else:
-                d.save_svg(png_name)
+                sink.write(png_name, d.as_svg().encode('utf-8'))
                 saved_to.append(png_name)
 
+    if own_sink:
+        sink.close()
     if show_image:
-        display(Image(filename=saved_to[0]))
+        show_flag(d, shown_png, session)
     return saved_to
 
 